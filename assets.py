@@ -0,0 +1,162 @@
+from fractions import Fraction
+import tkinter as tk
+import json
+import os
+
+
+IMAGE_DIRECTORY = "images"
+ATLAS_FILE = "atlas.png"
+ATLAS_INDEX_FILE = "atlas.json"
+CELL_SIZE = 40
+
+_managers = {}
+
+
+def get_assets(master):
+    """
+    Return the asset manager shared by every window of a Tk interpreter.
+
+    Tk images belong to the interpreter that created them, so there is one manager per interpreter
+    and every board, dialog and toplevel of that interpreter reuses its decoded images.
+
+    Parameters:
+    - master (tk.Misc): Any widget of the interpreter.
+    """
+
+    interpreter = master.tk
+    if interpreter not in _managers:
+        _managers[interpreter] = AssetManager(master)
+    return _managers[interpreter]
+
+
+class AssetManager:
+
+    def __init__(self, master, directory=IMAGE_DIRECTORY):
+        """
+        Initialize the asset manager.
+
+        Images are decoded lazily on first use and kept for the lifetime of the interpreter. If the directory
+        holds a sprite sheet (atlas.png with its atlas.json index), every image is cut from that one file.
+
+        Parameters:
+        - master (tk.Misc): A widget of the Tk interpreter that owns the images.
+        - directory (str, optional): The directory holding the PNG files.
+        """
+
+        self.master = master
+        self.directory = directory
+        self.cache = {}
+        self.atlas = None
+        self.atlas_index = None
+
+        index_path = os.path.join(directory, ATLAS_INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as file:
+                self.atlas_index = json.load(file)
+
+    def get(self, name, scale=1):
+        """
+        Return an image, decoding or scaling it on first use.
+
+        Parameters:
+        - name (str): The image name, without the .png extension.
+        - scale (float, optional): The scale factor of the variant to return.
+        """
+
+        scale = Fraction(scale).limit_denominator(8)
+        key = (name, scale)
+        if key not in self.cache:
+            if scale == 1:
+                self.cache[key] = self.decode(name)
+            else:
+                image = self.get(name)
+                if scale.numerator > 1:
+                    image = image.zoom(scale.numerator)
+                if scale.denominator > 1:
+                    image = image.subsample(scale.denominator)
+                self.cache[key] = image
+        return self.cache[key]
+
+    def decode(self, name):
+        """
+        Decode an image from the sprite sheet if there is one, or from its own PNG file otherwise.
+
+        Parameters:
+        - name (str): The image name, without the .png extension.
+        """
+
+        if self.atlas_index is not None and name in self.atlas_index:
+            if self.atlas is None:
+                self.atlas = tk.PhotoImage(master=self.master, file=os.path.join(self.directory, ATLAS_FILE))
+            x, y, width, height = self.atlas_index[name]
+            image = tk.PhotoImage(master=self.master, width=width, height=height)
+            image.tk.call(image, "copy", self.atlas, "-from", x, y, x + width, y + height)
+            return image
+        return tk.PhotoImage(master=self.master, file=os.path.join(self.directory, f"{name}.png"))
+
+    def images(self, names, scale=1):
+        """
+        Return a dictionary mapping each name to its image.
+
+        Parameters:
+        - names (list): The image names.
+        - scale (float, optional): The scale factor of the variants to return.
+        """
+
+        return {name: self.get(name, scale) for name in names}
+
+    def images_for_cell_size(self, names, cell_size):
+        """
+        Return a dictionary of images scaled for cells of the given size in pixels.
+
+        Parameters:
+        - names (list): The image names.
+        - cell_size (int): The side of a cell in pixels; CELL_SIZE is the native size.
+        """
+
+        return self.images(names, Fraction(cell_size, CELL_SIZE))
+
+    def preload(self, names=None, scales=(1,)):
+        """
+        Decode images ahead of time so that later lookups never touch the disk.
+
+        Parameters:
+        - names (list, optional): The image names. If None, every PNG in the directory is loaded.
+        - scales (tuple, optional): The scale factors to prepare for every image.
+        """
+
+        if names is None:
+            names = [file[:-4] for file in sorted(os.listdir(self.directory))
+                     if file.endswith(".png") and file != ATLAS_FILE]
+        for scale in scales:
+            self.images(names, scale)
+
+
+def build_atlas(master, directory=IMAGE_DIRECTORY):
+    """
+    Pack every PNG of a directory into one sprite sheet and write it with its index next to the images.
+
+    The images are laid out left to right in a single strip. Tk is used to decode and encode the PNGs,
+    so a widget of a running interpreter is needed.
+
+    Parameters:
+    - master (tk.Misc): A widget of the Tk interpreter used to decode and encode the images.
+    - directory (str, optional): The directory holding the PNG files.
+    """
+
+    names = [file[:-4] for file in sorted(os.listdir(directory)) if file.endswith(".png") and file != ATLAS_FILE]
+    images = {name: tk.PhotoImage(master=master, file=os.path.join(directory, f"{name}.png")) for name in names}
+
+    index = {}
+    x = 0
+    for name, image in images.items():
+        index[name] = [x, 0, image.width(), image.height()]
+        x += image.width()
+
+    atlas = tk.PhotoImage(master=master, width=x, height=max(image.height() for image in images.values()))
+    for name, image in images.items():
+        atlas.tk.call(atlas, "copy", image, "-to", index[name][0], 0)
+
+    atlas.write(os.path.join(directory, ATLAS_FILE), format="png")
+    with open(os.path.join(directory, ATLAS_INDEX_FILE), "w") as file:
+        json.dump(index, file, indent=4)
@@ -0,0 +1,328 @@
+import threading
+import shutil
+import queue
+import time
+import wave
+import io
+import os
+
+
+SOUND_DIRECTORY = "sounds"
+
+_audio = None
+
+
+class Sound:
+
+    def __init__(self, path):
+        """
+        Decode a WAV file into memory.
+
+        Parameters:
+        - path (str): The path to the WAV file.
+        """
+
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        with wave.open(path, "rb") as file:
+            self.channels = file.getnchannels()
+            self.sample_width = file.getsampwidth()
+            self.frame_rate = file.getframerate()
+            self.frames = file.readframes(file.getnframes())
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as file:
+            file.setnchannels(self.channels)
+            file.setsampwidth(self.sample_width)
+            file.setframerate(self.frame_rate)
+            file.writeframes(self.frames)
+        self.wav = buffer.getvalue()
+
+    @property
+    def duration(self):
+        """
+        Return the length of the sound in seconds.
+        """
+
+        return len(self.frames) / (self.channels * self.sample_width * self.frame_rate)
+
+
+class NullBackend:
+    """
+    A backend that plays nothing, for headless runs.
+    """
+
+    def play(self, sound):
+        """
+        Drop a sound without playing it.
+
+        Parameters:
+        - sound (Sound): The sound to play.
+        """
+
+
+class RecordingBackend:
+
+    def __init__(self):
+        """
+        Initialize a backend that records what would have been played instead of playing it.
+        """
+
+        self.played = []
+        self.lock = threading.Lock()
+
+    def play(self, sound):
+        """
+        Record the name of a sound and the time it was played.
+
+        Parameters:
+        - sound (Sound): The sound to play.
+        """
+
+        with self.lock:
+            self.played.append((time.monotonic(), sound.name))
+
+
+class WinsoundBackend:
+    """
+    A backend that plays sounds from memory with winsound, on Windows.
+
+    winsound plays one sound at a time for the whole process, and a new sound cuts the one playing, so the
+    backend only has one voice.
+    """
+
+    voices = 1
+
+    def __init__(self):
+        """
+        Import winsound.
+
+        Raises:
+        - ImportError: If winsound is not available on this platform.
+        """
+
+        import winsound
+        self.winsound = winsound
+
+    def play(self, sound):
+        """
+        Play a sound and wait for it to end.
+
+        Parameters:
+        - sound (Sound): The sound to play.
+        """
+
+        self.winsound.PlaySound(sound.wav, self.winsound.SND_MEMORY)
+
+
+class SimpleaudioBackend:
+    """
+    A backend that plays sounds from memory with the simpleaudio package, if it is installed.
+    """
+
+    def __init__(self):
+        """
+        Import simpleaudio.
+
+        Raises:
+        - ImportError: If simpleaudio is not installed.
+        """
+
+        import simpleaudio
+        self.simpleaudio = simpleaudio
+
+    def play(self, sound):
+        """
+        Play a sound and wait for it to end.
+
+        Parameters:
+        - sound (Sound): The sound to play.
+        """
+
+        self.simpleaudio.play_buffer(sound.frames, sound.channels, sound.sample_width,
+                                     sound.frame_rate).wait_done()
+
+
+class CommandBackend:
+
+    def __init__(self, command):
+        """
+        Initialize a backend that pipes sounds to a command line player such as aplay.
+
+        Parameters:
+        - command (list): The player command; it must read a WAV file from its standard input.
+        """
+
+        self.command = command
+
+    def play(self, sound):
+        """
+        Play a sound and wait for the player to exit.
+
+        Parameters:
+        - sound (Sound): The sound to play.
+        """
+
+        import subprocess
+        subprocess.run(self.command, input=sound.wav, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def default_backend():
+    """
+    Return the best available backend for this platform, or a NullBackend if none is available.
+    """
+
+    for backend in (WinsoundBackend, SimpleaudioBackend):
+        try:
+            return backend()
+        except ImportError:
+            pass
+    if shutil.which("aplay"):
+        return CommandBackend(["aplay", "-q", "-"])
+    return NullBackend()
+
+
+class AudioEngine:
+
+    def __init__(self, backend=None, directory=SOUND_DIRECTORY, max_voices=2, coalesce_interval=0.05):
+        """
+        Initialize the audio engine and start loading its sounds.
+
+        The backend is chosen and every WAV file of the directory is decoded once, on a background thread, so
+        neither the caller nor the first play() waits for them. Sounds are played by background worker
+        threads, one per voice, so play() only puts the name of the sound on a queue and never blocks.
+
+        Parameters:
+        - backend (object, optional): An object with a play(sound) method. If None, default_backend() is used.
+                                      A backend with a `voices` attribute, such as WinsoundBackend, never gets
+                                      more voices than that.
+        - directory (str, optional): The directory holding the WAV files.
+        - max_voices (int, optional): The maximum number of sounds playing at the same time.
+        - coalesce_interval (float, optional): Repeats of the same sound within this many seconds are dropped.
+        """
+
+        self.backend = backend
+        self.backend_lock = threading.Lock()
+        self.directory = directory
+        self.sounds = {}
+        self.max_voices = max_voices
+        self.coalesce_interval = coalesce_interval
+        self.last_played = {}
+        self.queue = queue.Queue(maxsize=max_voices)
+        self.workers = []
+        self.loader = threading.Thread(target=self.load, daemon=True)
+        self.loader.start()
+
+    def load(self):
+        """
+        Choose the backend if none was given, decode the sounds, then start one worker thread per voice.
+
+        The default backend is only installed if set_backend was not called meanwhile. A sound directory that
+        cannot be read leaves the engine silent.
+        """
+
+        if self.backend is None:
+            backend = default_backend()
+            with self.backend_lock:
+                if self.backend is None:
+                    self.backend = backend
+        try:
+            self.sounds = {sound.name: sound for sound in (Sound(os.path.join(self.directory, file))
+                                                           for file in sorted(os.listdir(self.directory))
+                                                           if file.endswith(".wav"))}
+        except (OSError, EOFError, wave.Error):
+            self.sounds = {}
+
+        for _ in range(min(self.max_voices, getattr(self.backend, "voices", self.max_voices))):
+            worker = threading.Thread(target=self.run, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def set_backend(self, backend):
+        """
+        Replace the backend, even while the engine is still loading.
+
+        Parameters:
+        - backend (object): An object with a play(sound) method.
+        """
+
+        with self.backend_lock:
+            self.backend = backend
+
+    def play(self, name):
+        """
+        Queue a sound for playback without blocking.
+
+        The sound is dropped if the same sound was queued within coalesce_interval seconds, or if every
+        voice is busy and the queue is full. Sounds queued while the engine is still loading are played
+        once it is ready.
+
+        Parameters:
+        - name (str): The sound name, without the .wav extension.
+        """
+
+        now = time.monotonic()
+        if now - self.last_played.get(name, -self.coalesce_interval) < self.coalesce_interval:
+            return
+        self.last_played[name] = now
+
+        try:
+            self.queue.put_nowait(name)
+        except queue.Full:
+            pass
+
+    def run(self):
+        """
+        Play queued sounds until a None sentinel is received.
+        """
+
+        while True:
+            name = self.queue.get()
+            if name is None:
+                return
+            sound = self.sounds.get(name)
+            if sound is None:
+                continue
+            try:
+                self.backend.play(sound)
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Stop the worker threads once the queued sounds have been played.
+        """
+
+        self.loader.join()
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+
+def get_audio():
+    """
+    Return the audio engine shared by the whole process, creating it on first use.
+    """
+
+    global _audio
+    if _audio is None:
+        _audio = AudioEngine()
+    return _audio
+
+
+def set_audio_backend(backend):
+    """
+    Replace the backend of the shared audio engine, for example with a NullBackend for headless runs.
+
+    If the engine does not exist yet, it is created with this backend, so the default backend is never chosen.
+
+    Parameters:
+    - backend (object): An object with a play(sound) method.
+    """
+
+    global _audio
+    if _audio is None:
+        _audio = AudioEngine(backend)
+    else:
+        _audio.set_backend(backend)
@@ -0,0 +1,299 @@
+import tkinter as tk
+import subprocess
+import tempfile
+import argparse
+import platform
+import shutil
+import time
+import json
+import os
+
+from engine import Engine, DEFAULT_DENSITY, mines_for_density
+from statistics import Statistics
+from board import Board, BoardResources
+import puzzle
+
+
+HISTORY_FILE = "benchmarks/history.json"
+BASELINE_FILE = "benchmarks/baseline.json"
+SIZES = [10, 16, 20, 50, 100, 200, 500]
+
+# Building widgets for the largest engine sizes takes too long to repeat, so the widget benchmark stops earlier.
+WIDGET_SIZES = [10, 16, 20, 50, 100]
+
+# A result slower than its baseline by more than this fraction, and by at least MIN_REGRESSION seconds, is
+# reported as a regression. The absolute floor keeps timer noise on sub-millisecond paths from being flagged.
+DEFAULT_THRESHOLD = 0.25
+MIN_REGRESSION = 0.00005
+DEFAULT_REPEAT = 7
+SEED = 12345
+STATUS_CALLS = 10000
+STATISTICS_GAMES = 1000
+
+
+def measure(function, setup=None, repeat=DEFAULT_REPEAT):
+    """
+    Time a function several times and return the fastest run in seconds, the least disturbed by other load.
+
+    Parameters:
+    - function (callable): The code to time. It receives the value returned by setup, if any.
+    - setup (callable, optional): Builds fresh, untimed input before every run.
+    - repeat (int, optional): The number of timed runs.
+    """
+
+    times = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def new_engine(size, place=True):
+    """
+    Return an engine with DEFAULT_DENSITY mines and a fixed seed, its safe tile in the centre.
+    """
+
+    engine = Engine(size, size, mines_for_density(size, size, DEFAULT_DENSITY), seed=SEED)
+    if place:
+        engine.generate_mines((size // 2, size // 2))
+    return engine
+
+
+def bench_engine(sizes, repeat):
+    """
+    Time mine generation, the reveal flood fill and STATUS_CALLS win/loss checks of the engine.
+    """
+
+    results = {}
+    for size in sizes:
+        results[f"generate_mines[{size}]"] = measure(
+            lambda engine: engine.generate_mines((size // 2, size // 2)),
+            lambda: new_engine(size, place=False), repeat)
+        results[f"reveal_cascade[{size}]"] = measure(
+            lambda engine: engine.reveal(size // 2, size // 2), lambda: new_engine(size), repeat)
+
+        def check_status(engine):
+            for _ in range(STATUS_CALLS):
+                engine.status
+        results[f"check_status[{size}]"] = measure(check_status, lambda: new_engine(size), repeat)
+    return results
+
+
+def bench_puzzles(repeat):
+    """
+    Time loading the puzzles from puzzles.json and from a binary puzzle pack.
+    """
+
+    with open(puzzle.PUZZLE_FILE, "r") as file:
+        puzzles = json.load(file)
+
+    def load(filename):
+        puzzle._banks.pop(filename, None)
+        puzzle.load_puzzle_bank(filename)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pack = os.path.join(directory, "puzzles.pack")
+        puzzle.write_puzzle_pack(puzzles, pack)
+        results = {
+            "load_puzzles[json]": measure(lambda _: load(puzzle.PUZZLE_FILE), repeat=repeat),
+            "load_puzzles[pack]": measure(lambda _: load(pack), repeat=repeat),
+        }
+        puzzle._banks.pop(pack, None)
+    return results
+
+
+def bench_statistics(repeat):
+    """
+    Time recording STATISTICS_GAMES games in the statistics database, including the background writes,
+    and loading the aggregates back.
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        def record(recorder):
+            for game in range(STATISTICS_GAMES):
+                recorder.update_statistics("16x16", "easy", game % 2 == 0, game % 300)
+            recorder.save_statistics()
+
+        def fresh():
+            filename = os.path.join(directory, f"statistics-{time.perf_counter_ns()}.db")
+            return Statistics(filename)
+
+        results["update_statistics"] = measure(record, fresh, repeat)
+        results["load_statistics"] = measure(lambda recorder: recorder.load_statistics(), fresh, repeat)
+    return results
+
+
+def start_display():
+    """
+    Make sure a display is available for Tk, starting Xvfb if there is none.
+
+    Returns:
+    - subprocess.Popen or None: The Xvfb process to stop afterwards, if one was started.
+
+    Raises:
+    - RuntimeError: If there is no display and Xvfb is not installed.
+    """
+
+    if os.environ.get("DISPLAY") or platform.system() != "Linux":
+        return None
+    if not shutil.which("Xvfb"):
+        raise RuntimeError("no display available and Xvfb is not installed")
+    display = ":97"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def bench_widgets(sizes, repeat):
+    """
+    Time building the board widgets for each grid size, including the switch between renderers.
+
+    The board records its games in a temporary statistics database, never in the player's.
+    """
+
+    results = {}
+    directory = tempfile.TemporaryDirectory()
+    root = tk.Tk()
+    resources = BoardResources(root, statistics=Statistics(os.path.join(directory.name, "statistics.db")))
+    board = Board(root, difficulty="easy", grid=f"{sizes[0]}x{sizes[0]}", sound="OFF", resources=resources)
+    board.pack()
+    try:
+        for size in sizes:
+            def build(_):
+                board.restart_game(grid=f"{size}x{size}")
+                board.update()
+
+            def other_size():
+                board.restart_game(grid="9x9")
+                board.update()
+            results[f"create_board[{size}]"] = measure(build, other_size, repeat)
+    finally:
+        resources.close()
+        root.destroy()
+        directory.cleanup()
+    return results
+
+
+def run(sizes, widget_sizes, repeat, widgets=True):
+    """
+    Run every benchmark and return the results in seconds, keyed by benchmark name.
+
+    Parameters:
+    - sizes (list): The grid sizes of the engine benchmarks.
+    - widget_sizes (list): The grid sizes of the widget benchmark.
+    - repeat (int): The number of timed runs per benchmark.
+    - widgets (bool, optional): Whether to run the widget benchmark, which needs a display or Xvfb.
+    """
+
+    results = {}
+    results.update(bench_engine(sizes, repeat))
+    results.update(bench_puzzles(repeat))
+    results.update(bench_statistics(repeat))
+
+    if widgets:
+        try:
+            xvfb = start_display()
+        except RuntimeError as error:
+            print(f"Skipping widget benchmarks: {error}.")
+        else:
+            try:
+                results.update(bench_widgets(widget_sizes, repeat))
+            finally:
+                if xvfb is not None:
+                    xvfb.terminate()
+    return results
+
+
+def git_revision():
+    """
+    Return the current git commit, or None outside a git checkout.
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_json(filename, default):
+    """
+    Return the contents of a JSON file, or default if it does not exist.
+    """
+
+    if not os.path.exists(filename):
+        return default
+    with open(filename, "r") as file:
+        return json.load(file)
+
+
+def write_json(filename, data):
+    """
+    Write data to a JSON file, creating its directory if needed.
+    """
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w") as file:
+        json.dump(data, file, indent=4)
+
+
+def regressions(results, baseline, threshold):
+    """
+    Return (name, baseline, result) for every result slower than its baseline by more than threshold.
+    """
+
+    return [(name, baseline[name], seconds) for name, seconds in results.items()
+            if name in baseline and seconds > baseline[name] * (1 + threshold)
+            and seconds - baseline[name] >= MIN_REGRESSION]
+
+
+def main():
+    """
+    Run the benchmarks, append them to the history file and compare them to the baseline.
+
+    The exit status is 1 if any benchmark regressed.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark the PySweeper hot paths.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="grid sizes of the engine benchmarks")
+    parser.add_argument("--widget-sizes", nargs="+", type=int, default=WIDGET_SIZES,
+                        help="grid sizes of the widget benchmark")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--no-widgets", action="store_true", help="skip the widget benchmark")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON file the results are appended to")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON file of the baseline results")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction a result may exceed its baseline by before it is a regression")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.widget_sizes, args.repeat, widgets=not args.no_widgets)
+    baseline = read_json(args.baseline, {})
+
+    for name, seconds in results.items():
+        change = f"{seconds / baseline[name] - 1:+.1%}" if baseline.get(name) else ""
+        print(f"{name:<28} {seconds * 1000:>12.4f} ms {change:>9}")
+
+    history = read_json(args.history, [])
+    history.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+                    "python": platform.python_version(), "platform": platform.platform(), "results": results})
+    write_json(args.history, history)
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Saved the baseline to {args.baseline}.")
+        return 0
+
+    slower = regressions(results, baseline, args.threshold)
+    for name, before, after in slower:
+        print(f"REGRESSION {name}: {before * 1000:.4f} ms -> {after * 1000:.4f} ms")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,79 +1,327 @@
+from collections import deque
 import tkinter as tk
 import random
+import time
+import os
 
 from utils import play_sound, open_github, open_rules, toggle_sound
+from audio import get_audio
 from statistics import Statistics
 from puzzle import PuzzleManager
+from engine import Engine, IN_PROGRESS, grid_dimensions, mines_for_grid
+from renderer import ButtonRenderer, CanvasRenderer, CELL_SIZE
+from instrumentation import Instrumentation
+from scheduler import FrameScheduler, TaskGroup, PRIORITY_SOUND, PRIORITY_LABEL, PRIORITY_ANIMATION, PRIORITY_BACKGROUND
+from savegame import SavedGame, save_game, AUTOSAVE_FILE
+from replay import Replay, ReplayRecorder, REPLAY_DIRECTORY, REVEAL, FLAG, MARK, ANSWER
+from assets import get_assets
 from cell import Cell
 
 
-class Board(tk.Tk):
+# Modules used only by menu entries or optional features (the solver, the board pool, online play, endless
+# mode and the file dialogs) are imported where they are first used, to keep them out of the startup path.
 
-    def __init__(self, difficulty, grid, sound="ON"):
+# Reveal animation: at most REVEAL_CELLS_PER_FRAME cells per frame of the scheduler, within its frame budget.
+REVEAL_CELLS_PER_FRAME = 24
+
+# Boards larger than this are drawn on a single canvas unless a renderer is chosen explicitly.
+MAX_BUTTON_GRID = 20
+
+# Auto-solve reveals one provably safe cell every AUTO_SOLVE_INTERVAL seconds.
+AUTO_SOLVE_INTERVAL = 0.05
+
+REPLAY_SPEEDS = [1, 2, 4, 8]
+
+# The running game timers are read every TIMER_TICK seconds, by one task shared by all the boards.
+TIMER_TICK = 0.25
+
+# Messages from a game server are collected every SERVER_POLL_INTERVAL seconds.
+SERVER_POLL_INTERVAL = 0.02
+
+# A game waiting for a no-guess board asks the board pool again every NO_GUESS_RETRY seconds.
+NO_GUESS_RETRY = 0.1
+
+IMAGE_FILES = [
+    "safe", "0", "1", "2", "3", "4", "5", "6", "7", "8",
+    "question", "py", "py_green", "flag", "question_mark",
+    "tile", "yellow", "green", "red", "timer", "icon"
+]
+
+
+class BoardResources:
+
+    def __init__(self, master, statistics=None):
+        """
+        Initialize the resources shared by every board of a Tk interpreter.
+
+        The boards share the decoded images, the statistics database and its writer thread, and one frame
+        scheduler, whose single timer task also drives the clocks of all the running games. The puzzle bank is
+        shared through load_puzzle_bank, which loads it when the first puzzle is opened. The sounds of the
+        shared audio engine start loading in the background here, before the first one is played.
+
+        Parameters:
+        - master (tk.Misc): The root window the boards live in.
+        - statistics (Statistics, optional): The statistics the games are recorded in. If None, the player's
+                                             statistics database is opened.
+        """
+
+        self.assets = get_assets(master)
+        get_audio()
+        self.statistics = statistics if statistics is not None else Statistics()
+        self.scheduler = FrameScheduler(master)
+        self.timed = set()
+
+    def images(self, cell_size=CELL_SIZE):
+        """
+        Return the images of a board, scaled for cells of the given size in pixels.
+        """
+
+        return self.assets.images_for_cell_size(IMAGE_FILES, cell_size)
+
+    def start_timer(self, board):
+        """
+        Update the timer of a board on every tick until stop_timer is called.
+        """
+
+        self.timed.add(board)
+        if not self.scheduler.is_pending("timer"):
+            self.scheduler.call(self.tick, priority=PRIORITY_LABEL, delay=TIMER_TICK, key="timer")
+
+    def stop_timer(self, board):
         """
-        Initialize the game board.
+        Stop updating the timer of a board.
+        """
+
+        self.timed.discard(board)
+
+    def tick(self):
+        """
+        Update the timers of the running games, then wait for the next tick while any game is running.
+        """
+
+        for board in list(self.timed):
+            board.update_timer()
+        if self.timed:
+            self.scheduler.call(self.tick, priority=PRIORITY_LABEL, delay=TIMER_TICK, key="timer")
+
+    def close(self):
+        """
+        Flush and close the statistics database.
+        """
+
+        self.statistics.close()
+
+
+class Board(tk.Frame):
+
+    def __init__(self, master, difficulty, grid, sound="ON", density=None, animate_reveals=True,
+                 renderer=None, no_guess=False, resources=None, cell_size=CELL_SIZE, standalone=True,
+                 seed=None):
+        """
+        Initialize the game board as a widget. It is shown once it is packed or gridded into its master.
 
         Parameters:
+        - master (tk.Misc): The parent widget.
         - difficulty (str): The difficulty level of the game.
         - grid (str): The grid size of the board, which determines the board's dimensions and number of mines.
+        - density (float, optional): The fraction of cells holding a mine. If None, the preset mine count of
+                                     the grid is used, or DEFAULT_DENSITY for grids without a preset.
+        - animate_reveals (bool, optional): Whether large reveals are drawn progressively over several frames.
+        - renderer (str, optional): "button" to draw each cell as a tk.Button or "canvas" to draw the grid on
+                                    one tk.Canvas. If None, the canvas is used for grids above MAX_BUTTON_GRID.
+        - no_guess (bool, optional): Whether to only deal boards that can be cleared without guessing. They are
+                                     generated ahead of time by the worker processes of generator.BoardPool.
+        - resources (BoardResources, optional): The resources shared with other boards. If None, the board
+                                                creates its own.
+        - cell_size (int, optional): The side of a cell in pixels.
+        - standalone (bool, optional): Whether the board owns its window: it then sets the window's title and
+                                       menu bar and saves the game in progress when the window is closed.
+        - seed (int, optional): The seed of the first game. If None, a random seed is used.
         """
 
-        super().__init__()
+        super().__init__(master)
+        self.window = self.winfo_toplevel()
+        self.standalone = standalone
+        self.resources = resources if resources is not None else BoardResources(self.window)
+        self.cell_size = cell_size
 
         self.difficulty = difficulty
         self.grid = grid
-        self.size = 10 if grid == "10x10" else (16 if grid == "16x16" else 20)
-        self.mines = 10 if grid == "10x10" else (40 if grid == "16x16" else 70)
+        self.density = density
+        self.chosen_settings = None
+        self.no_guess = no_guess
+        self.size = None
+        self.mines = None
 
         self.settings_menu = None
+        self.no_guess_variable = None
         self.sound = sound
 
-        self.statistics = Statistics()
-        self.statistics.load_statistics()
+        self.statistics = self.resources.statistics
 
         self.puzzle_manager = PuzzleManager()
 
-        self.geometry(f"+{self.winfo_screenwidth() // 4}+{self.winfo_screenheight() // 8}")
-        self.resizable(False, False)
+        self.instrumentation = Instrumentation(self)
+        self.overlay_variable = None
 
-        self.image_files = [
-            "safe", "0", "1", "2", "3", "4", "5", "6", "7", "8",
-            "question", "py", "py_green", "flag", "question_mark",
-            "tile", "yellow", "green", "red", "timer", "icon"
-        ]
-        self.images = {name: tk.PhotoImage(file=f"images/{name}.png") for name in self.image_files}
-        self.iconphoto(False, self.images["icon"])
+        self.images = self.resources.images(cell_size)
 
+        self.label_frame = None
         self.mines_label = None
         self.timer_label = None
         self.btn_img = None
-        self.update_timer_id = None
-
-        self.buttons = [[Cell(self, row, col) for col in range(self.size)] for row in range(self.size)]
+        self.scheduler = TaskGroup(self.resources.scheduler)
+        self.animate_reveals = animate_reveals
+        self.renderer_choice = renderer
+        self.renderer = None
+
+        self.engine = None
+        self.seed = None
+        self.seeds = random.SystemRandom()
+        self.recorder = None
+        self.replaying = False
+        self.replay_speed_variable = None
+        self.solver = None
+        self.probabilities = None
+        self.heatmap_visible = False
+        self.buttons = []
         self.game_is_on = 1
         self.timer_value = 0
+        self.timer_start = None
+        self.safe_tile = None
+        self.reveal_pending = deque()
+        self.client = None
+
+        if standalone:
+            self.window.geometry(f"+{self.winfo_screenwidth() // 4}+{self.winfo_screenheight() // 8}")
+            self.window.resizable(False, False)
+            self.window.iconphoto(False, self.images["icon"])
+            self.create_menu()
+            self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.new_game(seed=seed)
+
+    def new_game(self, seed=None, dealt=None, engine=None):
+        """
+        Set up a new game in the existing window.
+
+        The widgets, images, statistics and puzzles are kept. The grid is only rebuilt when its size changes;
+        otherwise the engine is cleared and the cells are redrawn in place. The mines, the safe tile and the
+        puzzles all follow from the game's seed, and the game is recorded as a replay.
+
+        Parameters:
+        - seed (int, optional): The seed of the game. If None, a random seed is used. A given seed places the
+                                mines it was played with, so no board is taken from the no-guess pool.
+        - dealt (tuple, optional): The (safe tile, layout) of a board to play instead of generating one.
+        - engine (Engine, optional): An engine whose mines are placed elsewhere, such as a RemoteEngine
+                                     mirroring a game server. It is played as it is: no mines are dealt,
+                                     no safe tile is drawn, the timer is not started and nothing is recorded.
+        """
+
+        self.hide_heatmap()
+
+        size = grid_dimensions(self.grid)[0]
+        mines = mines_for_grid(self.grid, self.density)
+
+        if size != self.size or mines != self.mines:
+            self.size = size
+            self.mines = mines
+            self.engine = Engine(self.size, self.size, self.mines)
+            if self.renderer is not None:
+                self.renderer.destroy()
+                self.label_frame.destroy()
+            self.buttons = [[Cell(self, row, col) for col in range(self.size)] for row in range(self.size)]
+            renderer_name = self.renderer_choice or ("button" if self.size <= MAX_BUTTON_GRID else "canvas")
+            self.renderer = (ButtonRenderer if renderer_name == "button" else CanvasRenderer)(self)
+            self.create_board()
+        else:
+            self.engine.reset()
+            for row in self.buttons:
+                for cell in row:
+                    cell.puzzle = None
+                    cell.user_puzzle_solution = 0
+                    cell.refresh()
+            self.mines_label.config(text=self.mines)
+            self.timer_label.config(text="")
+            self.btn_img.config(image=self.images["yellow"])
+
+        self.seed = seed if seed is not None else self.seeds.getrandbits(64)
+        self.engine.random.seed(self.seed)
+        self.puzzle_manager.reset(seed=self.seed)
+        self.puzzle_manager.hide_window()
+        self.reveal_pending.clear()
+        self.solver = None
+        self.probabilities = None
+        self.replaying = False
+        self.game_is_on = 1
+
+        if engine is not None:
+            self.engine = engine
+            self.recorder = None
+        elif dealt is None and seed is None and self.no_guess:
+            self.game_is_on = None
+            self.deal_no_guess()
+        else:
+            self.deal(dealt)
+
+    def deal(self, dealt=None):
+        """
+        Place the mines of the new game, mark its safe tile and start the game.
 
-        self.create_board()
-        self.create_menu()
-        self.safe_tile = (random.randint(0, self.size - 1), random.randint(0, self.size - 1))
-        self.buttons[self.safe_tile[0]][self.safe_tile[1]].btn.config(image=self.images["safe"])
+        Parameters:
+        - dealt (tuple, optional): The (safe tile, layout) of a board to play. If None, the mines are placed
+                                   from the game's seed.
+        """
+
+        if dealt is not None:
+            self.safe_tile, layout = dealt
+            self.engine.place_mines(layout)
+        else:
+            self.safe_tile = (self.engine.random.randrange(self.size), self.engine.random.randrange(self.size))
+            self.generate_mines(safe_tile=self.safe_tile)
+        self.game_is_on = 1
+        self.renderer.draw(self.safe_tile[0], self.safe_tile[1], "safe")
+        self.recorder = ReplayRecorder(self.size, self.size, self.mines, self.difficulty, self.seed, dealt)
 
-        self.update_timer()
-        self.generate_mines(safe_tile=self.safe_tile)
+        self.start_timer()
 
-        self.mainloop()
+    def deal_no_guess(self):
+        """
+        Deal a no-guess board from the board pool, or check again later while none is ready.
+
+        The cells ignore clicks until the board is dealt, since game_is_on is None meanwhile. If the pool
+        keeps failing to find a board of this size that can be cleared without guessing, this is reported
+        and a random board is dealt instead.
+        """
+
+        from generator import get_board_pool
+
+        pool = get_board_pool()
+        dealt = pool.get(self.size, self.size, self.mines)
+        if dealt is not None:
+            self.deal(dealt)
+        elif pool.failing(self.size, self.size, self.mines):
+            self.deal()
+            self.display_alert(title="No Guessing", message="No board could be found that can be\n"
+                                                            "cleared without guessing, so this\n"
+                                                            "board may need a guess.")
+        else:
+            self.scheduler.call(self.deal_no_guess, priority=PRIORITY_BACKGROUND, delay=NO_GUESS_RETRY,
+                                key="no_guess")
 
     def create_board(self):
         """
-        Create and initialize the graphical game board with buttons and labels.
+        Create and initialize the graphical game board with its renderer and labels.
         """
 
-        self.title("PySweeper")
+        if self.standalone:
+            self.window.title("PySweeper")
 
         pad = self.size * 10 if self.size == 10 else (self.size * 14 if self.size == 16 else self.size * 16)
+        pad = pad * self.cell_size // CELL_SIZE
 
         label_frame = tk.Frame(self, relief="ridge", borderwidth=4)
         label_frame.grid(row=0, column=0, columnspan=self.size, pady=3)
+        self.label_frame = label_frame
 
         mines_img = tk.Label(label_frame, image=self.images["py"])
         mines_img.grid(row=0, column=0, sticky="w")
@@ -88,14 +336,9 @@ class Board(tk.Tk):
         self.btn_img = tk.Button(label_frame, image=self.images["yellow"], command=self.restart_game)
         self.btn_img.grid(row=0, column=self.size // 2, padx=pad)
 
-        for r in range(self.size):
-            for c in range(self.size):
-                button = tk.Button(self, width=40, height=40, relief="flat", borderwidth=0,
-                                   command=self.buttons[r][c].reveal_cell, image=self.images["tile"])
-                button.grid(row=r + 1, column=c)
-                button.bind("<Button-2>", lambda event, row=r, col=c: self.buttons[row][col].question_mark())
-                button.bind("<Button-3>", lambda event, row=r, col=c: self.buttons[row][col].flag())
-                self.buttons[r][c].btn = button
+        self.renderer.build()
+        if self.instrumentation.enabled:
+            self.instrumentation.tag_widgets()
 
     def create_menu(self):
         """
@@ -108,26 +351,47 @@ class Board(tk.Tk):
         difficulty_menu = tk.Menu(settings_menu, tearoff=0)
         grid_menu = tk.Menu(settings_menu, tearoff=0)
         about_menu = tk.Menu(menu_bar, tearoff=0)
+        debug_menu = tk.Menu(menu_bar, tearoff=0)
 
         file_menu.add_command(label="New Game", command=self.restart_game)
+        file_menu.add_command(label="Endless Mode", command=self.open_endless)
+        file_menu.add_command(label="Hint", command=self.hint)
+        file_menu.add_command(label="Auto Solve", command=self.auto_solve)
+        file_menu.add_command(label="Mine Probabilities", command=self.show_heatmap)
+        file_menu.add_command(label="Watch Replay...", command=self.open_replay)
+        file_menu.add_command(label="Play Online...", command=self.open_online)
+        file_menu.add_command(label="Save Game", command=self.save_game)
+        file_menu.add_command(label="Resume Saved Game", command=self.resume_game)
         file_menu.add_command(label="Statistics", command=self.statistics.show_statistics)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.destroy)
+        file_menu.add_command(label="Exit", command=self.close)
 
         settings_menu.add_command(label="Reset Statistics", command=self.statistics.reset_statistics)
 
         for _dif in ["easy", "medium", "hard"]:
             difficulty_menu.add_radiobutton(
                 label=_dif.capitalize(),
-                command=lambda difficulty=_dif: self.restart_game(difficulty=difficulty, grid=self.grid)
+                command=lambda difficulty=_dif: self.restart_game(difficulty=difficulty)
             )
         for _grid in ["10x10", "16x16", "20x20"]:
             grid_menu.add_radiobutton(
                 label=_grid,
-                command=lambda grid_size=_grid: self.restart_game(difficulty=self.difficulty, grid=grid_size)
+                command=lambda grid_size=_grid: self.restart_game(grid=grid_size)
             )
 
         settings_menu.add_command(label=f"Sound {self.sound}", command=lambda: toggle_sound(self))
+        replay_speed_menu = tk.Menu(settings_menu, tearoff=0)
+        self.replay_speed_variable = tk.IntVar(self, value=REPLAY_SPEEDS[0])
+        for speed in REPLAY_SPEEDS:
+            replay_speed_menu.add_radiobutton(label=f"{speed}x", variable=self.replay_speed_variable, value=speed)
+        self.no_guess_variable = tk.BooleanVar(self, value=self.no_guess)
+        settings_menu.add_checkbutton(label="No Guessing", variable=self.no_guess_variable,
+                                      command=self.toggle_no_guess)
+
+        self.overlay_variable = tk.BooleanVar(self, value=False)
+        debug_menu.add_checkbutton(label="Performance Overlay", variable=self.overlay_variable,
+                                   command=self.toggle_overlay)
+        debug_menu.add_command(label="Dump Performance Data...", command=self.dump_performance)
 
         about_menu.add_command(label="Rules", command=open_rules)
         about_menu.add_command(label="GitHub", command=open_github)
@@ -136,10 +400,42 @@ class Board(tk.Tk):
         menu_bar.add_cascade(label="Settings", menu=settings_menu)
         settings_menu.add_cascade(label="Difficulty", menu=difficulty_menu)
         settings_menu.add_cascade(label="Grid Size", menu=grid_menu)
+        settings_menu.add_cascade(label="Replay Speed", menu=replay_speed_menu)
+        menu_bar.add_cascade(label="Debug", menu=debug_menu)
         menu_bar.add_cascade(label="About", menu=about_menu)
 
         self.settings_menu = settings_menu
-        self.config(menu=menu_bar)
+        self.window.config(menu=menu_bar)
+
+    def toggle_overlay(self):
+        """
+        Show or hide the performance overlay. Measuring starts with the overlay and stops when it is hidden.
+        """
+
+        if self.overlay_variable.get():
+            self.instrumentation.show_overlay()
+        else:
+            self.instrumentation.disable()
+
+    def dump_performance(self):
+        """
+        Ask for a file name and write the recorded performance data to it as CSV.
+        """
+
+        from tkinter import filedialog
+        filename = filedialog.asksaveasfilename(parent=self, title="Dump Performance Data",
+                                                defaultextension=".csv", initialfile="performance.csv",
+                                                filetypes=[("CSV files", "*.csv")])
+        if filename:
+            self.instrumentation.dump(filename)
+
+    def toggle_no_guess(self):
+        """
+        Switch between boards that can be cleared without guessing and purely random boards, then start a new game.
+        """
+
+        self.no_guess = self.no_guess_variable.get()
+        self.restart_game()
 
     def generate_mines(self, safe_tile):
         """
@@ -150,133 +446,186 @@ class Board(tk.Tk):
         where no mines should be placed or adjacent to.
         """
 
-        mines_generated = []
+        self.engine.generate_mines(safe_tile)
 
-        while len(mines_generated) < self.mines:
-            mine = (tuple(random.randint(0, self.size - 1) for _ in range(2)))
-            row_range = range(safe_tile[0] - 1, safe_tile[0] + 2)
-            column_range = range(safe_tile[1] - 1, safe_tile[1] + 2)
-            adjacent_mine = False
-            for i in row_range:
-                for j in column_range:
-                    if (0 <= i < self.size) and (0 <= j < self.size):
-                        if mine == (i, j):
-                            adjacent_mine = True
-                            break
-            if not adjacent_mine and mine not in mines_generated:
-                mines_generated.append(mine)
+    def show_revealed(self, indices):
+        """
+        Draw a batch of newly revealed cells, then check the game state once.
 
-        for mine in mines_generated:
-            self.buttons[mine[0]][mine[1]].has_mine = True
-            row_range = range(mine[0] - 1, mine[0] + 2)
-            column_range = range(mine[1] - 1, mine[1] + 2)
-            for i in row_range:
-                for j in column_range:
-                    if (0 <= i < self.size) and (0 <= j < self.size):
-                        self.buttons[i][j].neighbor_mine_count += 1
+        Small batches are drawn immediately. Larger ones are spread across the frames of the scheduler, each
+        frame drawing at most REVEAL_CELLS_PER_FRAME cells within its budget, in the order they were revealed.
+        A batch revealed while an earlier one is still being drawn joins the same queue after it.
 
-    def reveal_neighbors(self, row, col):
+        Parameters:
+        - indices (list): The flat indices of the revealed cells, as returned by Engine.reveal.
         """
-        Recursively reveal neighboring cells when a cell with no neighboring mines is revealed.
 
-        Parameters:
-        - row (int): The row index of the cell.
-        - col (int): The column index of the cell.
+        if self.solver is not None:
+            self.solver.update(indices)
+        if self.heatmap_visible:
+            self.hide_heatmap()
+            if self.engine.status == IN_PROGRESS and self.solver.next_safe() is None:
+                self.show_heatmap()
+
+        for index in indices:
+            cell = self.buttons[index // self.size][index % self.size]
+            if self.difficulty != "easy" and not cell.has_mine and cell.neighbor_mine_count > 0:
+                cell.puzzle = self.puzzle_manager.set_puzzle(self.difficulty, cell.neighbor_mine_count)
+
+        self.reveal_pending.extend(indices)
+        if self.scheduler.is_pending("reveal_animation"):
+            return
+        if not self.animate_reveals or len(self.reveal_pending) <= REVEAL_CELLS_PER_FRAME:
+            while self.reveal_pending:
+                index = self.reveal_pending.popleft()
+                self.buttons[index // self.size][index % self.size].refresh()
+            self.is_game_in_progress()
+            return
+        self.draw_reveals()
+
+    def draw_reveals(self):
+        """
+        Draw the next slice of the pending revealed cells and schedule another frame if any remain, then check
+        the game state once they are all drawn.
+        """
+
+        drawn = 0
+        while self.reveal_pending:
+            index = self.reveal_pending.popleft()
+            self.buttons[index // self.size][index % self.size].refresh()
+            drawn += 1
+            if self.reveal_pending and (drawn >= REVEAL_CELLS_PER_FRAME or not self.scheduler.has_time()):
+                self.scheduler.call(self.draw_reveals, priority=PRIORITY_ANIMATION, key="reveal_animation")
+                return
+        self.is_game_in_progress()
+
+    def get_solver(self):
         """
+        Return the solver of the current game, creating it from the revealed cells on first use.
 
-        neighbors = []
+        Once created, the solver is updated incrementally by show_revealed.
+        """
 
-        # Gather the list of all neighbors
-        for i in [-1, 0, 1]:
-            for j in [-1, 0, 1]:
-                if i == 0 and j == 0:
-                    continue
-                r = row + i
-                c = col + j
-                if 0 <= r < self.size and 0 <= c < self.size:
-                    neighbors.append((r, c))
+        if self.solver is None:
+            from solver import Solver
+            self.solver = Solver(self.engine)
+        return self.solver
 
-        def reveal_with_delay(index=0):
-            """Reveals neighboring cells with a delay.
+    def hint(self):
+        """
+        Highlight a cell that the revealed numbers prove to be safe.
+        """
 
-            Parameters:
-            - index (int): The index of the current cell in the neighbors list to be revealed.
-                   Starts from 0 and is incremented in each recursive call to process the next neighbor.
-            """
+        if self.game_is_on != 1:
+            return
 
-            if index < len(neighbors):
-                rx, cx = neighbors[index]
-                neighbor_cell = self.buttons[rx][cx]
+        index = self.get_solver().next_safe()
+        if index is None:
+            self.show_heatmap()
+        else:
+            self.renderer.draw(index // self.size, index % self.size, "safe")
 
-                if not neighbor_cell.is_revealed and not neighbor_cell.has_mine:
-                    neighbor_cell.reveal_cell(user_initiated=False)
+    def auto_solve(self):
+        """
+        Reveal provably safe cells one after another until the game ends or a guess is needed.
+        """
+
+        self.scheduler.cancel("auto_solve")
+        if self.game_is_on != 1:
+            return
+
+        index = self.get_solver().next_safe()
+        if index is not None:
+            self.buttons[index // self.size][index % self.size].reveal_cell(user_initiated=False)
+            self.scheduler.call(self.auto_solve, priority=PRIORITY_BACKGROUND, delay=AUTO_SOLVE_INTERVAL,
+                                key="auto_solve")
+        else:
+            self.show_heatmap()
+
+    def show_heatmap(self):
+        """
+        Write the probability of holding a mine over every unrevealed cell.
+
+        While the heatmap is visible it is recomputed after every reveal that leaves no provably safe cell.
+        """
 
-                self.after(10, lambda: reveal_with_delay(index + 1))
+        if self.game_is_on != 1:
+            return
 
-        reveal_with_delay()
+        if self.probabilities is None:
+            from probability import MineProbabilities
+            self.probabilities = MineProbabilities(self.get_solver(), self.mines)
+        self.renderer.show_probabilities(self.probabilities.compute())
+        self.heatmap_visible = True
+
+    def hide_heatmap(self):
+        """
+        Remove the heatmap written by show_heatmap.
+        """
+
+        if self.heatmap_visible:
+            self.renderer.clear_probabilities()
+            self.heatmap_visible = False
 
     def check_loss(self):
         """
         Check if the game has been lost by revealing a mine.
         """
 
-        for r in self.buttons:
-            for cell in r:
-                if cell.has_mine and cell.is_revealed:
-                    if self.sound == "ON":
-                        play_sound("sounds/lose.wav")
-                    self.game_is_on = 0
-                    if self.difficulty != "easy":
-                        self.puzzle_manager.count_puzzles_solved(self)
+        if self.engine.exploded:
+            if self.sound == "ON":
+                self.queue_sound("sounds/lose.wav")
+            self.game_is_on = 0
 
     def check_win(self):
         """
         Check if the game has been won by revealing all non-mine cells.
         """
 
-        squares_discovered = 0
-
-        for r in self.buttons:
-            for cell in r:
-                if not cell.has_mine and cell.is_revealed:
-                    squares_discovered += 1
-
-        if squares_discovered == ((self.size * self.size) - self.mines):
+        if self.engine.safe_revealed == self.engine.cell_count - self.mines:
             if self.sound == "ON":
-                play_sound("sounds/win.wav")
+                self.queue_sound("sounds/win.wav")
             self.game_is_on = 2
-            if self.difficulty != "easy":
-                self.puzzle_manager.count_puzzles_solved(self)
 
     def is_game_in_progress(self):
         """
         Check the current state of the game (ongoing(1), lost(0), or won(2)) and update UI accordingly.
+
+        Both checks read the engine's running counters, and the end of the game is handled only once.
         """
 
+        if self.game_is_on != 1:
+            return
+
         self.check_loss()
-        self.check_win()
+        if self.game_is_on == 1:
+            self.check_win()
+        if self.game_is_on != 1:
+            self.resources.stop_timer(self)
+            self.read_timer()
+            self.timer_label.config(text=f"{self.timer_value} ")
 
         if self.game_is_on == 0:
             self.btn_img.config(image=self.images["red"])
-            for r in self.buttons:
-                for cell in r:
-                    if cell.has_mine:
-                        cell.btn.config(image=self.images["py_green"])
+            for index, has_mine in enumerate(self.engine.has_mine):
+                if has_mine:
+                    self.renderer.draw(index // self.size, index % self.size, "py_green")
             if self.difficulty != "easy":
                 failed_attempts = self.puzzle_manager.puzzles_solved - self.puzzle_manager.correct_puzzles_solved
                 self.display_alert(title="Game Over!",
                                    message=f"Total Puzzles Solved: {self.puzzle_manager.puzzles_solved}\n "
                                            f"Correct Puzzles Solved: {self.puzzle_manager.correct_puzzles_solved}\n "
                                            f"Failed Attempts: {failed_attempts}")
-            self.statistics.update_statistics(grid=self.grid, difficulty=self.difficulty,
-                                              win=False, time_taken=self.timer_value)
+            if not self.replaying:
+                self.statistics.update_statistics(grid=self.grid, difficulty=self.difficulty,
+                                                  win=False, time_taken=self.timer_value)
+                self.report_statistics_error()
 
         elif self.game_is_on == 2:
             self.btn_img.config(image=self.images["green"])
-            for r in self.buttons:
-                for cell in r:
-                    if cell.has_mine:
-                        cell.btn.config(image=self.images["flag"])
+            for index, has_mine in enumerate(self.engine.has_mine):
+                if has_mine:
+                    self.renderer.draw(index // self.size, index % self.size, "flag")
             self.mines_label.config(text="0")
             if self.difficulty != "easy":
                 failed_attempts = self.puzzle_manager.puzzles_solved - self.puzzle_manager.correct_puzzles_solved
@@ -284,56 +633,423 @@ class Board(tk.Tk):
                                    message=f"Total Puzzles Solved: {self.puzzle_manager.puzzles_solved}\n "
                                            f"Correct Puzzles Solved: {self.puzzle_manager.correct_puzzles_solved}\n "
                                            f"Failed Attempts: {failed_attempts}")
-            self.statistics.update_statistics(grid=self.grid, difficulty=self.difficulty,
-                                              win=True, time_taken=self.timer_value)
+            if not self.replaying:
+                self.statistics.update_statistics(grid=self.grid, difficulty=self.difficulty,
+                                                  win=True, time_taken=self.timer_value)
+                self.report_statistics_error()
 
-    def update_mines_label(self, value):
+        if self.game_is_on != 1 and self.recorder is not None:
+            self.recorder.finish(self.game_is_on, self.timer_value, self.engine, self.puzzle_manager)
+            self.recorder.save()
+            self.recorder = None
+
+    def report_statistics_error(self):
+        """
+        Tell the player if the statistics writer failed to save games since the last check.
+        """
+
+        error = self.statistics.take_error()
+        if error is not None:
+            self.display_alert(title="Statistics", message=f"Some games could not be saved\n"
+                                                           f"to the statistics:\n{error}")
+
+    def update_mines_label(self):
+        """
+        Update the mines label with the number of mines left to flag, once per frame however often it is asked.
+        """
+
+        self.scheduler.call(self.draw_mines_label, priority=PRIORITY_LABEL, key="mines_label")
+
+    def draw_mines_label(self):
+        """
+        Write the number of mines left to flag in the mines label.
+        """
+
+        self.mines_label.config(text=str(self.mines - self.engine.flags_placed))
+
+    def queue_sound(self, sound_path):
         """
-        Update the mines label with the current number of flagged mines.
+        Play a sound in the next frame. A sound asked for several times within a frame is played once.
 
         Parameters:
-        - value (int): The change in the number of flagged mines.
+        - sound_path (str): The path to the sound file, such as "sounds/flag.wav".
         """
 
-        current_value = int(self.mines_label.cget("text"))
-        new_value = current_value + value
-        self.mines_label.config(text=str(new_value))
+        self.scheduler.call(play_sound, sound_path, priority=PRIORITY_SOUND, key=("sound", sound_path))
+
+    def start_timer(self, elapsed=0):
+        """
+        Start the game timer on the monotonic clock.
+
+        Parameters:
+        - elapsed (int, optional): The seconds already played, for a resumed game.
+        """
+
+        self.timer_start = time.monotonic() - elapsed
+        self.timer_value = elapsed
+        self.timer_label.config(text=f"{elapsed} ")
+        self.resources.start_timer(self)
+
+    def read_timer(self):
+        """
+        Set timer_value to the whole seconds elapsed since the timer started.
+        """
+
+        self.timer_value = int(time.monotonic() - self.timer_start)
 
     def update_timer(self):
         """
-        Update the timer label to display the elapsed time.
+        Update the timer label to display the elapsed time. Called on every tick of the shared resources.
+
+        The time is read from the monotonic clock rather than counted in ticks, so late ticks never make
+        the timer drift, and the label is only changed when the number of seconds does.
         """
 
         if self.game_is_on == 1:
-            self.timer_label.config(text=f"{self.timer_value} ")
-            self.timer_value += 1
-            self.update_timer_id = self.after(1000, self.update_timer)
+            shown = self.timer_value
+            self.read_timer()
+            if self.timer_value != shown:
+                self.timer_label.config(text=f"{self.timer_value} ")
 
-    def restart_game(self, difficulty=None, grid=None):
+    def restart_game(self, difficulty=None, grid=None, seed=None, dealt=None, engine=None):
         """
-        Restart the game by destroying the current window and creating a new game instance.
+        Restart the game in place, reusing the window, widgets and loaded assets.
+
+        If the current game was loaded by restart_loaded_game, the player's own settings are restored first.
 
         Parameters:
         - difficulty (str, optional): The difficulty level for the new game. Can be "easy", "medium", or "hard".
                                       If None, the current difficulty is used.
-        - grid (str, optional): The grid size for the new game. Can be "10x10", "16x16", or "20x20".
+        - grid (str, optional): The grid size for the new game, such as "10x10", "16x16", or "20x20".
                                 If None, the current grid size is used.
+        - seed (int, optional): The seed of the new game, passed to new_game.
+        - dealt (tuple, optional): The (safe tile, layout) of a board to play, passed to new_game.
+        - engine (Engine, optional): An engine whose mines are placed elsewhere, passed to new_game.
         """
 
+        if self.chosen_settings is not None:
+            self.difficulty, self.grid, self.density = self.chosen_settings
+            self.chosen_settings = None
         self.difficulty = difficulty if difficulty is not None else self.difficulty
         self.grid = grid if grid is not None else self.grid
 
-        self.after_cancel(self.update_timer_id)
-        self.destroy()
-        Board(difficulty=self.difficulty, grid=self.grid, sound=self.sound)
+        self.scheduler.clear()
+        self.resources.stop_timer(self)
+        self.leave_online()
+        self.new_game(seed=seed, dealt=dealt, engine=engine)
+
+    def restart_loaded_game(self, difficulty, rows, cols, mines, seed=None, dealt=None, engine=None):
+        """
+        Restart the game with the settings of a game loaded from a replay, a game server or a save file.
+
+        The player's own difficulty, grid size and density are kept aside meanwhile, and the next
+        restart_game restores them, so a new game after a loaded one uses the player's settings again.
+
+        Parameters:
+        - difficulty (str): The difficulty level of the loaded game.
+        - rows (int): The number of rows of the loaded game.
+        - cols (int): The number of columns of the loaded game.
+        - mines (int): The number of mines of the loaded game.
+        - seed (int, optional): The seed of the loaded game, passed to new_game.
+        - dealt (tuple, optional): The (safe tile, layout) of the loaded game, passed to new_game.
+        - engine (Engine, optional): The engine of a game hosted elsewhere, passed to new_game.
+        """
+
+        chosen = self.chosen_settings or (self.difficulty, self.grid, self.density)
+        self.chosen_settings = None
+        self.density = mines / (rows * cols)
+        self.restart_game(difficulty=difficulty, grid=f"{rows}x{cols}", seed=seed, dealt=dealt, engine=engine)
+        self.chosen_settings = chosen
+
+    def record_action(self, action, index, answer=0):
+        """
+        Add a player action to the replay of the current game, if it is being recorded.
+
+        Parameters:
+        - action (int): replay.REVEAL, FLAG, MARK or ANSWER.
+        - index (int): The flat index of the cell.
+        - answer (int, optional): The number chosen for an ANSWER.
+        """
+
+        if self.recorder is not None:
+            self.recorder.record(action, index, answer)
+
+    def open_replay(self):
+        """
+        Ask for a replay file and play it.
+        """
+
+        from tkinter import filedialog
+        filename = filedialog.askopenfilename(parent=self, title="Watch Replay", initialdir=REPLAY_DIRECTORY,
+                                              filetypes=[("PySweeper replays", "*.pysr")])
+        if filename:
+            self.play_replay(Replay.load(filename))
+
+    def play_replay(self, replay):
+        """
+        Play a replay on the board at the speed chosen in Settings > Replay Speed.
+
+        The replayed game is neither recorded nor counted in the statistics.
+
+        Parameters:
+        - replay (Replay): The replay to play.
+        """
+
+        self.restart_loaded_game(replay.difficulty, replay.rows, replay.cols, replay.mines, seed=replay.seed,
+                                 dealt=replay.dealt)
+        self.recorder = None
+        self.replaying = True
+        events = iter(replay.events)
+
+        def schedule(event):
+            """
+            Apply an event after its recorded delay, shortened by the replay speed.
+            """
+
+            if event is not None:
+                self.scheduler.call(play_event, event, priority=PRIORITY_BACKGROUND,
+                                    delay=event[0] / self.replay_speed_variable.get(), key="replay")
+
+        def play_event(event):
+            """
+            Apply one recorded action through the cell, as the player did, and schedule the next one.
+            """
+
+            _, action, index, answer = event
+            cell = self.buttons[index // self.size][index % self.size]
+            if action == REVEAL and not cell.is_revealed:
+                cell.reveal_cell()
+            elif action == FLAG:
+                cell.flag()
+            elif action == MARK:
+                cell.question_mark()
+            elif action == ANSWER:
+                self.puzzle_manager.record_solution(cell, answer)
+                cell.user_puzzle_solution = answer
+                cell.refresh()
+            schedule(next(events, None))
+
+        schedule(next(events, None))
+
+    def open_endless(self):
+        """
+        Open a window playing an endless world.
+        """
+
+        from endless import EndlessWindow
+        EndlessWindow(self)
+
+    def open_online(self):
+        """
+        Ask for a game server and a game, then play or watch it.
+
+        An empty game number starts a race for two on the current grid and difficulty, a number joins that
+        game as the next player, and "watch <number>" follows it as a spectator.
+        """
+
+        from tkinter import simpledialog
+        from server import DEFAULT_HOST, DEFAULT_PORT
+        from client import GameClient
+
+        address = simpledialog.askstring("Play Online", "Server address:", parent=self,
+                                         initialvalue=f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        if not address:
+            return
+        choice = simpledialog.askstring("Play Online", "Game number to join, \"watch <number>\" to spectate,\n"
+                                        "or leave empty to start a race:", parent=self)
+        if choice is None:
+            return
+
+        host, _, port = address.rpartition(":")
+        try:
+            client = GameClient(host or DEFAULT_HOST, int(port))
+        except (OSError, ValueError) as error:
+            self.display_alert(title="Play Online", message=f"Cannot connect:\n{error}")
+            return
+
+        words = choice.split()
+        if not words:
+            client.create(self.grid, self.difficulty, players=2, density=self.density)
+        elif words[0] == "watch" and len(words) == 2 and words[1].isdigit():
+            client.spectate(int(words[1]))
+        elif choice.isdigit():
+            client.join(int(choice))
+        else:
+            client.close()
+            self.display_alert(title="Play Online", message="Unknown game.")
+            return
+
+        reply = client.wait("joined", "spectating", "error", "closed")
+        if reply is None or reply["op"] not in ("joined", "spectating"):
+            client.close()
+            message = reply["message"] if reply is not None and reply["op"] == "error" else "No answer."
+            self.display_alert(title="Play Online", message=message)
+            return
+        self.play_online(client, reply)
+
+    def play_online(self, client, info):
+        """
+        Play, or watch, a game hosted by a game server.
+
+        The board mirrors the server's board through a RemoteEngine and is redrawn from the deltas the server
+        sends, starting from the safe tile. The mines stay on the server until a board is finished, so no
+        layout is dealt here. A spectator watches the first player. Online games are not recorded as replays.
+
+        Parameters:
+        - client (GameClient): The connection to the server.
+        - info (dict): The "joined" or "spectating" message of the server.
+        """
+
+        from client import RemoteEngine
+
+        rows, cols, mines = info["rows"], info["cols"], info["mines"]
+        engine = RemoteEngine(client, rows, cols, mines, info["player"])
+        engine.started = info["started"]
+        self.restart_loaded_game(info["difficulty"], rows, cols, mines, engine=engine)
+        self.client = client
+        self.safe_tile = tuple(info["safe_tile"])
+        # A watched game is not the player's own, so it is left out of the statistics like a replay.
+        self.replaying = info["player"] is None
+        if engine.started:
+            self.start_timer()
+
+        self.renderer.draw(self.safe_tile[0], self.safe_tile[1], "safe")
+        if self.standalone:
+            role = "watching" if info["player"] is None else f"player {info['player'] + 1} of {info['players']}"
+            self.window.title(f"PySweeper - online game {info['game']}, {role}")
+        self.poll_server()
+
+    def poll_server(self):
+        """
+        Apply the messages received from the game server, then check again shortly.
+        """
+
+        watched = self.engine.player if self.engine.player is not None else 0
+        for message in self.client.poll():
+            op = message["op"]
+            if op == "delta" and message["player"] == watched:
+                revealed = self.engine.apply(message["cells"])
+                shown = set(revealed)
+                for index, _ in message["cells"]:
+                    if index not in shown:
+                        self.buttons[index // self.size][index % self.size].refresh()
+                self.update_mines_label()
+                if revealed:
+                    self.show_revealed(revealed)
+            elif op == "start":
+                self.engine.started = True
+                self.start_timer()
+            elif op == "result":
+                winner = message["winner"]
+                self.display_alert(title="Race Over", message="Nobody cleared the board." if winner is None
+                                   else f"Player {winner + 1} cleared the board first.")
+            elif op == "error":
+                self.display_alert(title="Play Online", message=message["message"])
+            elif op == "closed":
+                self.client = None
+                if self.game_is_on == 1:
+                    self.display_alert(title="Play Online", message="The connection to the server was lost.")
+                return
+        self.scheduler.call(self.poll_server, priority=PRIORITY_BACKGROUND, delay=SERVER_POLL_INTERVAL,
+                            key="server")
+
+    def leave_online(self):
+        """
+        Close the connection to the game server, if the board is playing online.
+        """
+
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def save_game(self, filename=AUTOSAVE_FILE):
+        """
+        Save the game in progress, with its puzzles, answers and timer, so that it can be resumed later.
+
+        Parameters:
+        - filename (str, optional): The path of the save file.
+        """
+
+        if self.game_is_on != 1 or self.client is not None:
+            return
+
+        self.read_timer()
+        puzzles = {cell.index: (cell.puzzle, cell.user_puzzle_solution)
+                   for row in self.buttons for cell in row if cell.puzzle is not None}
+        save_game(filename, self.engine, self.difficulty, self.game_is_on, self.timer_value, self.seed,
+                  self.safe_tile, puzzles)
+
+    def resume_game(self, filename=AUTOSAVE_FILE):
+        """
+        Replace the current game with a saved one.
+
+        A resumed game is not recorded as a replay, since its earlier moves are not known.
+
+        Parameters:
+        - filename (str, optional): The path of the save file.
+        """
+
+        if not os.path.exists(filename):
+            self.display_alert(title="Resume Game", message="There is no saved game to resume.")
+            return
+
+        saved = None
+        try:
+            saved = SavedGame(filename)
+            puzzles = saved.puzzles()
+        except (OSError, ValueError):
+            if saved is not None:
+                saved.close()
+            self.display_alert(title="Resume Game", message="The saved game is damaged\nand cannot be resumed.")
+            return
+
+        try:
+            self.restart_loaded_game(saved.difficulty, saved.rows, saved.cols, saved.mines, seed=saved.seed,
+                                     dealt=(saved.safe_tile, saved.layer("has_mine")))
+            self.recorder = None
+            saved.restore(self.engine)
+
+            for index, (puzzle, answer) in puzzles.items():
+                cell = self.buttons[index // self.size][index % self.size]
+                cell.puzzle = puzzle
+                if answer:
+                    self.puzzle_manager.record_solution(cell, answer)
+                cell.user_puzzle_solution = answer
+            self.start_timer(saved.timer_value)
+        finally:
+            saved.close()
+
+        for row in self.buttons:
+            for cell in row:
+                cell.refresh()
+        if not self.engine.is_revealed[self.engine.index(*self.safe_tile)]:
+            self.renderer.draw(self.safe_tile[0], self.safe_tile[1], "safe")
+        self.update_mines_label()
+
+    def close(self):
+        """
+        Save the game in progress and close the window.
+        """
+
+        self.save_game()
+        self.window.destroy()
+
+    def destroy(self):
+        """
+        Drop the board's pending work and timer from the shared resources, then destroy its widgets.
+        """
+
+        self.scheduler.clear()
+        self.resources.stop_timer(self)
+        self.leave_online()
+        super().destroy()
 
     def display_window(self):
         """
-        Display the main game window.
+        Return to the main game window, hiding the puzzle window.
         """
 
-        self.puzzle_manager.puzzle_window.destroy()
-        self.deiconify()
+        self.puzzle_manager.hide_window()
 
     def display_alert(self, title, message):
         """
@@ -346,8 +1062,8 @@ class Board(tk.Tk):
 
         alert_window = tk.Toplevel(self)
 
-        x = self.winfo_x() + (self.winfo_width() - 300) // 2
-        y = self.winfo_y() + (self.winfo_height() - 125) // 2
+        x = self.winfo_rootx() + (self.winfo_width() - 300) // 2
+        y = self.winfo_rooty() + (self.winfo_height() - 125) // 2
 
         alert_window.title(title)
         alert_window.geometry("300x125")
@@ -1,8 +1,10 @@
-from utils import play_sound
+from replay import REVEAL, FLAG, MARK, ANSWER
 
 
 class Cell:
 
+    __slots__ = ("row", "col", "index", "puzzle", "user_puzzle_solution", "board")
+
     def __init__(self, board, row, col):
         """
         Initialize a cell object.
@@ -15,23 +17,73 @@ class Cell:
 
         self.row = row
         self.col = col
-        self.has_mine = False
-        self.is_revealed = False
-        self.is_flagged = False
-        self.is_marked = False
-        self.neighbor_mine_count = 0
+        self.index = board.engine.index(row, col)
         self.puzzle = None
         self.user_puzzle_solution = 0
-        self.btn = None
         self.board = board
 
+    @property
+    def has_mine(self):
+        """
+        Return whether the cell holds a mine, as stored in the board's engine.
+
+        Returns:
+        - bool: True if the cell holds a mine.
+        """
+
+        return bool(self.board.engine.has_mine[self.index])
+
+    @property
+    def is_revealed(self):
+        """
+        Return whether the cell has been revealed, as stored in the board's engine.
+
+        Returns:
+        - bool: True if the cell is revealed.
+        """
+
+        return bool(self.board.engine.is_revealed[self.index])
+
+    @property
+    def is_flagged(self):
+        """
+        Return whether the cell is flagged, as stored in the board's engine.
+
+        Returns:
+        - bool: True if the cell is flagged.
+        """
+
+        return bool(self.board.engine.is_flagged[self.index])
+
+    @property
+    def is_marked(self):
+        """
+        Return whether the cell is marked with a question mark, as stored in the board's engine.
+
+        Returns:
+        - bool: True if the cell is marked.
+        """
+
+        return bool(self.board.engine.is_marked[self.index])
+
+    @property
+    def neighbor_mine_count(self):
+        """
+        Return the number of mines in the cells around this one, as stored in the board's engine.
+
+        Returns:
+        - int: The number of neighboring mines, from 0 to 8.
+        """
+
+        return self.board.engine.neighbor_mine_count[self.index]
+
     def reveal_cell(self, user_initiated=True):
         """
         Reveals the cell and updates its appearance.
 
         If the cell contains a mine, it will display the mine; otherwise, it displays the
-        number of neighboring mines. If the cell has no neighboring mines, it reveals
-        adjacent cells as well.
+        number of neighboring mines. If the cell has no neighboring mines, the whole empty
+        region around it is revealed at once and handed to the board as one batch.
 
         Parameters:
         - user_initiated (bool): Indicates whether the cell reveal was initiated by the user.
@@ -39,31 +91,45 @@ class Cell:
         """
 
         if self.board.game_is_on == 1:
+            self.board.record_action(REVEAL, self.index)
             if not self.is_revealed:
-                self.is_revealed = True
-                if self.has_mine:
-                    self.btn.config(relief="raised", image=self.board.images["py"])
-                else:
-                    if user_initiated and self.board.sound == "ON":
-                        play_sound("sounds/reveal.wav")
-                    if self.neighbor_mine_count == 0:
-                        self.btn.config(image=self.board.images["0"])
-                        self.board.reveal_neighbors(self.row, self.col)
-                    else:
-                        if self.board.difficulty != "easy":
-                            self.btn.config(image=self.board.images["question"])
-                            self.puzzle = self.board.puzzle_manager.set_puzzle(self.board.difficulty,
-                                                                               self.neighbor_mine_count)
-                        else:
-                            self.btn.config(image=self.board.images[str(self.neighbor_mine_count)])
-                    if self.is_flagged:
-                        self.board.update_mines_label(1)
-
-                self.board.is_game_in_progress()
+                flags_placed = self.board.engine.flags_placed
+                revealed = self.board.engine.reveal(self.row, self.col)
+                if not self.has_mine and user_initiated and self.board.sound == "ON":
+                    self.board.queue_sound("sounds/reveal.wav")
+                if self.board.engine.flags_placed != flags_placed:
+                    self.board.update_mines_label()
+                self.board.show_revealed(revealed)
 
             elif self.board.difficulty != "easy" and not self.has_mine and self.neighbor_mine_count > 0:
                 self.board.puzzle_manager.display_window(self.board, self)
 
+    def refresh(self):
+        """
+        Redraw the cell to match its current state.
+        """
+
+        if not self.is_revealed:
+            if self.is_flagged:
+                image = "flag"
+            elif self.is_marked:
+                image = "question_mark"
+            else:
+                image = "tile"
+        elif self.has_mine:
+            image = "py"
+        elif self.neighbor_mine_count == 0:
+            image = "0"
+        elif self.board.difficulty == "easy":
+            image = str(self.neighbor_mine_count)
+        elif self.user_puzzle_solution > 0:
+            image = str(self.user_puzzle_solution)
+        else:
+            image = "question"
+
+        relief = "raised" if self.is_revealed and self.has_mine else "flat"
+        self.board.renderer.draw(self.row, self.col, image, relief)
+
     def flag(self):
         """
         Toggles is_flag variable on or off.
@@ -73,20 +139,12 @@ class Cell:
         """
 
         if self.board.game_is_on == 1:
-            if not self.is_revealed and self.is_flagged:
-                if self.board.sound == "ON":
-                    play_sound("sounds/flag.wav")
-                self.btn.config(image=self.board.images["tile"])
-                self.is_flagged = False
-                self.board.update_mines_label(1)
-            elif int(self.board.mines_label.cget("text")) <= 0:
-                return
-            elif not self.is_revealed and not self.is_marked and not self.is_flagged:
+            self.board.record_action(FLAG, self.index)
+            if self.board.engine.flag(self.row, self.col):
                 if self.board.sound == "ON":
-                    play_sound("sounds/flag.wav")
-                self.btn.config(image=self.board.images["flag"])
-                self.is_flagged = True
-                self.board.update_mines_label(-1)
+                    self.board.queue_sound("sounds/flag.wav")
+                self.refresh()
+                self.board.update_mines_label()
 
     def question_mark(self):
         """
@@ -97,12 +155,9 @@ class Cell:
         """
 
         if self.board.game_is_on == 1:
-            if not self.is_revealed and not self.is_marked and not self.is_flagged:
-                self.btn.config(image=self.board.images["question_mark"])
-                self.is_marked = True
-            elif not self.is_revealed and self.is_marked:
-                self.btn.config(image=self.board.images["tile"])
-                self.is_marked = False
+            self.board.record_action(MARK, self.index)
+            if self.board.engine.mark(self.row, self.col):
+                self.refresh()
 
     def update_cell(self, image_number):
         """
@@ -112,6 +167,8 @@ class Cell:
         - image_number (str): The key corresponding to the new image in the self.images dictionary.
         """
 
-        self.btn.config(image=self.board.images[image_number])
+        self.board.record_action(ANSWER, self.index, int(image_number))
+        self.board.puzzle_manager.record_solution(self, int(image_number))
         self.user_puzzle_solution = int(image_number)
+        self.refresh()
         self.board.display_window()
@@ -0,0 +1,260 @@
+from collections import deque
+import threading
+import socket
+import queue
+import time
+
+from engine import Engine, IN_PROGRESS
+from replay import REVEAL, FLAG, MARK
+from server import (DEFAULT_HOST, DEFAULT_PORT, FRAME, REVEALED_MINE, FLAGGED, MARKED, MINE, decode,
+                    encode_action, encode_control)
+
+
+CONNECT_TIMEOUT = 5
+
+
+class GameClient:
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Connect to a game server.
+
+        A background thread reads the messages of the server into a queue, so they can be collected with
+        poll() from the Tk event loop without ever blocking it.
+
+        Parameters:
+        - host (str, optional): The address of the server.
+        - port (int, optional): The TCP port of the server.
+        - path (str, optional): A Unix socket to connect to instead of TCP.
+
+        Raises:
+        - OSError: If the server cannot be reached.
+        """
+
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(CONNECT_TIMEOUT)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(None)
+        self.messages = queue.Queue()
+        self.pending = deque()
+        self.closed = False
+        self.thread = threading.Thread(target=self.receive, daemon=True)
+        self.thread.start()
+
+    def receive(self):
+        """
+        Read messages until the connection closes, then queue a {"op": "closed"} message.
+        """
+
+        reader = self.socket.makefile("rb")
+        try:
+            while True:
+                header = reader.read(FRAME.size)
+                if len(header) < FRAME.size:
+                    break
+                kind, length = FRAME.unpack(header)
+                self.messages.put(decode(kind, reader.read(length)))
+        except (OSError, ValueError):
+            pass
+        finally:
+            reader.close()
+            self.messages.put({"op": "closed"})
+
+    def send(self, data):
+        """
+        Send an encoded message; a failure shows up as the connection closing.
+        """
+
+        try:
+            self.socket.sendall(data)
+        except OSError:
+            self.close()
+
+    def create(self, grid, difficulty, players=1, density=None, seed=None):
+        """
+        Ask the server for a new game and join it as its first player.
+        """
+
+        message = {"op": "create", "grid": grid, "difficulty": difficulty, "players": players, "density": density}
+        if seed is not None:
+            message["seed"] = seed
+        self.send(encode_control(message))
+
+    def join(self, game):
+        """
+        Ask to join a game as its next player.
+        """
+
+        self.send(encode_control({"op": "join", "game": game}))
+
+    def spectate(self, game):
+        """
+        Ask to follow a game as a spectator.
+        """
+
+        self.send(encode_control({"op": "spectate", "game": game}))
+
+    def act(self, action, index):
+        """
+        Send a replay.REVEAL, FLAG or MARK action on a cell.
+        """
+
+        self.send(encode_action(action, index))
+
+    def poll(self):
+        """
+        Return the messages received since the last call, without waiting.
+        """
+
+        messages = list(self.pending)
+        self.pending.clear()
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def wait(self, *ops, timeout=CONNECT_TIMEOUT):
+        """
+        Wait for a message with one of the given operations and return it, keeping the others for poll().
+
+        Returns:
+        - dict or None: The message, or None if the timeout expired first.
+        """
+
+        deadline = time.monotonic() + timeout
+        skipped = []
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    message = self.messages.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message["op"] in ops:
+                    return message
+                skipped.append(message)
+            return None
+        finally:
+            self.pending.extend(skipped)
+
+    def close(self):
+        """
+        Close the connection.
+        """
+
+        if not self.closed:
+            self.closed = True
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
+
+
+class RemoteEngine(Engine):
+
+    def __init__(self, client, rows, cols, mines, player=None):
+        """
+        Initialize a mirror of a board hosted by a game server, which a Board can play in place of an Engine.
+
+        The mirror only knows what its player can see. Reveals are sent to the server and take effect when its
+        delta arrives through apply(). Flags and marks only depend on visible state, so they are applied at
+        once and also sent to the server, whose delta then confirms them.
+
+        Parameters:
+        - client (GameClient): The connection to the server.
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines.
+        - player (int, optional): The number of the player. If None, the board is only watched.
+        """
+
+        super().__init__(rows, cols, mines)
+        self.client = client
+        self.player = player
+        self.started = False
+
+    def playable(self, index):
+        """
+        Return whether the player may act on a cell now.
+        """
+
+        return (self.player is not None and self.started and not self.client.closed
+                and self.status == IN_PROGRESS and not self.is_revealed[index])
+
+    def reveal(self, row, col):
+        """
+        Send a reveal to the server. The revealed cells arrive later as a delta, so nothing is returned now.
+        """
+
+        index = row * self.cols + col
+        if self.playable(index):
+            self.client.act(REVEAL, index)
+        return []
+
+    def flag(self, row, col):
+        """
+        Toggle a flag at once and send it to the server, if the player may act on the cell.
+
+        Returns:
+        - bool: True if the flag was toggled, False otherwise.
+        """
+
+        index = row * self.cols + col
+        if not self.playable(index) or not super().flag(row, col):
+            return False
+        self.client.act(FLAG, index)
+        return True
+
+    def mark(self, row, col):
+        """
+        Toggle a question mark at once and send it to the server, if the player may act on the cell.
+
+        Returns:
+        - bool: True if the mark was toggled, False otherwise.
+        """
+
+        index = row * self.cols + col
+        if not self.playable(index) or not super().mark(row, col):
+            return False
+        self.client.act(MARK, index)
+        return True
+
+    def apply(self, cells):
+        """
+        Apply the (index, value) pairs of a delta and keep the counters in sync.
+
+        Returns:
+        - list: The indices of the cells the delta revealed, in the order of the delta.
+        """
+
+        revealed = []
+        for index, value in cells:
+            if value <= REVEALED_MINE:
+                if self.is_revealed[index]:
+                    continue
+                if self.is_flagged[index]:
+                    self.is_flagged[index] = 0
+                    self.flags_placed -= 1
+                self.is_marked[index] = 0
+                self.is_revealed[index] = 1
+                if value == REVEALED_MINE:
+                    self.has_mine[index] = 1
+                    self.exploded = True
+                else:
+                    self.neighbor_mine_count[index] = value
+                    self.safe_revealed += 1
+                revealed.append(index)
+            elif value == MINE:
+                self.has_mine[index] = 1
+            else:
+                flagged = int(value == FLAGGED)
+                self.flags_placed += flagged - self.is_flagged[index]
+                self.is_flagged[index] = flagged
+                self.is_marked[index] = int(value == MARKED)
+        return revealed
+
@@ -0,0 +1,554 @@
+from collections import deque
+import tkinter as tk
+import tempfile
+import random
+
+from engine import DEFAULT_DENSITY, count_neighbors, pack_bits, unpack_bits
+from scheduler import FrameScheduler, PRIORITY_RENDER
+from utils import play_sound
+
+
+CHUNK_SIZE = 32
+
+# The viewport shows VIEW_COLS x VIEW_ROWS cells. Chunks further than EVICT_DISTANCE chunks from it are evicted.
+VIEW_COLS = 24
+VIEW_ROWS = 16
+EVICT_DISTANCE = 2
+
+# A flood fill stops FLOOD_DISTANCE chunks beyond the viewport, or beyond its starting cell's chunk, and goes on
+# when the viewport comes near the cells where it stopped.
+FLOOD_DISTANCE = 1
+
+# At most ARCHIVE_LIMIT evicted chunks are archived in memory; older ones are spilled to a temporary file.
+ARCHIVE_LIMIT = 4096
+
+# The number of cells the arrow keys and the mouse wheel scroll by.
+PAN_STEP = 4
+
+
+class Chunk:
+
+    def __init__(self, cx, cy, has_mine):
+        """
+        Initialize the state of one square chunk of an endless world.
+
+        Parameters:
+        - cx (int): The column of the chunk in chunk coordinates.
+        - cy (int): The row of the chunk in chunk coordinates.
+        - has_mine (bytearray): One byte per cell of the chunk, 1 where there is a mine.
+        """
+
+        self.cx = cx
+        self.cy = cy
+        self.has_mine = has_mine
+        self.neighbor_mine_count = None
+        self.is_revealed = bytearray(len(has_mine))
+        self.is_flagged = bytearray(len(has_mine))
+        self.touched = False
+
+
+class EndlessWorld:
+
+    def __init__(self, seed, density=DEFAULT_DENSITY, chunk_size=CHUNK_SIZE):
+        """
+        Initialize an unbounded minefield split into square chunks.
+
+        The mines of a chunk follow from the seed and the chunk's coordinates alone, so a chunk is only
+        generated when it is first looked at or reached by a flood fill, and an evicted chunk can be generated
+        again identically. Chunks the player has changed keep their revealed and flagged cells as bitmaps when
+        they are evicted; the ARCHIVE_LIMIT most recent ones are kept in memory and the others in a temporary
+        file. The cells around (0, 0), where the game starts, never hold a mine.
+
+        Flood fills are bounded to a region around the viewport, so revealing an empty area never generates
+        chunks without end. The empty cells where a fill stopped form its frontier, from which expand()
+        carries the fill on as the viewport moves.
+
+        Parameters:
+        - seed (int): The seed of the world.
+        - density (float, optional): The fraction of cells holding a mine.
+        - chunk_size (int, optional): The width and height of a chunk in cells.
+        """
+
+        self.seed = seed
+        self.density = density
+        self.chunk_size = chunk_size
+        self.chunks = {}
+        self.archive = {}
+        self.spill = None
+        self.spilled = {}
+        self.free_slots = []
+        self.frontier = {}
+        self.safe_revealed = 0
+        self.flags_placed = 0
+        self.exploded = False
+
+    def layout(self, cx, cy):
+        """
+        Return the mines of a chunk as a bytearray, generated from the seed and the chunk coordinates.
+        """
+
+        size = self.chunk_size
+        cells = range(size * size)
+        if cx in (-1, 0) and cy in (-1, 0):
+            cells = [index for index in cells
+                     if not (-1 <= cx * size + index % size <= 1 and -1 <= cy * size + index // size <= 1)]
+
+        has_mine = bytearray(size * size)
+        rng = random.Random(f"{self.seed}:{cx}:{cy}")
+        for index in rng.sample(cells, round(self.density * size * size)):
+            has_mine[index] = 1
+        return has_mine
+
+    def chunk(self, cx, cy):
+        """
+        Return a chunk, generating it and restoring its archived state if it is not in memory.
+        """
+
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None:
+            chunk = self.chunks[cx, cy] = Chunk(cx, cy, self.layout(cx, cy))
+            archived = self.archive.pop((cx, cy), None)
+            if archived is None and (cx, cy) in self.spilled:
+                archived = self.unspill(cx, cy)
+            if archived is not None:
+                count = len(chunk.has_mine)
+                chunk.is_revealed = unpack_bits(archived[0], count)
+                chunk.is_flagged = unpack_bits(archived[1], count)
+                chunk.touched = True
+        return chunk
+
+    def locate(self, x, y):
+        """
+        Return the chunk holding a cell and the index of the cell within it.
+
+        Parameters:
+        - x (int): The column of the cell in world coordinates.
+        - y (int): The row of the cell in world coordinates.
+        """
+
+        size = self.chunk_size
+        return self.chunk(x // size, y // size), (y % size) * size + x % size
+
+    def neighbor_counts(self, chunk):
+        """
+        Return the neighbor mine counts of a chunk, computed on first use from the mines of its 3x3 neighborhood.
+        """
+
+        if chunk.neighbor_mine_count is None:
+            size = self.chunk_size
+            width = 3 * size
+            grid = bytearray(width * width)
+            for dy in range(3):
+                for dx in range(3):
+                    mines = self.chunk(chunk.cx + dx - 1, chunk.cy + dy - 1).has_mine
+                    for r in range(size):
+                        start = (dy * size + r) * width + dx * size
+                        grid[start:start + size] = mines[r * size:(r + 1) * size]
+
+            counts = count_neighbors(grid, width, width)
+            chunk.neighbor_mine_count = bytearray(size * size)
+            for r in range(size):
+                start = (size + r) * width + size
+                chunk.neighbor_mine_count[r * size:(r + 1) * size] = counts[start:start + size]
+        return chunk.neighbor_mine_count
+
+    def image(self, x, y):
+        """
+        Return the key of the image to draw for a cell.
+        """
+
+        chunk, index = self.locate(x, y)
+        if chunk.is_revealed[index]:
+            return "py" if chunk.has_mine[index] else str(self.neighbor_counts(chunk)[index])
+        if self.exploded and chunk.has_mine[index]:
+            return "py_green"
+        return "flag" if chunk.is_flagged[index] else "tile"
+
+    def flood_bounds(self, left, top, right, bottom):
+        """
+        Return the region a flood fill may reach for a region of cells: the region widened by FLOOD_DISTANCE
+        chunks, as (left, top, right, bottom) with right and bottom excluded.
+        """
+
+        margin = FLOOD_DISTANCE * self.chunk_size
+        return left - margin, top - margin, right + margin, bottom + margin
+
+    def reveal(self, x, y, bounds=None):
+        """
+        Reveal a cell, flood-filling outward from it across chunks when it has no neighboring mines.
+
+        Revealing a flagged cell removes its flag. Revealing a mine ends the game.
+
+        Parameters:
+        - x (int): The column of the cell in world coordinates.
+        - y (int): The row of the cell in world coordinates.
+        - bounds (tuple, optional): The (left, top, right, bottom) region the flood fill may reach, as
+                                    returned by flood_bounds. If None, the region around the cell's chunk.
+
+        Returns:
+        - list: The (x, y) coordinates of the newly revealed cells.
+        """
+
+        chunk, index = self.locate(x, y)
+        if self.exploded or chunk.is_revealed[index]:
+            return []
+
+        self.open_cell(chunk, index)
+        if chunk.has_mine[index]:
+            self.exploded = True
+            return [(x, y)]
+
+        revealed = [(x, y)]
+        if self.neighbor_counts(chunk)[index] == 0:
+            if bounds is None:
+                size = self.chunk_size
+                left, top = x // size * size, y // size * size
+                bounds = self.flood_bounds(left, top, left + size, top + size)
+            revealed += self.flood([(x, y)], bounds)
+        return revealed
+
+    def flood(self, starts, bounds):
+        """
+        Reveal the cells around empty revealed cells, spreading through empty cells within a region.
+
+        Empty cells reached outside the region are revealed but not spread from; they are kept in the
+        frontier for expand().
+
+        Parameters:
+        - starts (list): The (x, y) coordinates of the empty revealed cells to spread from.
+        - bounds (tuple): The (left, top, right, bottom) region, right and bottom excluded.
+
+        Returns:
+        - list: The (x, y) coordinates of the newly revealed cells.
+        """
+
+        left, top, right, bottom = bounds
+        size = self.chunk_size
+        revealed = []
+        queue = deque(starts)
+        while queue:
+            cx, cy = queue.popleft()
+            if not (left <= cx < right and top <= cy < bottom):
+                self.frontier.setdefault((cx // size, cy // size), set()).add((cx, cy))
+                continue
+            for ny in (cy - 1, cy, cy + 1):
+                for nx in (cx - 1, cx, cx + 1):
+                    neighbor, position = self.locate(nx, ny)
+                    if not neighbor.is_revealed[position] and not neighbor.has_mine[position]:
+                        self.open_cell(neighbor, position)
+                        revealed.append((nx, ny))
+                        if self.neighbor_counts(neighbor)[position] == 0:
+                            queue.append((nx, ny))
+        return revealed
+
+    def expand(self, bounds):
+        """
+        Carry on the flood fills that stopped at cells now inside a region.
+
+        Parameters:
+        - bounds (tuple): The (left, top, right, bottom) region, as returned by flood_bounds.
+
+        Returns:
+        - list: The (x, y) coordinates of the newly revealed cells.
+        """
+
+        if self.exploded or not self.frontier:
+            return []
+        left, top, right, bottom = bounds
+        size = self.chunk_size
+        starts = []
+        for cy in range(top // size, (bottom - 1) // size + 1):
+            for cx in range(left // size, (right - 1) // size + 1):
+                cells = self.frontier.get((cx, cy))
+                if not cells:
+                    continue
+                inside = {(x, y) for x, y in cells if left <= x < right and top <= y < bottom}
+                cells -= inside
+                if not cells:
+                    del self.frontier[cx, cy]
+                starts.extend(inside)
+        return self.flood(starts, bounds) if starts else []
+
+    def open_cell(self, chunk, index):
+        """
+        Mark a single cell as revealed and keep the flag and safe cell counters in sync.
+        """
+
+        chunk.is_revealed[index] = 1
+        chunk.touched = True
+        if chunk.is_flagged[index]:
+            chunk.is_flagged[index] = 0
+            self.flags_placed -= 1
+        if not chunk.has_mine[index]:
+            self.safe_revealed += 1
+
+    def flag(self, x, y):
+        """
+        Toggle the flag on an unrevealed cell.
+
+        Returns:
+        - bool: Whether the cell changed.
+        """
+
+        chunk, index = self.locate(x, y)
+        if self.exploded or chunk.is_revealed[index]:
+            return False
+        chunk.is_flagged[index] ^= 1
+        chunk.touched = True
+        self.flags_placed += 1 if chunk.is_flagged[index] else -1
+        return True
+
+    def evict(self, left, top, right, bottom):
+        """
+        Drop the chunks further than EVICT_DISTANCE chunks from a region of cells.
+
+        Untouched chunks are simply forgotten. Touched ones keep their revealed and flagged cells as bitmaps,
+        a small fraction of the memory of a live chunk, and the oldest bitmaps beyond ARCHIVE_LIMIT are
+        spilled to a temporary file.
+
+        Parameters:
+        - left, top, right, bottom (int): The world coordinates of the region, right and bottom excluded.
+        """
+
+        size = self.chunk_size
+        min_cx, min_cy = left // size - EVICT_DISTANCE, top // size - EVICT_DISTANCE
+        max_cx, max_cy = (right - 1) // size + EVICT_DISTANCE, (bottom - 1) // size + EVICT_DISTANCE
+        for (cx, cy), chunk in list(self.chunks.items()):
+            if not (min_cx <= cx <= max_cx and min_cy <= cy <= max_cy):
+                del self.chunks[cx, cy]
+                if chunk.touched:
+                    self.archive[cx, cy] = (pack_bits(chunk.is_revealed), pack_bits(chunk.is_flagged))
+        while len(self.archive) > ARCHIVE_LIMIT:
+            coordinates = next(iter(self.archive))
+            self.spill_chunk(coordinates, self.archive.pop(coordinates))
+
+    def spill_chunk(self, coordinates, archived):
+        """
+        Write the archived bitmaps of a chunk to the spill file, reusing the slot of a chunk read back.
+        """
+
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile()
+        record = archived[0] + archived[1]
+        if self.free_slots:
+            offset = self.free_slots.pop()
+        else:
+            offset = self.spill.seek(0, 2)
+        self.spill.seek(offset)
+        self.spill.write(record)
+        self.spilled[coordinates] = offset
+
+    def unspill(self, cx, cy):
+        """
+        Read the archived bitmaps of a chunk back from the spill file and free its slot.
+        """
+
+        offset = self.spilled.pop((cx, cy))
+        length = (self.chunk_size * self.chunk_size + 7) // 8
+        self.spill.seek(offset)
+        record = self.spill.read(2 * length)
+        self.free_slots.append(offset)
+        return record[:length], record[length:]
+
+    def close(self):
+        """
+        Delete the spill file, if there is one.
+        """
+
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+class EndlessWindow(tk.Toplevel):
+
+    def __init__(self, board, seed=None):
+        """
+        Open a window playing an endless world, centred on its starting cell.
+
+        Only the cells in the viewport have canvas items, one per visible cell. Panning redraws those items
+        with the cells now under them, so the cost of a frame does not depend on how far the player has
+        explored. Numbers are shown directly, without puzzles, and endless games are not counted in the
+        statistics.
+
+        Parameters:
+        - board (Board): The game board whose images and sound setting are used.
+        - seed (int, optional): The seed of the world. If None, a random seed is used.
+        """
+
+        super().__init__(board)
+        self.board = board
+        self.cell_size = board.cell_size
+        self.scheduler = FrameScheduler(self)
+        self.world = None
+        self.left = -(VIEW_COLS // 2)
+        self.top = -(VIEW_ROWS // 2)
+        self.drag = None
+
+        self.title("PySweeper - Endless")
+        self.resizable(False, False)
+
+        label_frame = tk.Frame(self, relief="ridge", borderwidth=4)
+        label_frame.pack(pady=3)
+        self.score_label = tk.Label(label_frame, text="", font=("normal", 15))
+        self.score_label.pack(side="left", padx=10)
+        self.btn_img = tk.Button(label_frame, image=board.images["yellow"], command=self.new_game)
+        self.btn_img.pack(side="left")
+        self.position_label = tk.Label(label_frame, text="", font=("normal", 15))
+        self.position_label.pack(side="left", padx=10)
+
+        size = self.cell_size
+        self.canvas = tk.Canvas(self, width=VIEW_COLS * size, height=VIEW_ROWS * size,
+                                highlightthickness=0, borderwidth=0)
+        self.canvas.pack()
+        self.items = [self.canvas.create_image(c * size + size // 2, r * size + size // 2, image=board.images["tile"])
+                      for r in range(VIEW_ROWS) for c in range(VIEW_COLS)]
+        self.drawn = ["tile"] * len(self.items)
+
+        self.canvas.bind("<Button-1>", lambda event: self.on_click(event, self.reveal))
+        self.canvas.bind("<Button-3>", lambda event: self.on_click(event, self.flag))
+        self.canvas.bind("<Button-2>", self.start_drag)
+        self.canvas.bind("<B2-Motion>", self.on_drag)
+        self.canvas.bind("<MouseWheel>", lambda event: self.pan(0, -PAN_STEP if event.delta > 0 else PAN_STEP))
+        self.canvas.bind("<Shift-MouseWheel>",
+                         lambda event: self.pan(-PAN_STEP if event.delta > 0 else PAN_STEP, 0))
+        self.canvas.bind("<Button-4>", lambda event: self.pan(0, -PAN_STEP))
+        self.canvas.bind("<Button-5>", lambda event: self.pan(0, PAN_STEP))
+        self.bind("<Left>", lambda event: self.pan(-PAN_STEP, 0))
+        self.bind("<Right>", lambda event: self.pan(PAN_STEP, 0))
+        self.bind("<Up>", lambda event: self.pan(0, -PAN_STEP))
+        self.bind("<Down>", lambda event: self.pan(0, PAN_STEP))
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.new_game(seed)
+
+    def new_game(self, seed=None):
+        """
+        Start a new endless world and move the viewport back to its starting cell.
+        """
+
+        if self.world is not None:
+            self.world.close()
+        self.world = EndlessWorld(seed if seed is not None else self.board.seeds.getrandbits(64))
+        self.left = -(VIEW_COLS // 2)
+        self.top = -(VIEW_ROWS // 2)
+        self.btn_img.config(image=self.board.images["yellow"])
+        self.canvas.focus_set()
+        self.world.reveal(0, 0, self.bounds())
+        self.schedule_redraw()
+
+    def bounds(self):
+        """
+        Return the region flood fills may reach around the viewport.
+        """
+
+        return self.world.flood_bounds(self.left, self.top, self.left + VIEW_COLS, self.top + VIEW_ROWS)
+
+    def cell_at(self, event):
+        """
+        Return the world coordinates of the cell under the pointer.
+        """
+
+        return self.left + event.x // self.cell_size, self.top + event.y // self.cell_size
+
+    def on_click(self, event, action):
+        """
+        Apply an action to the cell under the pointer.
+
+        Parameters:
+        - event (tk.Event): The mouse event.
+        - action (callable): reveal or flag.
+        """
+
+        if 0 <= event.x < VIEW_COLS * self.cell_size and 0 <= event.y < VIEW_ROWS * self.cell_size:
+            action(*self.cell_at(event))
+
+    def reveal(self, x, y):
+        """
+        Reveal a cell and redraw the viewport.
+        """
+
+        if not self.world.reveal(x, y, self.bounds()):
+            return
+        if self.world.exploded:
+            self.btn_img.config(image=self.board.images["red"])
+            if self.board.sound == "ON":
+                self.scheduler.call(play_sound, "sounds/lose.wav", key="sound")
+        elif self.board.sound == "ON":
+            self.scheduler.call(play_sound, "sounds/reveal.wav", key="sound")
+        self.schedule_redraw()
+
+    def flag(self, x, y):
+        """
+        Toggle the flag on a cell and redraw the viewport.
+        """
+
+        if self.world.flag(x, y):
+            if self.board.sound == "ON":
+                self.scheduler.call(play_sound, "sounds/flag.wav", key="sound")
+            self.schedule_redraw()
+
+    def start_drag(self, event):
+        """
+        Remember where a drag with the middle mouse button started.
+        """
+
+        self.drag = (event.x, event.y)
+
+    def on_drag(self, event):
+        """
+        Pan the viewport by whole cells as the pointer moves during a drag.
+        """
+
+        dx = (self.drag[0] - event.x) // self.cell_size
+        dy = (self.drag[1] - event.y) // self.cell_size
+        if dx or dy:
+            self.drag = (self.drag[0] - dx * self.cell_size, self.drag[1] - dy * self.cell_size)
+            self.pan(dx, dy)
+
+    def pan(self, dx, dy):
+        """
+        Move the viewport by a number of cells, carry on the flood fills it comes near, then evict the chunks
+        it left far behind.
+        """
+
+        self.left += dx
+        self.top += dy
+        self.world.expand(self.bounds())
+        self.world.evict(self.left, self.top, self.left + VIEW_COLS, self.top + VIEW_ROWS)
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        """
+        Redraw the viewport in the next frame, however many changes ask for it before then.
+        """
+
+        self.scheduler.call(self.redraw, priority=PRIORITY_RENDER, key="viewport")
+
+    def redraw(self):
+        """
+        Show the cells under the viewport, reconfiguring only the items whose image changed.
+        """
+
+        images = self.board.images
+        image = self.world.image
+        item = 0
+        for y in range(self.top, self.top + VIEW_ROWS):
+            for x in range(self.left, self.left + VIEW_COLS):
+                key = image(x, y)
+                if self.drawn[item] != key:
+                    self.drawn[item] = key
+                    self.canvas.itemconfigure(self.items[item], image=images[key])
+                item += 1
+
+        self.score_label.config(text=f"{self.world.safe_revealed} revealed, {self.world.flags_placed} flagged")
+        self.position_label.config(text=f"({self.left + VIEW_COLS // 2}, {self.top + VIEW_ROWS // 2})")
+
+    def close(self):
+        """
+        Cancel pending work and close the window.
+        """
+
+        self.scheduler.clear()
+        self.world.close()
+        self.destroy()
@@ -0,0 +1,402 @@
+from collections import deque
+import random
+
+
+LOST = 0
+IN_PROGRESS = 1
+WON = 2
+
+GRID_MINES = {"10x10": 10, "16x16": 40, "20x20": 70}
+DEFAULT_DENSITY = 0.16
+
+# The smallest side of a playable grid, which leaves room for mines outside the 3x3 safe zone of the first
+# click, and the largest seed, since replays and saved games store seeds as unsigned 64-bit integers.
+MIN_GRID_SIZE = 4
+MAX_SEED = 2 ** 64 - 1
+
+
+class Engine:
+
+    def __init__(self, rows, cols, mines, seed=None):
+        """
+        Initialize a headless game engine.
+
+        All per-cell state lives in flat bytearrays indexed by row * cols + col, so the engine
+        can be created, played and profiled without a display.
+
+        Parameters:
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines to place.
+        - seed (int, optional): Seed for the engine's random generator. If None, a random seed is used.
+        """
+
+        if mines >= rows * cols:
+            raise ValueError(f"Cannot place {mines} mines on a {rows}x{cols} board.")
+
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.has_mine = None
+        self.neighbor_mine_count = None
+        self.is_revealed = None
+        self.is_flagged = None
+        self.is_marked = None
+        self.safe_revealed = 0
+        self.flags_placed = 0
+        self.exploded = False
+
+        self.reset()
+
+    @property
+    def cell_count(self):
+        """
+        Return the total number of cells on the board.
+        """
+
+        return self.rows * self.cols
+
+    @property
+    def status(self):
+        """
+        Return the current state of the game: lost(0), ongoing(1) or won(2).
+        """
+
+        if self.exploded:
+            return LOST
+        if self.safe_revealed == self.cell_count - self.mines:
+            return WON
+        return IN_PROGRESS
+
+    def reset(self):
+        """
+        Clear all mines, counts and player markings.
+        """
+
+        n = self.cell_count
+        self.has_mine = bytearray(n)
+        self.neighbor_mine_count = bytearray(n)
+        self.is_revealed = bytearray(n)
+        self.is_flagged = bytearray(n)
+        self.is_marked = bytearray(n)
+        self.safe_revealed = 0
+        self.flags_placed = 0
+        self.exploded = False
+
+    def index(self, row, col):
+        """
+        Return the flat index of the cell at (row, col).
+        """
+
+        return row * self.cols + col
+
+    def position(self, index):
+        """
+        Return the (row, col) coordinates of a flat index.
+        """
+
+        return divmod(index, self.cols)
+
+    def neighbors(self, row, col):
+        """
+        Return the flat indices of all cells adjacent to (row, col).
+        """
+
+        result = []
+        for r in range(max(row - 1, 0), min(row + 2, self.rows)):
+            for c in range(max(col - 1, 0), min(col + 2, self.cols)):
+                if r != row or c != col:
+                    result.append(r * self.cols + c)
+        return result
+
+    def generate_mines(self, safe_tile):
+        """
+        Randomly place mines and compute the neighbor mine counts.
+
+        Every cell outside the safe zone first gets a mine with probability close to the target density,
+        using one block of random bytes mapped through a lookup table. The count is then corrected to the
+        exact number of mines by adding or removing randomly chosen cells. Both steps treat all allowed
+        cells alike, so every layout of self.mines mines outside the safe zone is equally likely.
+
+        Parameters:
+        - safe_tile (tuple): A tuple (row, col) representing the coordinates of the safe tile
+        where no mines should be placed or adjacent to.
+        """
+
+        n = self.cell_count
+        safe_zone = [r * self.cols + c
+                     for r in range(max(safe_tile[0] - 1, 0), min(safe_tile[0] + 2, self.rows))
+                     for c in range(max(safe_tile[1] - 1, 0), min(safe_tile[1] + 2, self.cols))]
+        allowed = n - len(safe_zone)
+        if self.mines > allowed:
+            raise ValueError(f"Cannot place {self.mines} mines outside the safe zone.")
+
+        threshold = round(self.mines / allowed * 256)
+        table = bytes(1 if value < threshold else 0 for value in range(256))
+        has_mine = bytearray(self.random.randbytes(n).translate(table))
+        for index in safe_zone:
+            has_mine[index] = 2
+
+        placed = has_mine.count(1)
+        target, value = (0, 1) if placed > self.mines else (1, 0)
+        while placed != self.mines:
+            index = self.random.randrange(n)
+            if has_mine[index] == value:
+                has_mine[index] = target
+                placed += 1 if target else -1
+
+        for index in safe_zone:
+            has_mine[index] = 0
+
+        self.place_mines(has_mine)
+
+    def place_mines(self, has_mine):
+        """
+        Use a given mine layout, for example one generated in another process, and compute the neighbor counts.
+
+        Parameters:
+        - has_mine (bytes): One byte per cell, 1 where there is a mine and 0 elsewhere.
+        """
+
+        if len(has_mine) != self.cell_count or has_mine.count(1) != self.mines:
+            raise ValueError(f"The layout does not hold {self.mines} mines on {self.cell_count} cells.")
+
+        self.has_mine = bytearray(has_mine)
+        self.neighbor_mine_count = count_neighbors(self.has_mine, self.rows, self.cols)
+
+    def reveal(self, row, col):
+        """
+        Reveal a cell, flood-filling outward from it when it has no neighboring mines.
+
+        The opened region is computed in one breadth-first pass. Revealing a flagged cell removes its flag.
+        Revealing a mine ends the game.
+
+        Parameters:
+        - row (int): The row index of the cell.
+        - col (int): The column index of the cell.
+
+        Returns:
+        - list: The flat indices of the newly revealed cells in breadth-first order (empty if nothing changed).
+        """
+
+        index = row * self.cols + col
+        if self.status != IN_PROGRESS or self.is_revealed[index]:
+            return []
+
+        self.open_cell(index)
+        if self.has_mine[index]:
+            self.exploded = True
+            return [index]
+
+        revealed = [index]
+        if self.neighbor_mine_count[index] == 0:
+            queue = deque(revealed)
+            while queue:
+                r, c = divmod(queue.popleft(), self.cols)
+                for neighbor in self.neighbors(r, c):
+                    if not self.is_revealed[neighbor] and not self.has_mine[neighbor]:
+                        self.open_cell(neighbor)
+                        revealed.append(neighbor)
+                        if self.neighbor_mine_count[neighbor] == 0:
+                            queue.append(neighbor)
+        return revealed
+
+    def open_cell(self, index):
+        """
+        Mark a single cell as revealed and keep the flag and safe cell counters in sync.
+
+        Parameters:
+        - index (int): The flat index of the cell.
+        """
+
+        self.is_revealed[index] = 1
+        if self.is_flagged[index]:
+            self.is_flagged[index] = 0
+            self.flags_placed -= 1
+        if not self.has_mine[index]:
+            self.safe_revealed += 1
+
+    def flag(self, row, col):
+        """
+        Toggle the flag on an unrevealed cell.
+
+        A flag can only be placed on an unmarked cell while fewer flags than mines are placed.
+
+        Parameters:
+        - row (int): The row index of the cell.
+        - col (int): The column index of the cell.
+
+        Returns:
+        - bool: True if the flag was toggled, False otherwise.
+        """
+
+        index = row * self.cols + col
+        if self.status != IN_PROGRESS or self.is_revealed[index]:
+            return False
+
+        if self.is_flagged[index]:
+            self.is_flagged[index] = 0
+            self.flags_placed -= 1
+            return True
+        if self.is_marked[index] or self.flags_placed >= self.mines:
+            return False
+        self.is_flagged[index] = 1
+        self.flags_placed += 1
+        return True
+
+    def mark(self, row, col):
+        """
+        Toggle the question mark on an unrevealed, unflagged cell.
+
+        Parameters:
+        - row (int): The row index of the cell.
+        - col (int): The column index of the cell.
+
+        Returns:
+        - bool: True if the mark was toggled, False otherwise.
+        """
+
+        index = row * self.cols + col
+        if self.status != IN_PROGRESS or self.is_revealed[index] or self.is_flagged[index]:
+            return False
+
+        self.is_marked[index] ^= 1
+        return True
+
+
+def count_neighbors(grid, rows, cols):
+    """
+    Count, for every cell, how many of its eight neighbors are set in grid.
+
+    The grid is copied into a buffer with a one-cell border and read as a single big integer with one byte
+    per cell, so each shift by a byte (column) or by a padded row moves every cell onto its neighbor at once.
+    Adding the eight shifted copies never carries between bytes, since each sum is at most 8.
+
+    Parameters:
+    - grid (bytearray): One byte per cell, 1 where set and 0 elsewhere, in row-major order.
+    - rows (int): The number of rows in the grid.
+    - cols (int): The number of columns in the grid.
+
+    Returns:
+    - bytearray: The neighbor count of every cell, in the same order as grid.
+    """
+
+    width = cols + 2
+    padded = bytearray(width * (rows + 2))
+    for r in range(rows):
+        start = (r + 1) * width + 1
+        padded[start:start + cols] = grid[r * cols:(r + 1) * cols]
+
+    cells = int.from_bytes(padded, "little")
+    row_sums = cells + (cells << 8) + (cells >> 8)
+    totals = row_sums + (row_sums << (8 * width)) + (row_sums >> (8 * width)) - cells
+    data = totals.to_bytes(len(padded) + width + 1, "little")
+
+    counts = bytearray(rows * cols)
+    for r in range(rows):
+        start = (r + 1) * width + 1
+        counts[r * cols:(r + 1) * cols] = data[start:start + cols]
+    return counts
+
+
+def grid_dimensions(grid):
+    """
+    Parse a grid size string such as "16x16" into (rows, cols).
+    """
+
+    rows, cols = grid.lower().split("x")
+    return int(rows), int(cols)
+
+
+def mines_for_density(rows, cols, density):
+    """
+    Return the number of mines for a board of the given size and mine density.
+
+    Parameters:
+    - rows (int): The number of rows on the board.
+    - cols (int): The number of columns on the board.
+    - density (float): The fraction of cells that should contain a mine, between 0 and 1.
+    """
+
+    return max(1, round(rows * cols * density))
+
+
+def mines_for_grid(grid, density=None):
+    """
+    Return the number of mines of a game on a grid.
+
+    Parameters:
+    - grid (str): The grid size, such as "16x16".
+    - density (float, optional): The fraction of cells holding a mine. If None, the preset mine count of the
+                                 grid is used, or DEFAULT_DENSITY for grids without a preset.
+    """
+
+    if density is None and grid in GRID_MINES:
+        return GRID_MINES[grid]
+    rows, cols = grid_dimensions(grid)
+    return mines_for_density(rows, cols, density or DEFAULT_DENSITY)
+
+
+def square_grid_size(grid, density=None):
+    """
+    Return the side of a grid a Board can play, which must be square and hold its mines outside the safe zone.
+
+    Parameters:
+    - grid (str): The grid size, such as "16x16".
+    - density (float, optional): The fraction of cells holding a mine, as for mines_for_grid.
+
+    Raises:
+    - ValueError: If the grid cannot be parsed, is not square, is smaller than MIN_GRID_SIZE or has too many
+                  mines.
+    """
+
+    try:
+        rows, cols = grid_dimensions(grid)
+    except (ValueError, AttributeError):
+        raise ValueError(f"The grid {grid!r} is not of the form 16x16.")
+    if rows != cols:
+        raise ValueError(f"The grid {grid} is not square.")
+    if rows < MIN_GRID_SIZE:
+        raise ValueError(f"The grid {grid} is smaller than {MIN_GRID_SIZE}x{MIN_GRID_SIZE}.")
+    if density is not None and not 0 < density < 1:
+        raise ValueError(f"The density {density} is not between 0 and 1.")
+    if mines_for_grid(grid, density) > rows * cols - 9:
+        raise ValueError(f"The grid {grid} has too many mines.")
+    return rows
+
+
+def pack_bits(values):
+    """
+    Pack 0/1 bytes into a bitmap, eight values per byte with the first value in the lowest bit.
+
+    Parameters:
+    - values (bytes or bytearray): One byte per value, each 0 or 1.
+    """
+
+    size = (len(values) + 7) // 8
+    padded = bytes(values) + bytes(size * 8 - len(values))
+    packed = 0
+    for bit in range(8):
+        packed |= int.from_bytes(padded[bit::8], "little") << bit
+    return packed.to_bytes(size, "little")
+
+
+def unpack_bits(data, count):
+    """
+    Unpack the first count values of a bitmap written by pack_bits into a bytearray of 0/1 values.
+
+    Parameters:
+    - data (bytes): The bitmap.
+    - count (int): The number of values to unpack.
+    """
+
+    size = (count + 7) // 8
+    packed = int.from_bytes(data[:size], "little")
+    ones = int.from_bytes(b"\x01" * size, "little")
+    values = bytearray(size * 8)
+    for bit in range(8):
+        values[bit::8] = ((packed >> bit) & ones).to_bytes(size, "little")
+    return values[:count]
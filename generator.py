@@ -0,0 +1,192 @@
+import multiprocessing
+import threading
+import random
+import os
+
+from engine import Engine, WON
+from solver import Solver
+
+
+# Number of ready or in-progress boards kept per (rows, cols, mines).
+POOL_CAPACITY = 4
+
+# Layouts tried per board before giving up.
+MAX_ATTEMPTS = 10000
+
+_pool = None
+
+
+def is_solvable(engine, safe_tile):
+    """
+    Check whether the solver can clear a board from its safe tile without guessing.
+
+    The engine's revealed state is used as scratch space and is reset afterwards.
+
+    Parameters:
+    - engine (Engine): An engine whose mines have been placed.
+    - safe_tile (tuple): The (row, col) coordinates of the first cell to reveal.
+    """
+
+    solver = Solver(engine)
+    solver.update(engine.reveal(*safe_tile))
+    index = solver.next_safe()
+    while index is not None:
+        solver.update(engine.reveal(*engine.position(index)))
+        index = solver.next_safe()
+    solved = engine.status == WON
+
+    has_mine = engine.has_mine
+    engine.reset()
+    engine.place_mines(has_mine)
+    return solved
+
+
+def generate_no_guess(rows, cols, mines, seed=None):
+    """
+    Generate layouts until one can be cleared from its safe tile without guessing.
+
+    Parameters:
+    - rows (int): The number of rows on the board.
+    - cols (int): The number of columns on the board.
+    - mines (int): The number of mines to place.
+    - seed (int, optional): Seed for the random generator. If None, a random seed is used.
+
+    Returns:
+    - tuple or None: The safe tile as (row, col), and the layout as bytes with 1 where there is a mine, or None
+                     if none of MAX_ATTEMPTS layouts could be cleared without guessing.
+    """
+
+    engine = Engine(rows, cols, mines, seed=seed)
+    for _ in range(MAX_ATTEMPTS):
+        safe_tile = (engine.random.randrange(rows), engine.random.randrange(cols))
+        engine.generate_mines(safe_tile)
+        if is_solvable(engine, safe_tile):
+            return safe_tile, bytes(engine.has_mine)
+    return None
+
+
+class BoardPool:
+
+    def __init__(self, workers=None, capacity=POOL_CAPACITY):
+        """
+        Initialize a pool of worker processes that generate no-guess boards ahead of time.
+
+        Every (rows, cols, mines) key asked for keeps up to `capacity` boards ready or being generated. Boards
+        are only ever generated by the workers, so get() never blocks its caller; when none is ready yet, the
+        caller asks again later. The worker processes are started on first use.
+
+        Parameters:
+        - workers (int, optional): The number of worker processes. If None, one less than the number of CPUs.
+        - capacity (int, optional): The number of boards kept per key.
+        """
+
+        self.workers = workers if workers is not None else max(1, (os.cpu_count() or 1) - 1)
+        self.capacity = capacity
+        self.pool = None
+        self.ready = {}
+        self.pending = {}
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.random = random.SystemRandom()
+
+    def fill(self, rows, cols, mines):
+        """
+        Queue generation jobs until the key has `capacity` boards ready or being generated.
+
+        Parameters:
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines to place.
+        """
+
+        key = (rows, cols, mines)
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.workers)
+            missing = self.capacity - len(self.ready.get(key, ())) - self.pending.get(key, 0)
+            for _ in range(missing):
+                self.pending[key] = self.pending.get(key, 0) + 1
+                self.pool.apply_async(generate_no_guess, (rows, cols, mines, self.random.getrandbits(64)),
+                                      callback=lambda board, key=key: self.add(key, board),
+                                      error_callback=lambda error, key=key: self.add(key, None))
+
+    def add(self, key, board):
+        """
+        Store a board finished by a worker, or count the failure. Called on the pool's result thread.
+
+        Parameters:
+        - key (tuple): The (rows, cols, mines) of the board.
+        - board (tuple or None): The result of generate_no_guess, or None if the worker failed.
+        """
+
+        with self.lock:
+            if key not in self.pending:
+                return
+            self.pending[key] -= 1
+            if board is not None:
+                self.ready.setdefault(key, []).append(board)
+                self.failures[key] = 0
+            else:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+    def get(self, rows, cols, mines):
+        """
+        Return a ready board and queue a replacement, without waiting for a worker.
+
+        Parameters:
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines to place.
+
+        Returns:
+        - tuple or None: The safe tile as (row, col), and the layout as bytes with 1 where there is a mine, or
+                         None if no board is ready yet.
+        """
+
+        with self.lock:
+            ready = self.ready.get((rows, cols, mines))
+            board = ready.pop() if ready else None
+        self.fill(rows, cols, mines)
+        return board
+
+    def failing(self, rows, cols, mines):
+        """
+        Return whether the last `capacity` jobs of a key all failed, so waiting for its boards is pointless.
+        """
+
+        with self.lock:
+            return self.failures.get((rows, cols, mines), 0) >= self.capacity
+
+    def close(self):
+        """
+        Stop the worker processes, dropping unfinished boards.
+        """
+
+        with self.lock:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+            self.ready = {}
+            self.pending = {}
+            self.failures = {}
+
+
+def get_board_pool():
+    """
+    Return the board pool shared by the whole process, creating it on first use.
+    """
+
+    global _pool
+    if _pool is None:
+        _pool = BoardPool()
+    return _pool
+
+
+def close_board_pool():
+    """
+    Stop the workers of the shared board pool, if it was ever created.
+    """
+
+    if _pool is not None:
+        _pool.close()
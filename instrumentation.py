@@ -0,0 +1,227 @@
+from collections import deque
+import tkinter as tk
+import time
+import csv
+
+
+RING_SIZE = 4096
+
+# The sampler runs every SAMPLE_INTERVAL milliseconds; a sample that runs more than STALL_THRESHOLD seconds late
+# is recorded as an event loop stall.
+SAMPLE_INTERVAL = 50
+STALL_THRESHOLD = 0.005
+OVERLAY_REFRESH = 5
+
+BINDTAG = "Instrumentation"
+INPUT_EVENTS = {"<Button-1>": "click", "<ButtonRelease-1>": "click", "<Button-3>": "flag"}
+
+
+class Instrumentation:
+
+    def __init__(self, board, capacity=RING_SIZE):
+        """
+        Initialize the performance instrumentation of a board. Nothing is measured until enable() is called.
+
+        While enabled, records of (time, metric, value) are kept in a ring buffer:
+        - click / flag: seconds from a mouse event to the end of the redraw it caused.
+        - is_game_in_progress: seconds spent in Board.is_game_in_progress.
+        - after_pending: the number of pending after() callbacks, sampled every SAMPLE_INTERVAL ms.
+        - scheduled: the number of tasks pending in the board's frame scheduler.
+        - reveal_animation / timer_tick: whether a reveal animation frame is pending and the game timer is running.
+        - stall: seconds the sampler ran late because the event loop was busy.
+        - puzzle: seconds from a click on a revealed cell to its puzzle being drawn.
+
+        When disabled, no binding, wrapper or sampler is left on the board, so it costs nothing.
+
+        Parameters:
+        - board (Board): The board to measure.
+        - capacity (int, optional): The number of records kept.
+        """
+
+        self.board = board
+        self.records = deque(maxlen=capacity)
+        self.enabled = False
+        self.overlay = None
+        self.sample_id = None
+        self.sample_due = None
+        self.samples = 0
+        self.input_start = None
+        self.input_metric = None
+
+    def record(self, metric, value):
+        """
+        Append a record to the ring buffer.
+        """
+
+        self.records.append((time.perf_counter(), metric, value))
+
+    def enable(self):
+        """
+        Start measuring: tag the board's widgets, wrap is_game_in_progress and start the sampler.
+        """
+
+        if self.enabled:
+            return
+        self.enabled = True
+
+        for sequence in INPUT_EVENTS:
+            self.board.bind_class(BINDTAG, sequence,
+                                  lambda event, sequence=sequence: self.start_input(event, sequence))
+        self.tag_widgets()
+
+        original = self.board.is_game_in_progress
+
+        def is_game_in_progress():
+            start = time.perf_counter()
+            original()
+            self.record("is_game_in_progress", time.perf_counter() - start)
+        self.board.is_game_in_progress = is_game_in_progress
+
+        self.sample_due = time.perf_counter() + SAMPLE_INTERVAL / 1000
+        self.sample_id = self.board.after(SAMPLE_INTERVAL, self.sample)
+
+    def disable(self):
+        """
+        Stop measuring and remove everything enable() added. The records are kept.
+        """
+
+        if not self.enabled:
+            return
+        self.enabled = False
+
+        self.hide_overlay()
+        for widget in self.widgets(self.board):
+            tags = widget.bindtags()
+            if BINDTAG in tags:
+                widget.bindtags(tuple(tag for tag in tags if tag != BINDTAG))
+        for sequence in INPUT_EVENTS:
+            self.board.unbind_class(BINDTAG, sequence)
+        del self.board.is_game_in_progress
+        if self.sample_id is not None:
+            self.board.after_cancel(self.sample_id)
+            self.sample_id = None
+
+    def widgets(self, widget):
+        """
+        Yield a widget and all of its descendants.
+        """
+
+        yield widget
+        for child in widget.winfo_children():
+            yield from self.widgets(child)
+
+    def tag_widgets(self):
+        """
+        Put the instrumentation bindings in front of the bindings of every widget of the board.
+
+        The board calls this again after rebuilding its grid.
+        """
+
+        for widget in self.widgets(self.board):
+            tags = widget.bindtags()
+            if BINDTAG not in tags:
+                widget.bindtags((BINDTAG,) + tags)
+
+    def start_input(self, event, sequence):
+        """
+        Note the start of a mouse event, before the widget's own bindings handle it.
+
+        Tk buttons act when the left button is released and the canvas when it is pressed, so only that
+        half of a left click is measured.
+
+        Parameters:
+        - event (tk.Event): The mouse event.
+        - sequence (str): The event sequence, a key of INPUT_EVENTS.
+        """
+
+        acts_on_release = event.widget.winfo_class() == "Button"
+        if sequence == "<Button-1>" and acts_on_release or sequence == "<ButtonRelease-1>" and not acts_on_release:
+            return
+        if self.input_start is None:
+            self.board.after_idle(self.finish_input)
+        self.input_start = time.perf_counter()
+        self.input_metric = INPUT_EVENTS[sequence]
+
+    def finish_input(self):
+        """
+        Complete the pending redraws and record the latency of the last mouse event.
+        """
+
+        self.board.update_idletasks()
+        if self.input_start is not None:
+            self.record(self.input_metric, time.perf_counter() - self.input_start)
+            self.input_start = None
+
+    def sample(self):
+        """
+        Record the pending callbacks and any event loop stall, then schedule the next sample.
+        """
+
+        now = time.perf_counter()
+        if now - self.sample_due > STALL_THRESHOLD:
+            self.record("stall", now - self.sample_due)
+
+        board = self.board
+        self.record("after_pending", len(board.tk.splitlist(board.tk.call("after", "info"))))
+        self.record("scheduled", len(board.scheduler))
+        self.record("reveal_animation", int(board.scheduler.is_pending("reveal_animation")))
+        self.record("timer_tick", int(board in board.resources.timed))
+
+        self.samples += 1
+        if self.overlay is not None and self.samples % OVERLAY_REFRESH == 0:
+            self.overlay.config(text=self.summary())
+
+        self.sample_due = time.perf_counter() + SAMPLE_INTERVAL / 1000
+        self.sample_id = board.after(SAMPLE_INTERVAL, self.sample)
+
+    def summary(self):
+        """
+        Return a few lines describing the latest records, for the overlay.
+        """
+
+        values = {}
+        for _, metric, value in self.records:
+            values.setdefault(metric, []).append(value)
+
+        lines = []
+        for metric in ("click", "flag", "is_game_in_progress", "stall"):
+            recent = values.get(metric, [])[-50:]
+            if recent:
+                lines.append(f"{metric}: last {recent[-1] * 1000:.1f} ms, max {max(recent) * 1000:.1f} ms")
+        pending = values.get("after_pending")
+        if pending:
+            lines.append(f"after() pending: {pending[-1]}, scheduled: {values['scheduled'][-1]}")
+        return "\n".join(lines) or "No measurements yet."
+
+    def show_overlay(self):
+        """
+        Enable the instrumentation and show its summary in the top right corner of the board.
+        """
+
+        self.enable()
+        if self.overlay is None:
+            self.overlay = tk.Label(self.board, text=self.summary(), justify="left", anchor="nw",
+                                    font=("Consolas", 9), bg="black", fg="lime")
+            self.overlay.place(relx=1, rely=0, anchor="ne")
+
+    def hide_overlay(self):
+        """
+        Remove the overlay; the instrumentation keeps running until disable() is called.
+        """
+
+        if self.overlay is not None:
+            self.overlay.destroy()
+            self.overlay = None
+
+    def dump(self, filename):
+        """
+        Write the ring buffer to a CSV file with one (time, metric, value) row per record.
+
+        Parameters:
+        - filename (str): The path of the CSV file.
+        """
+
+        with open(filename, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["time", "metric", "value"])
+            writer.writerows(self.records)
@@ -1,8 +1,188 @@
-from board import Board
-from settings import Settings
+import tkinter as tk
+import argparse
+import json
+import time
+import sys
+import os
+
+from engine import MAX_SEED, square_grid_size
+
+
+LAST_CHOICE_FILE = "last_choice.json"
+DEFAULT_CHOICE = {"difficulty": "easy", "grid": "10x10", "sound": "ON"}
+
+
+def load_last_choice(filename=LAST_CHOICE_FILE):
+    """
+    Return the difficulty, grid size and sound setting of the last game started from the launcher.
+
+    Parameters:
+    - filename (str, optional): The JSON file the choice is stored in.
+
+    Returns:
+    - dict: The last choice, or DEFAULT_CHOICE if none was stored or the file cannot be read.
+    """
+
+    choice = dict(DEFAULT_CHOICE)
+    try:
+        with open(filename, "r") as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return choice
+    if isinstance(stored, dict):
+        choice.update((key, stored[key]) for key in DEFAULT_CHOICE if isinstance(stored.get(key), str))
+    try:
+        square_grid_size(choice["grid"])
+    except ValueError:
+        choice["grid"] = DEFAULT_CHOICE["grid"]
+    return choice
+
+
+def save_last_choice(choice, filename=LAST_CHOICE_FILE):
+    """
+    Remember a choice for the next start; failing to write it is not an error.
+
+    Parameters:
+    - choice (dict): The difficulty, grid size and sound setting.
+    - filename (str, optional): The JSON file the choice is stored in.
+    """
+
+    temporary = filename + ".tmp"
+    try:
+        with open(temporary, "w") as file:
+            json.dump(choice, file)
+        os.replace(temporary, filename)
+    except OSError:
+        pass
+
+
+def grid_argument(value):
+    """
+    Parse the --grid option, accepting only the grids a Board can play.
+    """
+
+    try:
+        square_grid_size(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return value.lower()
+
+
+def seed_argument(value):
+    """
+    Parse the --seed option, accepting only the seeds a replay or a saved game can store.
+    """
+
+    try:
+        seed = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid seed: {value!r}")
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f"the seed must be between 0 and {MAX_SEED}")
+    return seed
+
+
+class StartupProfile:
+
+    def __init__(self, enabled):
+        """
+        Initialize a recorder of the time spent in each phase of the start, up to the first interactive frame.
+
+        Parameters:
+        - enabled (bool): Whether the phases are reported. If False, mark() and report() do nothing.
+        """
+
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase):
+        """
+        End a phase that started at the end of the previous one.
+        """
+
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases.append((phase, now - self.last))
+            self.last = now
+
+    def report(self):
+        """
+        Print the duration of every phase and the total to standard error. The time spent waiting in the
+        difficulty dialog is left out of the total, since it depends on the player.
+        """
+
+        if not self.enabled:
+            return
+        for phase, duration in self.phases:
+            print(f"startup: {phase:<16}{duration * 1000:8.1f} ms", file=sys.stderr)
+        total = sum(duration for phase, duration in self.phases if phase != "dialog")
+        print(f"startup: {'interactive':<16}{total * 1000:8.1f} ms (excluding the dialog)", file=sys.stderr)
+
+
+def main():
+    """
+    Start PySweeper from the command line.
+
+    The difficulty dialog is shown on the root window of the game, preselecting the last choice, unless it is
+    skipped with --no-dialog or by giving both --difficulty and --grid. The board and the modules it needs are
+    only imported once the choice is made, so the dialog appears as soon as Tk is up.
+    """
+
+    parser = argparse.ArgumentParser(description="Play PySweeper.")
+    parser.add_argument("--difficulty", choices=["easy", "medium", "hard"], help="difficulty level of the puzzles")
+    parser.add_argument("--grid", type=grid_argument, help="grid size of the square board, such as 16x16")
+    parser.add_argument("--seed", type=seed_argument, default=None, help="seed of the first game")
+    parser.add_argument("--sound", choices=["ON", "OFF"], help="whether sounds are played")
+    parser.add_argument("--no-dialog", action="store_true", help="start with the last choice without asking")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print the time spent in each phase of the start to standard error")
+    args = parser.parse_args()
+
+    profile = StartupProfile(args.startup_profile)
+    choice = load_last_choice()
+    for key in DEFAULT_CHOICE:
+        if getattr(args, key) is not None:
+            choice[key] = getattr(args, key)
+
+    root = tk.Tk()
+    root.withdraw()
+    profile.mark("tk")
+
+    if not args.no_dialog and (args.difficulty is None or args.grid is None):
+        from settings import Settings
+
+        chosen = Settings(root, choice["difficulty"], choice["grid"]).choose_difficulty_and_grid_size()
+        if chosen is None:
+            root.destroy()
+            return
+        choice["difficulty"], choice["grid"] = chosen
+        profile.mark("dialog")
+    save_last_choice(choice)
+
+    from board import Board, BoardResources
+    from generator import close_board_pool
+    profile.mark("imports")
+
+    resources = BoardResources(root)
+    profile.mark("resources")
+
+    pysweeper = Board(root, difficulty=choice["difficulty"], grid=choice["grid"], sound=choice["sound"],
+                      resources=resources, seed=args.seed)
+    pysweeper.pack()
+    root.deiconify()
+    profile.mark("board")
+
+    def first_frame():
+        profile.mark("first frame")
+        profile.report()
+
+    root.after_idle(first_frame)
+    root.mainloop()
+    resources.close()
+    close_board_pool()
 
 
 if __name__ == "__main__":
-    difficulty = Settings()
-    selected_difficulty, grid_size = difficulty.choose_difficulty_and_grid_size()
-    pysweeper = Board(difficulty=selected_difficulty, grid=grid_size)
+    main()
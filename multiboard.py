@@ -0,0 +1,86 @@
+import tkinter as tk
+import argparse
+import math
+
+from board import Board, BoardResources
+from generator import close_board_pool
+
+
+DEFAULT_BOARDS = 4
+MULTI_CELL_SIZE = 20
+
+
+class MultiBoard(tk.Frame):
+
+    def __init__(self, master, count, difficulty, grid, sound="OFF", density=None, cell_size=MULTI_CELL_SIZE,
+                 resources=None):
+        """
+        Initialize a widget that runs several games side by side in a square arrangement.
+
+        Every board draws its cells on one canvas and shares the images, puzzle bank, statistics writer,
+        scheduler and timer tick of the same BoardResources, so each extra board only adds its own engine,
+        cells and canvas.
+
+        Parameters:
+        - master (tk.Misc): The parent widget.
+        - count (int): The number of boards.
+        - difficulty (str): The difficulty level of the games.
+        - grid (str): The grid size of each board, such as "10x10".
+        - sound (str, optional): "ON" or "OFF".
+        - density (float, optional): The fraction of cells holding a mine, as for Board.
+        - cell_size (int, optional): The side of a cell in pixels.
+        - resources (BoardResources, optional): The shared resources. If None, new ones are created.
+        """
+
+        super().__init__(master)
+        self.resources = resources if resources is not None else BoardResources(self.winfo_toplevel())
+        columns = math.ceil(math.sqrt(count))
+
+        toolbar = tk.Frame(self)
+        toolbar.grid(row=0, column=0, columnspan=columns, pady=3)
+        tk.Button(toolbar, text="New Games", font=("Helvetica", 12), command=self.restart_all).pack()
+
+        self.boards = []
+        for number in range(count):
+            board = Board(self, difficulty=difficulty, grid=grid, sound=sound, density=density, renderer="canvas",
+                          resources=self.resources, cell_size=cell_size, standalone=False)
+            board.grid(row=number // columns + 1, column=number % columns, padx=4, pady=4)
+            self.boards.append(board)
+
+    def restart_all(self):
+        """
+        Start a new game on every board.
+        """
+
+        for board in self.boards:
+            board.restart_game()
+
+
+def main():
+    """
+    Open a window with several boards from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Play several PySweeper games side by side.")
+    parser.add_argument("--boards", type=int, default=DEFAULT_BOARDS, help="number of boards")
+    parser.add_argument("--difficulty", default="easy", choices=["easy", "medium", "hard"])
+    parser.add_argument("--grid", default="10x10", help="grid size of each board, such as 10x10")
+    parser.add_argument("--density", type=float, default=None, help="fraction of cells holding a mine")
+    parser.add_argument("--cell-size", type=int, default=MULTI_CELL_SIZE, help="side of a cell in pixels")
+    parser.add_argument("--sound", default="OFF", choices=["ON", "OFF"])
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.title(f"PySweeper - {args.boards} boards")
+    root.resizable(False, False)
+    multi_board = MultiBoard(root, args.boards, args.difficulty, args.grid, sound=args.sound, density=args.density,
+                             cell_size=args.cell_size)
+    multi_board.pack()
+    root.iconphoto(False, multi_board.resources.images()["icon"])
+    root.mainloop()
+    multi_board.resources.close()
+    close_board_pool()
+
+
+if __name__ == "__main__":
+    main()
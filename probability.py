@@ -0,0 +1,280 @@
+from collections import deque
+from math import comb
+import time
+
+from solver import UNKNOWN
+
+
+# Time allowed for one computation, in seconds. Components not counted in time are approximated.
+DEFAULT_BUDGET = 0.04
+
+
+class MineProbabilities:
+
+    def __init__(self, solver, mines, budget=DEFAULT_BUDGET):
+        """
+        Initialize the mine probability calculator of a game.
+
+        The unknown cells next to revealed numbers (the frontier) are split into independent components:
+        two cells are in the same component when a chain of constraints links them. The mine layouts of each
+        component are counted per number of mines, and the components are combined with the cells away from
+        the frontier by weighting every total with the number of ways to place the remaining mines there.
+
+        Counted components are cached by their constraints, so after a move only the components it changed
+        are counted again.
+
+        Parameters:
+        - solver (Solver): The solver of the game, kept up to date with the revealed cells.
+        - mines (int): The total number of mines on the board.
+        - budget (float, optional): The time allowed for one computation, in seconds.
+        """
+
+        self.solver = solver
+        self.mines = mines
+        self.budget = budget
+        self.cache = {}
+        self.exact = True
+
+    def components(self):
+        """
+        Split the frontier into independent components.
+
+        Returns:
+        - list: One (cells, constraints) pair per component. cells is a sorted tuple of padded positions and
+                constraints a sorted tuple of (cells, remaining mines) pairs.
+        """
+
+        constraints_of = {}
+        constraints = []
+        for base, mask, remaining in self.solver.constraints.values():
+            cells = []
+            while mask:
+                low = mask & -mask
+                cells.append(base + low.bit_length() - 1)
+                mask ^= low
+            constraint = (tuple(cells), remaining)
+            constraints.append(constraint)
+            for cell in cells:
+                constraints_of.setdefault(cell, []).append(constraint)
+
+        result = []
+        seen = set()
+        for start in constraints_of:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            cells = []
+            members = set()
+            while stack:
+                cell = stack.pop()
+                cells.append(cell)
+                for constraint in constraints_of[cell]:
+                    if constraint not in members:
+                        members.add(constraint)
+                        for other in constraint[0]:
+                            if other not in seen:
+                                seen.add(other)
+                                stack.append(other)
+            result.append((tuple(sorted(cells)), tuple(sorted(members))))
+        return result
+
+    def compute(self):
+        """
+        Compute the probability that each unrevealed cell holds a mine.
+
+        self.exact is set to False when a component could not be counted within the time budget and its
+        probabilities were approximated.
+
+        Returns:
+        - dict: The probability of every unrevealed cell, keyed by flat index.
+        """
+
+        solver = self.solver
+        deadline = time.perf_counter() + self.budget
+        self.exact = True
+
+        counted = []
+        approximated = {}
+        cache = {}
+        for cells, constraints in self.components():
+            result = self.cache.get(constraints)
+            if result is None and time.perf_counter() < deadline:
+                result = count_layouts(cells, constraints, deadline)
+            if result is None:
+                self.exact = False
+                approximated.update(approximate(constraints))
+            else:
+                cache[constraints] = result
+                counted.append((cells, result))
+        self.cache = cache
+
+        frontier = {cell for cells, _ in counted for cell in cells}
+        interior = [position for position, state in enumerate(solver.known)
+                    if state == UNKNOWN and position not in frontier and position not in approximated]
+        remaining = self.mines - len(solver.mines) - round(sum(approximated.values()))
+
+        # totals[k] counts the layouts of the counted components with k mines in total.
+        totals = [1]
+        prefixes = [totals]
+        for _, result in counted:
+            totals = convolve(totals, [count for count, _ in result])
+            prefixes.append(totals)
+
+        def weight(k):
+            free = remaining - k
+            return comb(len(interior), free) if 0 <= free <= len(interior) else 0
+
+        probabilities = {}
+        total_weight = sum(count * weight(k) for k, count in enumerate(totals))
+        if total_weight == 0:
+            self.exact = False
+            for cells, result in counted:
+                approximated.update(approximate_from_counts(cells, result))
+            density = max(0, remaining) / len(interior) if interior else 0
+        else:
+            suffix = [1]
+            for index in range(len(counted) - 1, -1, -1):
+                cells, result = counted[index]
+                others = convolve(prefixes[index], suffix)
+                weights = [sum(count * weight(k + other) for other, count in enumerate(others))
+                           for k in range(len(result))]
+                for j, cell in enumerate(cells):
+                    mines = sum(sums[j] * weights[k] for k, (_, sums) in enumerate(result))
+                    probabilities[solver.flat(cell)] = mines / total_weight
+                suffix = convolve(suffix, [count for count, _ in result])
+            expected = sum(count * weight(k) * (remaining - k) for k, count in enumerate(totals))
+            density = expected / total_weight / len(interior) if interior else 0
+
+        for cell, probability in approximated.items():
+            probabilities[solver.flat(cell)] = probability
+        for position in interior:
+            probabilities[solver.flat(position)] = density
+        for index in solver.mines:
+            probabilities[index] = 1.0
+        for index in solver.safe:
+            probabilities[index] = 0.0
+        return probabilities
+
+
+def convolve(first, second):
+    """
+    Return the distribution of the total of two independent mine counts.
+
+    Parameters:
+    - first (list): first[k] is the number of layouts with k mines.
+    - second (list): second[k] is the number of layouts with k mines.
+    """
+
+    result = [0] * (len(first) + len(second) - 1)
+    for i, a in enumerate(first):
+        if a:
+            for j, b in enumerate(second):
+                result[i + j] += a * b
+    return result
+
+
+def count_layouts(cells, constraints, deadline):
+    """
+    Count the mine layouts of a frontier component that satisfy all of its constraints.
+
+    The cells are placed one at a time in breadth-first order, so only a few constraints are partly
+    decided at any moment. Partial layouts leaving every constraint with the same number of mines still
+    to place behave identically from then on and are merged, which keeps the count polynomial for the
+    long, thin components typical of a frontier.
+
+    Parameters:
+    - cells (tuple): The padded positions of the component's cells.
+    - constraints (tuple): (cells, remaining mines) pairs.
+    - deadline (float): The time.perf_counter() value at which counting is abandoned.
+
+    Returns:
+    - list or None: result[k] is a (count, sums) pair, where count is the number of layouts with k mines and
+                    sums[j] the number of those layouts with a mine on cells[j]; None if the deadline passed.
+    """
+
+    neighbors = {cell: set() for cell in cells}
+    for members, _ in constraints:
+        for cell in members:
+            neighbors[cell].update(members)
+    order = []
+    queued = {cells[0]}
+    queue = deque([cells[0]])
+    while queue:
+        cell = queue.popleft()
+        order.append(cell)
+        for other in sorted(neighbors[cell]):
+            if other not in queued:
+                queued.add(other)
+                queue.append(other)
+
+    step = {cell: i for i, cell in enumerate(order)}
+    column = {cell: j for j, cell in enumerate(cells)}
+    touching = [[] for _ in order]
+    for c, (members, _) in enumerate(constraints):
+        steps = sorted(step[cell] for cell in members)
+        for left, i in enumerate(reversed(steps)):
+            touching[i].append((c, left))
+
+    size = len(cells)
+    layer = {tuple(remaining for _, remaining in constraints): {0: (1, [0] * size)}}
+    for i, cell in enumerate(order):
+        if time.perf_counter() > deadline:
+            return None
+        j = column[cell]
+        following = {}
+        for needs, by_mines in layer.items():
+            for mine in (0, 1):
+                updated = list(needs)
+                for c, left in touching[i]:
+                    need = updated[c] - mine
+                    if need < 0 or need > left:
+                        break
+                    updated[c] = need
+                else:
+                    target = following.setdefault(tuple(updated), {})
+                    for mines, (count, sums) in by_mines.items():
+                        if mine:
+                            sums = sums.copy()
+                            sums[j] += count
+                        existing = target.get(mines + mine)
+                        if existing is None:
+                            target[mines + mine] = (count, sums)
+                        else:
+                            target[mines + mine] = (existing[0] + count, [a + b for a, b in zip(existing[1], sums)])
+        layer = following
+
+    by_mines = layer.get(tuple(0 for _ in constraints), {})
+    if not by_mines:
+        return [(0, [0] * size)]
+    return [by_mines.get(mines, (0, [0] * size)) for mines in range(max(by_mines) + 1)]
+
+
+def approximate(constraints):
+    """
+    Estimate the mine probability of each cell of a component without counting its layouts.
+
+    Each constraint spreads its remaining mines evenly over its cells, and each cell takes the highest
+    estimate among the constraints that touch it.
+
+    Parameters:
+    - constraints (tuple): (cells, remaining mines) pairs.
+    """
+
+    estimates = {}
+    for members, remaining in constraints:
+        share = remaining / len(members)
+        for cell in members:
+            estimates[cell] = max(estimates.get(cell, 0.0), share)
+    return estimates
+
+
+def approximate_from_counts(cells, result):
+    """
+    Return the probabilities of a counted component taken on its own, ignoring the rest of the board.
+    """
+
+    total = sum(count for count, _ in result)
+    if total == 0:
+        return {cell: 0.5 for cell in cells}
+    return {cell: sum(sums[j] for _, sums in result) / total for j, cell in enumerate(cells)}
@@ -1,88 +1,325 @@
 import tkinter as tk
 import random
+import struct
+import time
 import json
+import mmap
+import os
+
+
+PUZZLE_FILE = "puzzles/puzzles.json"
+PUZZLE_CACHE = "puzzles/puzzles.pack"
+
+# The difficulty levels that have puzzles, in the order they are tried when a level has none of an answer.
+DIFFICULTIES = ("medium", "hard")
+
+PACK_MAGIC = b"PSPK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHH")
+PACK_BUCKET = struct.Struct("<8sBxII")
+PACK_OFFSET = struct.Struct("<I")
+
+_banks = {}
+
+
+class PuzzleBank:
+
+    def __init__(self, puzzles):
+        """
+        Initialize a puzzle bank indexed by (difficulty, answer).
+
+        Parameters:
+        - puzzles (dict): The puzzles as stored in puzzles.json: {difficulty: {answer: [expression, ...]}}.
+        """
+
+        self.index = {(difficulty, int(answer)): expressions
+                      for difficulty, answers in puzzles.items()
+                      for answer, expressions in answers.items()}
+
+    def count(self, difficulty, answer):
+        """
+        Return the number of puzzles of a difficulty level whose answer is the given number.
+        """
+
+        return len(self.index.get((difficulty, answer), ()))
+
+    def get(self, difficulty, answer, position):
+        """
+        Return one puzzle of a difficulty level and answer by its position in the bank.
+        """
+
+        return self.index[(difficulty, answer)][position]
+
+
+class PuzzlePack:
+
+    def __init__(self, filename):
+        """
+        Open a binary puzzle pack written by write_puzzle_pack.
+
+        Only the header and the bucket table are read up front. The file is memory-mapped and each puzzle is
+        decoded when it is drawn, so packs with hundreds of thousands of puzzles open instantly.
+
+        Parameters:
+        - filename (str): The path to the puzzle pack.
+        """
+
+        with open(filename, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, buckets = PACK_HEADER.unpack_from(self.data, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{filename} is not a version {PACK_VERSION} puzzle pack.")
+
+        self.index = {}
+        position = PACK_HEADER.size
+        total = 0
+        for _ in range(buckets):
+            difficulty, answer, count, first = PACK_BUCKET.unpack_from(self.data, position)
+            self.index[(difficulty.rstrip(b"\0").decode(), answer)] = (count, first)
+            position += PACK_BUCKET.size
+            total += count
+        self.offsets = position
+        self.blob = position + (total + 1) * PACK_OFFSET.size
+
+    def count(self, difficulty, answer):
+        """
+        Return the number of puzzles of a difficulty level whose answer is the given number.
+        """
+
+        return self.index.get((difficulty, answer), (0, 0))[0]
+
+    def get(self, difficulty, answer, position):
+        """
+        Return one puzzle of a difficulty level and answer by its position in the pack.
+        """
+
+        count, first = self.index[(difficulty, answer)]
+        if not 0 <= position < count:
+            raise IndexError(position)
+        entry = self.offsets + (first + position) * PACK_OFFSET.size
+        start, end = struct.unpack_from("<II", self.data, entry)
+        return self.data[self.blob + start:self.blob + end].decode()
+
+
+def write_puzzle_pack(puzzles, filename):
+    """
+    Write puzzles to a binary puzzle pack that PuzzlePack can memory-map.
+
+    The pack holds a header, one (difficulty, answer, count, first entry) record per bucket, the start
+    offset of every puzzle and finally the UTF-8 text of all puzzles.
+
+    Parameters:
+    - puzzles (dict): The puzzles as stored in puzzles.json: {difficulty: {answer: [expression, ...]}}.
+    - filename (str): The path of the pack to write.
+    """
+
+    buckets = []
+    offsets = [0]
+    blob = bytearray()
+    for difficulty, answers in puzzles.items():
+        for answer, expressions in answers.items():
+            buckets.append(PACK_BUCKET.pack(difficulty.encode(), int(answer), len(expressions), len(offsets) - 1))
+            for expression in expressions:
+                blob += expression.encode()
+                offsets.append(len(blob))
+
+    with open(filename, "wb") as file:
+        file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(buckets)))
+        file.write(b"".join(buckets))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.write(blob)
+
+
+def load_puzzle_bank(filename=None):
+    """
+    Return the puzzle bank stored in a file, loading it only once per process.
+
+    Parameters:
+    - filename (str, optional): A puzzles.json style JSON file, or a binary puzzle pack for any other extension.
+                                If None, the validated cache written by puzzle_builder.py is used when it exists,
+                                and puzzles.json otherwise.
+    """
+
+    if filename is None:
+        filename = PUZZLE_CACHE if os.path.exists(PUZZLE_CACHE) else PUZZLE_FILE
+    if filename not in _banks:
+        if filename.endswith(".json"):
+            with open(filename, "r") as file:
+                _banks[filename] = PuzzleBank(json.load(file))
+        else:
+            _banks[filename] = PuzzlePack(filename)
+    return _banks[filename]
 
 
 class PuzzleManager:
-    def __init__(self):
+    def __init__(self, bank=None, rng=None):
         """
         Initialize the PuzzleManager.
+
+        Parameters:
+        - bank (PuzzleBank or PuzzlePack, optional): The puzzles to draw from. If None, the shared default
+                                                     bank from load_puzzle_bank is loaded by the first call
+                                                     to set_puzzle.
+        - rng (random.Random, optional): The random generator used to shuffle the puzzle pools.
         """
 
         self.puzzle_window = None
+        self.puzzle_message = None
+        self.puzzle_cell = None
         self.puzzles_solved = 0
         self.correct_puzzles_solved = 0
-        self.puzzles = self.load_puzzles("puzzles/puzzles.json")
+        self.bank = bank
+        self.random = rng if rng is not None else random.Random()
+        self.pools = {}
 
-    def load_puzzles(self, filename):
+    def reset(self, seed=None):
         """
-        Load puzzles from a JSON file.
+        Reset the solved puzzle counters for a new game.
 
         Parameters:
-        - filename (str): The path to the JSON file containing the puzzles.
+        - seed (int, optional): Reseed the random generator and start new pools, so that the puzzles of the game
+                                can be drawn again from the same seed, as replays do.
         """
 
-        with open(filename, "r") as file:
-            return json.load(file)
+        self.puzzles_solved = 0
+        self.correct_puzzles_solved = 0
+        if seed is not None:
+            self.random.seed(seed)
+            self.pools = {}
 
     def set_puzzle(self, difficulty, neighbor_mine_count):
         """
         Set the puzzle for the cell based on the current difficulty level and neighbor mine count.
 
+        Puzzles are drawn from a shuffled pool per (difficulty, answer), so no puzzle repeats until every
+        puzzle of its pool has been drawn; the pool is then reshuffled. A seeded reset starts new pools.
+
+        A bank without puzzles of the difficulty and answer, such as a partial pack or one whose invalid
+        puzzles were dropped by puzzle_builder --check, lends a puzzle of the same answer from another
+        difficulty. If no difficulty has one, a puzzle is generated with puzzle_builder.
+
         Parameters:
         - difficulty (str): The difficulty level of the puzzle.
         - neighbor_mine_count (int): The number of neighboring mines around the cell.
         """
 
-        return random.choice(self.puzzles[difficulty][str(neighbor_mine_count)])
+        if self.bank is None:
+            self.bank = load_puzzle_bank()
+        for level in (difficulty, *(level for level in DIFFICULTIES if level != difficulty)):
+            count = self.bank.count(level, neighbor_mine_count)
+            if count == 0:
+                continue
+            key = (level, neighbor_mine_count)
+            pool = self.pools.get(key)
+            if not pool:
+                pool = list(range(count))
+                self.random.shuffle(pool)
+                self.pools[key] = pool
+            return self.bank.get(level, neighbor_mine_count, pool.pop())
 
-    def display_window(self, board, cell):
+        from puzzle_builder import generate_expression
+        return generate_expression(self.random, difficulty, neighbor_mine_count)
+
+    def build_window(self, board):
         """
-        Display a new window with a puzzle when a revealed cell is clicked.
+        Build the puzzle window of a board, hidden. It is built once and reused for every puzzle of the board.
+
+        The window stays on top of the board without hiding it. The answers can be given with the buttons or
+        the keys 1 to 8, and Escape closes the window without answering.
 
         Parameters:
-        - board (Board): The game board containing the cells.
-        - cell (Cell): The cell object that was clicked.
+        - board (Board): The game board the puzzles belong to.
         """
 
         self.puzzle_window = tk.Toplevel(board)
+        self.puzzle_window.withdraw()
         self.puzzle_window.title("Puzzle")
         self.puzzle_window.geometry(f"+{board.winfo_screenwidth() // 4}+{board.winfo_screenheight() // 8}")
         self.puzzle_window.resizable(False, False)
+        self.puzzle_window.transient(board.window)
         self.puzzle_window.protocol("WM_DELETE_WINDOW", board.display_window)
         self.puzzle_window.iconphoto(False, board.images["icon"])
 
         puzzle_frame = tk.Frame(self.puzzle_window)
         puzzle_frame.pack(expand=True, fill="both")
 
-        puzzle_text = cell.puzzle
-        puzzle_message = tk.Message(puzzle_frame, text=puzzle_text, font=("Consolas", 12), width=400)
-        puzzle_message.pack(expand=True, fill="both")
-        puzzle_height = puzzle_message.winfo_reqheight()
-        self.puzzle_window.geometry(f"420x{puzzle_height + 100}")
+        self.puzzle_message = tk.Message(puzzle_frame, font=("Consolas", 12), width=400)
+        self.puzzle_message.pack(expand=True, fill="both")
 
         button_frame = tk.Frame(self.puzzle_window)
         button_frame.pack(side="bottom")
 
-        for i in range(8):
+        for number in range(1, 9):
             button = tk.Button(button_frame, width=35, height=35, relief="flat", borderwidth=0,
-                               image=board.images[str(i + 1)],
-                               command=lambda num=i + 1: cell.update_cell(str(num)))
+                               image=board.images[str(number)], command=lambda num=number: self.answer(num))
             button.pack(side="left", padx=5)
+            self.puzzle_window.bind(str(number), lambda event, num=number: self.answer(num))
+            self.puzzle_window.bind(f"<KP_{number}>", lambda event, num=number: self.answer(num))
+        self.puzzle_window.bind("<Escape>", lambda event: board.display_window())
 
-        board.withdraw()
-
-    def count_puzzles_solved(self, board):
+    def display_window(self, board, cell):
         """
-        Count the number of puzzles solved correctly.
+        Display the puzzle of a revealed cell when it is clicked.
+
+        Only the text and the target cell of the puzzle window change, so a cell clicked while another puzzle
+        is open simply takes its place.
 
         Parameters:
         - board (Board): The game board containing the cells.
+        - cell (Cell): The cell object that was clicked.
+        """
+
+        start = time.perf_counter()
+        if self.puzzle_window is None:
+            self.build_window(board)
+        self.puzzle_cell = cell
+        self.puzzle_message.configure(text=cell.puzzle)
+        self.puzzle_window.geometry(f"420x{self.puzzle_message.winfo_reqheight() + 100}")
+        self.puzzle_window.deiconify()
+        self.puzzle_window.lift()
+        self.puzzle_window.focus_set()
+
+        if board.instrumentation.enabled:
+            board.update_idletasks()
+            board.instrumentation.record("puzzle", time.perf_counter() - start)
+
+    def answer(self, number):
+        """
+        Answer the open puzzle with a number, unless its game has ended meanwhile.
+        """
+
+        cell = self.puzzle_cell
+        if cell is None:
+            return
+        if cell.board.game_is_on == 1:
+            cell.update_cell(str(number))
+        else:
+            cell.board.display_window()
+
+    def hide_window(self):
+        """
+        Hide the puzzle window, keeping it for the next puzzle.
+        """
+
+        self.puzzle_cell = None
+        if self.puzzle_window is not None:
+            self.puzzle_window.withdraw()
+
+    def record_solution(self, cell, solution):
+        """
+        Update the solved puzzle counters when the user answers the puzzle of a cell.
+
+        A cell answered again replaces its previous answer instead of counting as a new puzzle.
+
+        Parameters:
+        - cell (Cell): The cell whose puzzle was answered, still holding its previous answer.
+        - solution (int): The number chosen by the user.
         """
 
-        for r in board.buttons:
-            for cell in r:
-                if cell.user_puzzle_solution > 0:
-                    self.puzzles_solved += 1
-                    if cell.neighbor_mine_count == cell.user_puzzle_solution:
-                        self.correct_puzzles_solved += 1
+        if cell.user_puzzle_solution == 0:
+            self.puzzles_solved += 1
+        elif cell.user_puzzle_solution == cell.neighbor_mine_count:
+            self.correct_puzzles_solved -= 1
+        if solution == cell.neighbor_mine_count:
+            self.correct_puzzles_solved += 1
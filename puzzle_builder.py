@@ -0,0 +1,429 @@
+from multiprocessing import Pool, TimeoutError
+import importlib.util
+import sysconfig
+import argparse
+import random
+import builtins
+import signal
+import json
+import math
+import time
+import ast
+import os
+
+from puzzle import PUZZLE_FILE, PUZZLE_CACHE, write_puzzle_pack
+
+
+SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in ("abs", "all", "any", "bin", "bool", "chr", "dict", "divmod", "enumerate", "filter", "float",
+                 "hex", "int", "len", "list", "map", "max", "min", "oct", "ord", "pow", "range", "reversed",
+                 "round", "set", "sorted", "str", "sum", "tuple", "zip")
+}
+ALLOWED_MODULES = ("math", "statistics")
+ALLOWED_NAMES = set(SAFE_BUILTINS) | {"math"}
+
+# Puzzles whose source is longer than this, or whose constants are larger, are rejected before evaluation.
+MAX_LENGTH = 400
+MAX_CONSTANT = 10 ** 12
+DEFAULT_TIMEOUT = 0.5
+CHUNK_SIZE = 256
+
+# Extra seconds a whole chunk of puzzles may take in a worker before the worker is presumed stuck.
+CHUNK_TIMEOUT = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+def stdlib_module(name):
+    """
+    Import a module from the standard library, even if a module of the same name shadows it in this directory.
+
+    Parameters:
+    - name (str): The module name.
+    """
+
+    path = os.path.join(sysconfig.get_paths()["stdlib"], f"{name}.py")
+    if not os.path.exists(path):
+        return importlib.import_module(name)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+MODULES = {}
+
+
+def safe_import(name, *args, **kwargs):
+    """
+    Import replacement for puzzles, limited to ALLOWED_MODULES.
+    """
+
+    if name not in ALLOWED_MODULES:
+        raise ImportError(f"import of {name} is not allowed")
+    if name not in MODULES:
+        MODULES[name] = stdlib_module(name)
+    return MODULES[name]
+
+
+def compile_puzzle(source):
+    """
+    Check a puzzle and compile it.
+
+    A puzzle is either a single expression, or a snippet defining func() whose return value is the answer.
+    It may only use allowed names, imports and small constants.
+
+    Parameters:
+    - source (str): The Python source of the puzzle.
+
+    Returns:
+    - tuple: The code object and whether the puzzle is a single expression.
+
+    Raises:
+    - ValueError: If the puzzle is rejected, with the reason as message.
+    """
+
+    if len(source) > MAX_LENGTH:
+        raise ValueError("too long")
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as error:
+        raise ValueError(f"syntax error: {error.msg}")
+
+    is_expression = len(tree.body) == 1 and isinstance(tree.body[0], ast.Expr)
+    if not is_expression and not any(isinstance(node, ast.FunctionDef) and node.name == "func"
+                                     for node in tree.body):
+        raise ValueError("neither an expression nor a definition of func()")
+
+    nodes = list(ast.walk(tree))
+    bound = set()
+    for node in nodes:
+        if isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            bound.add(node.id)
+        elif isinstance(node, ast.FunctionDef):
+            bound.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                module = getattr(node, "module", None) or alias.name
+                if module not in ALLOWED_MODULES:
+                    raise ValueError(f"import of {module}")
+                bound.add(alias.asname or alias.name)
+
+    for node in nodes:
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise ValueError(f"private attribute {node.attr}")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES and node.id not in bound:
+            raise ValueError(f"unknown name {node.id}")
+        if isinstance(node, ast.Constant) and isinstance(node.value, int) and abs(node.value) > MAX_CONSTANT:
+            raise ValueError(f"constant {node.value} too large")
+
+    if is_expression:
+        return compile(ast.Expression(tree.body[0].value), "<puzzle>", "eval"), True
+    return compile(tree, "<puzzle>", "exec"), False
+
+
+def run_puzzle(source):
+    """
+    Return the answer of a puzzle: the value of its expression, or the return value of its func().
+
+    Parameters:
+    - source (str): The Python source of the puzzle.
+
+    Raises:
+    - ValueError: If the puzzle is rejected by compile_puzzle.
+    """
+
+    code, is_expression = compile_puzzle(source)
+    namespace = {"__builtins__": {**SAFE_BUILTINS, "__import__": safe_import}, "math": math}
+    if is_expression:
+        return eval(code, namespace)
+    exec(code, namespace)
+    return namespace["func"]()
+
+
+def on_alarm(signum, frame):
+    raise Timeout()
+
+
+def init_worker():
+    """
+    Install the timeout handler in a worker process.
+    """
+
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, on_alarm)
+
+
+def evaluate(task):
+    """
+    Run one puzzle in the restricted namespace and compare its result with its answer key.
+
+    Runs inside a worker process. On platforms with SIGALRM the puzzle is interrupted after the timeout.
+    A result matches if it equals the answer, or is the answer written as a string; booleans never match.
+
+    Parameters:
+    - task (tuple): (difficulty, answer, source, timeout in seconds).
+
+    Returns:
+    - tuple: (difficulty, answer, source, error), where error is None if the puzzle is valid.
+    """
+
+    difficulty, answer, source, timeout = task
+    error = None
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        value = run_puzzle(source)
+        if isinstance(value, bool) or not (value == answer or value == str(answer)):
+            error = f"evaluates to {value!r}"
+    except Timeout:
+        error = "timed out"
+    except ValueError as exception:
+        error = str(exception)
+    except Exception as exception:
+        error = f"raises {type(exception).__name__}: {exception}"
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return difficulty, answer, source, error
+
+
+def validate(puzzles, workers=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Check every puzzle against the answer it is filed under, using a process pool.
+
+    Parameters:
+    - puzzles (dict): {difficulty: {answer: [expression, ...]}} with answers as strings or integers.
+    - workers (int, optional): The number of worker processes. If None, one per CPU core.
+    - timeout (float, optional): The time limit for evaluating a single puzzle, in seconds.
+
+    Returns:
+    - tuple: The valid puzzles as {difficulty: {answer: [expression, ...]}} with string answers,
+             and a list of (difficulty, answer, expression, error) for the rejected ones.
+    """
+
+    tasks = [(difficulty, int(answer), expression, timeout)
+             for difficulty, answers in puzzles.items()
+             for answer, expressions in answers.items()
+             for expression in expressions]
+
+    # Timeouts inside a worker cannot interrupt long-running C code such as sum(range(10 ** 12)). A chunk that
+    # does not finish in time is split in two and retried in a fresh pool, until the puzzle that hangs is
+    # alone in its chunk and rejected.
+    errors = [None] * len(tasks)
+    chunks = [range(start, min(start + CHUNK_SIZE, len(tasks))) for start in range(0, len(tasks), CHUNK_SIZE)]
+    while chunks:
+        retry = []
+        with Pool(workers, initializer=init_worker) as pool:
+            jobs = [(chunk, pool.apply_async(evaluate_chunk, ([tasks[i] for i in chunk],))) for chunk in chunks]
+            for position, (chunk, job) in enumerate(jobs):
+                try:
+                    for i, result in zip(chunk, job.get(timeout + CHUNK_TIMEOUT)):
+                        errors[i] = result[3]
+                except TimeoutError:
+                    if len(chunk) == 1:
+                        errors[chunk[0]] = "timed out"
+                    else:
+                        retry += [chunk[:len(chunk) // 2], chunk[len(chunk) // 2:]]
+                    retry += [chunk for chunk, _ in jobs[position + 1:]]
+                    break
+        chunks = retry
+
+    valid = {}
+    rejected = []
+    for (difficulty, answer, expression, _), error in zip(tasks, errors):
+        if error is None:
+            valid.setdefault(difficulty, {}).setdefault(str(answer), []).append(expression)
+        else:
+            rejected.append((difficulty, answer, expression, error))
+    return valid, rejected
+
+
+def evaluate_chunk(chunk):
+    """
+    Evaluate a list of puzzles in a worker process and return their results.
+    """
+
+    return [evaluate(task) for task in chunk]
+
+
+def word(rng, length, letters="abcdefghijklmnopqrstuvwxyz"):
+    """
+    Return a random word of the given length made of the given letters.
+    """
+
+    return "".join(rng.choice(letters) for _ in range(length))
+
+
+def simple_expression(rng, value):
+    """
+    Return a random single-step expression that evaluates to value.
+
+    Parameters:
+    - rng (random.Random): The random generator.
+    - value (int): The result of the expression, between 0 and 8.
+    """
+
+    divisor = rng.randint(2, 9)
+    start = rng.randint(0, 20)
+    digits = [str(rng.randint(0, 9)) for _ in range(rng.randint(3, 6))]
+    position = rng.randrange(len(digits))
+    digits[position] = str(value)
+    first = rng.randint(0, value)
+    letter = rng.choice("xyz")
+    letters = list(word(rng, rng.randint(1, 4), "abcdefgh") + letter * value)
+    rng.shuffle(letters)
+
+    templates = [
+        lambda: f"len({word(rng, value)!r})",
+        lambda: f"int({''.join(digits)!r}[{position}])",
+        lambda: f"len(range({start}, {start + value}))",
+        lambda: f"bin({(1 << value) - 1 << rng.randint(0, 3)}).count('1')",
+        lambda: f"math.isqrt({value * value + rng.randint(0, 2 * value)})",
+        lambda: f"abs({start} - {start + value})",
+        lambda: f"{''.join(letters)!r}.count({letter!r})",
+        lambda: f"{value * divisor + rng.randint(0, divisor - 1)} // {divisor}",
+        lambda: f"divmod({value * divisor + rng.randint(0, divisor - 1)}, {divisor})[0]",
+        lambda: f"len([{letter} for {letter} in range({value * divisor}) if {letter} % {divisor} == 0])",
+        lambda: f"sum([{first}, {value - first}])",
+    ]
+    if value < divisor:
+        templates.append(lambda: f"{divisor * rng.randint(1, 9) + value} % {divisor}")
+    return rng.choice(templates)()
+
+
+def generate_expression(rng, difficulty, value):
+    """
+    Return a random expression that should evaluate to value; hard puzzles combine two simple steps.
+
+    Parameters:
+    - rng (random.Random): The random generator.
+    - difficulty (str): "medium" or "hard".
+    - value (int): The answer of the puzzle, between 1 and 8.
+    """
+
+    if difficulty != "hard":
+        return simple_expression(rng, value)
+
+    left = rng.randint(0, value)
+    combinations = [
+        lambda: f"{simple_expression(rng, left)} + {simple_expression(rng, value - left)}",
+        lambda: f"max({simple_expression(rng, value)}, {simple_expression(rng, left)})",
+        lambda: f"[{', '.join(str(rng.randint(0, 9)) for _ in range(3))}, {value}][{simple_expression(rng, 3)}]",
+        lambda: f"len({word(rng, value + left)!r}[{simple_expression(rng, left)}:])",
+    ]
+    return rng.choice(combinations)()
+
+
+def generate_bucket(task):
+    """
+    Generate candidate puzzles for one difficulty and answer. Runs inside a worker process.
+
+    Parameters:
+    - task (tuple): (difficulty, answer, number of candidates, seed).
+
+    Returns:
+    - tuple: (difficulty, answer, list of distinct expressions).
+    """
+
+    difficulty, answer, count, seed = task
+    rng = random.Random(seed)
+    expressions = {generate_expression(rng, difficulty, answer) for _ in range(count)}
+    return difficulty, answer, sorted(expressions)
+
+
+def generate(puzzles, per_answer, seed=None, workers=None):
+    """
+    Generate new candidate puzzles for every difficulty and answer in a process pool, skipping duplicates.
+
+    Parameters:
+    - puzzles (dict): The existing puzzles, used to avoid duplicates.
+    - per_answer (int): The number of candidates to generate for each (difficulty, answer).
+    - seed (int, optional): The seed of the random generator.
+    - workers (int, optional): The number of worker processes. If None, one per CPU core.
+
+    Returns:
+    - dict: {difficulty: {answer: [expression, ...]}} with only unseen expressions.
+    """
+
+    rng = random.Random(seed)
+    seen = {"".join(expression.split())
+            for answers in puzzles.values() for expressions in answers.values() for expression in expressions}
+
+    tasks = []
+    for difficulty in ("medium", "hard"):
+        for answer in range(1, 9):
+            for start in range(0, per_answer, CHUNK_SIZE):
+                tasks.append((difficulty, answer, min(CHUNK_SIZE, per_answer - start), rng.getrandbits(64)))
+
+    candidates = {}
+    with Pool(workers) as pool:
+        for difficulty, answer, expressions in pool.imap(generate_bucket, tasks):
+            bucket = candidates.setdefault(difficulty, {}).setdefault(str(answer), [])
+            for expression in expressions:
+                key = "".join(expression.split())
+                if key not in seen:
+                    seen.add(key)
+                    bucket.append(expression)
+    return candidates
+
+
+def merge(*banks):
+    """
+    Merge several {difficulty: {answer: [expression, ...]}} dictionaries into one.
+    """
+
+    merged = {}
+    for bank in banks:
+        for difficulty, answers in bank.items():
+            for answer, expressions in answers.items():
+                merged.setdefault(difficulty, {}).setdefault(str(answer), []).extend(expressions)
+    return merged
+
+
+def main():
+    """
+    Validate puzzles.json, optionally add generated puzzles, and write the puzzle cache.
+    """
+
+    parser = argparse.ArgumentParser(description="Validate and generate PySweeper puzzles.")
+    parser.add_argument("--input", default=PUZZLE_FILE, help="the puzzles.json file to validate")
+    parser.add_argument("--output", default=PUZZLE_CACHE, help="the puzzle pack to write")
+    parser.add_argument("--generate", type=int, default=0, metavar="N",
+                        help="generate N new candidates per difficulty and answer")
+    parser.add_argument("--seed", type=int, default=None, help="seed for puzzle generation")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per puzzle")
+    parser.add_argument("--check", action="store_true", help="only report invalid puzzles, write nothing")
+    args = parser.parse_args()
+
+    with open(args.input, "r") as file:
+        puzzles = json.load(file)
+
+    start = time.perf_counter()
+    if args.generate:
+        candidates = merge(puzzles, generate(puzzles, args.generate, args.seed, args.workers))
+    else:
+        candidates = puzzles
+    total = sum(len(expressions) for answers in candidates.values() for expressions in answers.values())
+    valid, rejected = validate(candidates, args.workers, args.timeout)
+    elapsed = time.perf_counter() - start
+
+    for difficulty, answer, expression, error in rejected:
+        print(f"{difficulty}/{answer}: {expression}  ->  {error}")
+    print(f"{total - len(rejected)} of {total} puzzles valid in {elapsed:.2f} s "
+          f"using {args.workers or os.cpu_count()} workers.")
+
+    if not args.check:
+        write_puzzle_pack(valid, args.output)
+        print(f"Wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import tkinter as tk
+
+from scheduler import PRIORITY_RENDER
+
+
+CELL_SIZE = 40
+PROBABILITY_FONT = ("Helvetica", 10, "bold")
+
+
+def heat_color(probability):
+    """
+    Return a color between green (certainly safe) and red (certainly a mine) for a mine probability.
+    """
+
+    return f"#{round(255 * probability):02x}{round(200 * (1 - probability)):02x}00"
+
+
+class ButtonRenderer:
+
+    def __init__(self, board):
+        """
+        Initialize a renderer that draws every cell as its own tk.Button.
+
+        Parameters:
+        - board (Board): The game board to draw.
+        """
+
+        self.board = board
+        self.buttons = []
+        self.drawn = []
+        self.labelled = []
+
+    def build(self):
+        """
+        Create one button per cell below the label frame of the board.
+        """
+
+        board = self.board
+        cell_size = board.cell_size
+        for r in range(board.size):
+            for c in range(board.size):
+                cell = board.buttons[r][c]
+                button = tk.Button(board, width=cell_size, height=cell_size, relief="flat", borderwidth=0,
+                                   command=cell.reveal_cell, image=board.images["tile"])
+                button.grid(row=r + 1, column=c)
+                button.bind("<Button-2>", lambda event, cell=cell: cell.question_mark())
+                button.bind("<Button-3>", lambda event, cell=cell: cell.flag())
+                self.buttons.append(button)
+        self.drawn = [("tile", "flat")] * len(self.buttons)
+
+    def draw(self, row, col, image, relief="flat"):
+        """
+        Show an image on a cell, skipping the call into Tk if the cell already shows it.
+
+        Parameters:
+        - row (int): The row index of the cell.
+        - col (int): The column index of the cell.
+        - image (str): The key of the image in the board's images dictionary.
+        - relief (str, optional): The relief of the cell's button.
+        """
+
+        index = row * self.board.size + col
+        if self.drawn[index] != (image, relief):
+            self.drawn[index] = (image, relief)
+            self.buttons[index].config(relief=relief, image=self.board.images[image])
+
+    def show_probabilities(self, probabilities):
+        """
+        Write the mine probability of cells, as a percentage, over their images.
+
+        Parameters:
+        - probabilities (dict): The probability of each cell to label, keyed by flat index.
+        """
+
+        self.clear_probabilities()
+        for index, probability in probabilities.items():
+            self.buttons[index].config(text=round(probability * 100), compound="center", font=PROBABILITY_FONT,
+                                       fg=heat_color(probability))
+        self.labelled = list(probabilities)
+
+    def clear_probabilities(self):
+        """
+        Remove the probabilities written by show_probabilities.
+        """
+
+        for index in self.labelled:
+            self.buttons[index].config(text="")
+        self.labelled = []
+
+    def destroy(self):
+        """
+        Destroy all cell buttons.
+        """
+
+        for button in self.buttons:
+            button.destroy()
+        self.buttons = []
+        self.drawn = []
+        self.labelled = []
+
+
+class CanvasRenderer:
+
+    def __init__(self, board):
+        """
+        Initialize a renderer that draws the whole grid as image items on a single tk.Canvas.
+
+        Draw calls only record the wanted image of a cell. The changed cells are redrawn together once per
+        frame of the board's scheduler, and clicks are mapped to cells from their pixel coordinates.
+
+        Parameters:
+        - board (Board): The game board to draw.
+        """
+
+        self.board = board
+        self.canvas = None
+        self.items = []
+        self.drawn = []
+        self.dirty = {}
+
+    def build(self):
+        """
+        Create the canvas and one image item per cell below the label frame of the board.
+        """
+
+        board = self.board
+        cell_size = board.cell_size
+        side = board.size * cell_size
+        self.canvas = tk.Canvas(board, width=side, height=side, highlightthickness=0, borderwidth=0)
+        self.canvas.grid(row=1, column=0, columnspan=board.size)
+
+        tile = board.images["tile"]
+        half = cell_size // 2
+        self.items = [self.canvas.create_image(c * cell_size + half, r * cell_size + half, image=tile)
+                      for r in range(board.size) for c in range(board.size)]
+        self.drawn = ["tile"] * len(self.items)
+
+        self.canvas.bind("<Button-1>", lambda event: self.on_click(event, "reveal_cell"))
+        self.canvas.bind("<Button-2>", lambda event: self.on_click(event, "question_mark"))
+        self.canvas.bind("<Button-3>", lambda event: self.on_click(event, "flag"))
+
+    def on_click(self, event, action):
+        """
+        Forward a mouse click to the cell under the pointer.
+
+        Parameters:
+        - event (tk.Event): The mouse event.
+        - action (str): The name of the Cell method to call.
+        """
+
+        cell_size = self.board.cell_size
+        row, col = event.y // cell_size, event.x // cell_size
+        if 0 <= row < self.board.size and 0 <= col < self.board.size:
+            getattr(self.board.buttons[row][col], action)()
+
+    def draw(self, row, col, image, relief="flat"):
+        """
+        Queue an image for a cell; it is drawn on the next flush.
+
+        Parameters:
+        - row (int): The row index of the cell.
+        - col (int): The column index of the cell.
+        - image (str): The key of the image in the board's images dictionary.
+        - relief (str, optional): Unused; cells on the canvas have no relief.
+        """
+
+        self.dirty[row * self.board.size + col] = image
+        if not self.board.scheduler.is_pending("canvas_flush"):
+            self.board.scheduler.call(self.flush, priority=PRIORITY_RENDER, key="canvas_flush")
+
+    def flush(self):
+        """
+        Redraw the cells whose image changed since the last flush.
+        """
+
+        dirty, self.dirty = self.dirty, {}
+        images = self.board.images
+        for index, image in dirty.items():
+            if self.drawn[index] != image:
+                self.drawn[index] = image
+                self.canvas.itemconfigure(self.items[index], image=images[image])
+
+    def show_probabilities(self, probabilities):
+        """
+        Write the mine probability of cells, as a percentage, over their images.
+
+        Parameters:
+        - probabilities (dict): The probability of each cell to label, keyed by flat index.
+        """
+
+        self.clear_probabilities()
+        cell_size = self.board.cell_size
+        half = cell_size // 2
+        for index, probability in probabilities.items():
+            row, col = divmod(index, self.board.size)
+            self.canvas.create_text(col * cell_size + half, row * cell_size + half, text=round(probability * 100),
+                                    font=PROBABILITY_FONT, fill=heat_color(probability), tags="probability")
+
+    def clear_probabilities(self):
+        """
+        Remove the probabilities written by show_probabilities.
+        """
+
+        self.canvas.delete("probability")
+
+    def destroy(self):
+        """
+        Cancel a pending flush and destroy the canvas.
+        """
+
+        self.board.scheduler.cancel("canvas_flush")
+        self.canvas.destroy()
+        self.items = []
+        self.drawn = []
+        self.dirty = {}
@@ -0,0 +1,248 @@
+import argparse
+import struct
+import time
+import glob
+import os
+
+from engine import Engine, IN_PROGRESS, pack_bits, unpack_bits
+
+
+REPLAY_DIRECTORY = "replays"
+REPLAY_MAGIC = b"PSRP"
+REPLAY_VERSION = 1
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# Header: magic, version, flags, difficulty, rows, cols, mines, seed.
+REPLAY_HEADER = struct.Struct("<4sBBBHHIQ")
+# Footer: status, timer value, safe cells revealed, flags placed, puzzles solved, correct puzzles solved.
+REPLAY_FOOTER = struct.Struct("<BIIIII")
+# Event: milliseconds since the previous event, action and answer (high and low nibble), cell index.
+SMALL_EVENT = struct.Struct("<HBH")
+LARGE_EVENT = struct.Struct("<HBI")
+SAFE_TILE = struct.Struct("<HH")
+
+# Header flags.
+DEALT = 1
+FINISHED = 2
+
+# Actions.
+REVEAL = 0
+FLAG = 1
+MARK = 2
+ANSWER = 3
+
+
+class ReplayRecorder:
+
+    def __init__(self, rows, cols, mines, difficulty, seed, dealt=None):
+        """
+        Initialize the recording of one game.
+
+        The mines, the safe tile and the puzzles follow from the seed, so only the player's actions are
+        stored, as a few bytes each. A game dealt from outside the seed, such as a no-guess board, also stores
+        its safe tile and its mine layout as a bitmap.
+
+        Parameters:
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines.
+        - difficulty (str): The difficulty level of the game.
+        - seed (int): The seed of the game's engine and puzzle manager.
+        - dealt (tuple, optional): The (safe tile, layout) of a board that was not generated from the seed.
+        """
+
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.difficulty = difficulty
+        self.seed = seed
+        self.dealt = dealt
+        self.event = SMALL_EVENT if rows * cols <= 0x10000 else LARGE_EVENT
+        self.events = bytearray()
+        self.footer = None
+        self.last_event = time.monotonic()
+
+    def record(self, action, index, answer=0):
+        """
+        Append one player action.
+
+        Parameters:
+        - action (int): REVEAL, FLAG, MARK or ANSWER.
+        - index (int): The flat index of the cell.
+        - answer (int, optional): The number chosen for an ANSWER.
+        """
+
+        now = time.monotonic()
+        delay = min(0xFFFF, round((now - self.last_event) * 1000))
+        self.last_event = now
+        self.events += self.event.pack(delay, action << 4 | answer, index)
+
+    def finish(self, status, timer_value, engine, puzzle_manager):
+        """
+        Store the outcome of the game, which playback must reproduce.
+
+        Parameters:
+        - status (int): The final state of the game: lost(0) or won(2).
+        - timer_value (int): The seconds shown by the timer.
+        - engine (Engine): The engine of the game.
+        - puzzle_manager (PuzzleManager): The puzzle manager of the game.
+        """
+
+        self.footer = REPLAY_FOOTER.pack(status, timer_value, engine.safe_revealed, engine.flags_placed,
+                                         puzzle_manager.puzzles_solved, puzzle_manager.correct_puzzles_solved)
+
+    def to_bytes(self):
+        """
+        Return the replay in its binary format.
+        """
+
+        flags = (DEALT if self.dealt is not None else 0) | (FINISHED if self.footer is not None else 0)
+        data = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags,
+                                            DIFFICULTIES.index(self.difficulty), self.rows, self.cols, self.mines,
+                                            self.seed))
+        if self.dealt is not None:
+            safe_tile, layout = self.dealt
+            data += SAFE_TILE.pack(*safe_tile) + pack_bits(layout)
+        if self.footer is not None:
+            data += self.footer
+        data += self.events
+        return bytes(data)
+
+    def save(self, directory=REPLAY_DIRECTORY):
+        """
+        Write the replay to a new file in a directory and return its path.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.seed:016x}.pysr")
+        with open(filename, "wb") as file:
+            file.write(self.to_bytes())
+        return filename
+
+
+class Replay:
+
+    def __init__(self, data):
+        """
+        Parse a replay written by ReplayRecorder.
+
+        Parameters:
+        - data (bytes): The replay in its binary format.
+        """
+
+        magic, version, flags, difficulty, rows, cols, mines, seed = REPLAY_HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"Not a version {REPLAY_VERSION} replay.")
+
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.difficulty = DIFFICULTIES[difficulty]
+        self.seed = seed
+        position = REPLAY_HEADER.size
+
+        self.dealt = None
+        if flags & DEALT:
+            safe_tile = SAFE_TILE.unpack_from(data, position)
+            position += SAFE_TILE.size
+            size = (rows * cols + 7) // 8
+            self.dealt = (safe_tile, bytes(unpack_bits(data[position:position + size], rows * cols)))
+            position += size
+
+        self.outcome = None
+        if flags & FINISHED:
+            self.outcome = REPLAY_FOOTER.unpack_from(data, position)
+            position += REPLAY_FOOTER.size
+
+        event = SMALL_EVENT if rows * cols <= 0x10000 else LARGE_EVENT
+        self.events = [(delay / 1000, code >> 4, index, code & 0xF)
+                       for delay, code, index in event.iter_unpack(data[position:])]
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read a replay file.
+        """
+
+        with open(filename, "rb") as file:
+            return cls(file.read())
+
+
+def play_headless(replay):
+    """
+    Play a replay on a bare engine, as fast as possible.
+
+    The board is set up the way Board.new_game does it, and the actions are applied the way the Cell methods
+    apply them.
+
+    Parameters:
+    - replay (Replay): The replay to play.
+
+    Returns:
+    - tuple: The outcome in the layout of the replay footer.
+    """
+
+    engine = Engine(replay.rows, replay.cols, replay.mines, seed=replay.seed)
+    if replay.dealt is not None:
+        safe_tile, layout = replay.dealt
+        engine.place_mines(layout)
+    else:
+        safe_tile = (engine.random.randrange(replay.rows), engine.random.randrange(replay.cols))
+        engine.generate_mines(safe_tile)
+
+    answers = {}
+    puzzles_solved = correct_puzzles_solved = 0
+    for _, action, index, answer in replay.events:
+        if engine.status != IN_PROGRESS and action != ANSWER:
+            continue
+        if action == REVEAL:
+            engine.reveal(*engine.position(index))
+        elif action == FLAG:
+            engine.flag(*engine.position(index))
+        elif action == MARK:
+            engine.mark(*engine.position(index))
+        elif action == ANSWER:
+            previous = answers.get(index, 0)
+            if previous == 0:
+                puzzles_solved += 1
+            elif previous == engine.neighbor_mine_count[index]:
+                correct_puzzles_solved -= 1
+            if answer == engine.neighbor_mine_count[index]:
+                correct_puzzles_solved += 1
+            answers[index] = answer
+
+    timer_value = replay.outcome[1] if replay.outcome is not None else 0
+    return (engine.status, timer_value, engine.safe_revealed, engine.flags_placed, puzzles_solved,
+            correct_puzzles_solved)
+
+
+def verify(replay):
+    """
+    Return whether playing a finished replay headlessly reproduces its recorded outcome.
+    """
+
+    return replay.outcome is not None and play_headless(replay) == replay.outcome
+
+
+def main():
+    """
+    Verify replay files from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Verify PySweeper replays by playing them headlessly.")
+    parser.add_argument("files", nargs="*", help="replay files (default: every replay in the replays directory)")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(REPLAY_DIRECTORY, "*.pysr")))
+    start = time.perf_counter()
+    failed = [filename for filename in files if not verify(Replay.load(filename))]
+    elapsed = time.perf_counter() - start
+
+    for filename in failed:
+        print(f"MISMATCH {filename}")
+    print(f"{len(files) - len(failed)} of {len(files)} replays verified in {elapsed:.2f} s.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+import struct
+import mmap
+import os
+
+from engine import count_neighbors, pack_bits, unpack_bits
+
+
+SAVE_DIRECTORY = "saves"
+AUTOSAVE_FILE = "saves/autosave.pysv"
+SAVE_MAGIC = b"PSSV"
+SAVE_VERSION = 2
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# Header: magic, version, difficulty, game state, rows, cols, mines, timer value, seed, safe tile, number of
+# puzzles, number of distinct puzzle texts.
+SAVE_HEADER = struct.Struct("<4sHBBIIIIQIIII")
+# One assigned puzzle: cell index, position of its text in the text table, the player's answer.
+SAVE_PUZZLE = struct.Struct("<IIB")
+SAVE_TEXT = struct.Struct("<I")
+
+# The layers stored as bitmaps, in file order, after the header. The neighbor counts are recomputed from the mines.
+LAYERS = ["has_mine", "is_revealed", "is_flagged", "is_marked"]
+
+
+def save_game(filename, engine, difficulty, game_is_on, timer_value, seed, safe_tile, puzzles):
+    """
+    Write the full state of a game atomically.
+
+    The file holds a fixed header, one bitmap per layer of LAYERS, the assigned puzzles and the table of their
+    texts; the neighbor counts follow from the mines and are not stored. Every section starts at an offset
+    computed from the header, so the file can be read through a memory map. It is first written to a temporary
+    file next to the target and then renamed over it, so an interrupted save never leaves a damaged file behind.
+
+    Parameters:
+    - filename (str): The path of the save file.
+    - engine (Engine): The engine of the game.
+    - difficulty (str): The difficulty level of the game.
+    - game_is_on (int): The state of the game: lost(0), ongoing(1) or won(2).
+    - timer_value (int): The seconds shown by the timer.
+    - seed (int): The seed of the game.
+    - safe_tile (tuple): The (row, col) coordinates of the safe tile.
+    - puzzles (dict): The puzzle text and the player's answer (0 if unanswered) of each cell with a puzzle,
+                      keyed by flat index.
+    """
+
+    texts = {}
+    entries = []
+    for index, (text, answer) in puzzles.items():
+        entries.append(SAVE_PUZZLE.pack(index, texts.setdefault(text, len(texts)), answer))
+    encoded = [text.encode() for text in texts]
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{filename}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, DIFFICULTIES.index(difficulty), game_is_on,
+                                    engine.rows, engine.cols, engine.mines, timer_value, seed, *safe_tile,
+                                    len(entries), len(encoded)))
+        for layer in LAYERS:
+            file.write(pack_bits(getattr(engine, layer)))
+        file.write(b"".join(entries))
+        for text in encoded:
+            file.write(SAVE_TEXT.pack(len(text)))
+            file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, filename)
+
+
+class SavedGame:
+
+    def __init__(self, filename):
+        """
+        Open a save file written by save_game through a memory map.
+
+        Only the header is decoded here, and checked against the size of the file and the mine layout; the
+        layers and puzzles are decoded when they are read.
+
+        Parameters:
+        - filename (str): The path of the save file.
+
+        Raises:
+        - OSError: If the file cannot be read.
+        - ValueError: If the file is empty, truncated, damaged or not a version SAVE_VERSION save file.
+        """
+
+        with open(filename, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.read_header(filename)
+        except (ValueError, struct.error) as error:
+            self.data.close()
+            raise ValueError(f"{filename} is not a valid save file: {error}") from None
+
+    def read_header(self, filename):
+        """
+        Decode and check the header of the file.
+        """
+
+        (magic, version, difficulty, self.game_is_on, self.rows, self.cols, self.mines, self.timer_value,
+         self.seed, safe_row, safe_col, self.puzzle_count, self.text_count) = SAVE_HEADER.unpack_from(self.data, 0)
+        if magic != SAVE_MAGIC or version != SAVE_VERSION:
+            raise ValueError(f"it is not a version {SAVE_VERSION} save file.")
+        if difficulty >= len(DIFFICULTIES) or not (0 <= safe_row < self.rows and 0 <= safe_col < self.cols):
+            raise ValueError("the header is damaged.")
+
+        self.difficulty = DIFFICULTIES[difficulty]
+        self.safe_tile = (safe_row, safe_col)
+        self.cell_count = self.rows * self.cols
+        self.bitmap_size = (self.cell_count + 7) // 8
+        self.puzzles_offset = SAVE_HEADER.size + len(LAYERS) * self.bitmap_size
+        if len(self.data) < self.puzzles_offset + self.puzzle_count * SAVE_PUZZLE.size:
+            raise ValueError("the file is truncated.")
+        mines = int.from_bytes(self.data[SAVE_HEADER.size:SAVE_HEADER.size + self.bitmap_size], "little")
+        if bin(mines).count("1") != self.mines or mines >> self.cell_count:
+            raise ValueError("the mine layout is damaged.")
+
+    def layer(self, name):
+        """
+        Return one layer of LAYERS as a bytearray with one 0/1 value per cell.
+        """
+
+        start = SAVE_HEADER.size + LAYERS.index(name) * self.bitmap_size
+        return unpack_bits(self.data[start:start + self.bitmap_size], self.cell_count)
+
+    def neighbor_counts(self):
+        """
+        Return the neighbor mine counts as a bytearray with one value per cell, computed from the mines.
+        """
+
+        return count_neighbors(self.layer("has_mine"), self.rows, self.cols)
+
+    def puzzles(self):
+        """
+        Return the puzzle text and the player's answer of each cell with a puzzle, keyed by flat index.
+
+        Raises:
+        - ValueError: If the puzzles or their texts are damaged.
+        """
+
+        end = self.puzzles_offset + self.puzzle_count * SAVE_PUZZLE.size
+        position = end
+        texts = []
+        try:
+            for _ in range(self.text_count):
+                length, = SAVE_TEXT.unpack_from(self.data, position)
+                position += SAVE_TEXT.size
+                if position + length > len(self.data):
+                    raise ValueError("A puzzle text is truncated.")
+                texts.append(self.data[position:position + length].decode())
+                position += length
+        except struct.error:
+            raise ValueError("The puzzle texts are truncated.") from None
+
+        puzzles = {}
+        for index, text, answer in SAVE_PUZZLE.iter_unpack(self.data[self.puzzles_offset:end]):
+            if index >= self.cell_count or text >= len(texts):
+                raise ValueError("A puzzle is damaged.")
+            puzzles[index] = (texts[text], answer)
+        return puzzles
+
+    def restore(self, engine):
+        """
+        Load the saved layers and counts into an engine of the same size, and rebuild its counters.
+
+        Parameters:
+        - engine (Engine): The engine to restore into.
+        """
+
+        if (engine.rows, engine.cols, engine.mines) != (self.rows, self.cols, self.mines):
+            raise ValueError("The engine does not match the size of the saved game.")
+
+        for layer in LAYERS:
+            setattr(engine, layer, self.layer(layer))
+        engine.neighbor_mine_count = self.neighbor_counts()
+
+        start = SAVE_HEADER.size
+        mines = int.from_bytes(self.data[start:start + self.bitmap_size], "little")
+        revealed = int.from_bytes(self.data[start + self.bitmap_size:start + 2 * self.bitmap_size], "little")
+        exploded = bin(revealed & mines).count("1")
+        engine.exploded = exploded > 0
+        engine.safe_revealed = engine.is_revealed.count(1) - exploded
+        engine.flags_placed = engine.is_flagged.count(1)
+
+    def close(self):
+        """
+        Release the memory map.
+        """
+
+        self.data.close()
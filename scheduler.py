@@ -0,0 +1,248 @@
+import itertools
+import heapq
+import time
+
+
+# Frames run every FRAME_INTERVAL milliseconds while work is pending, and each spends at most FRAME_BUDGET
+# seconds on it; work left over waits for the next frame.
+FRAME_INTERVAL = 16
+FRAME_BUDGET = 0.008
+
+# Priorities, from the first to run in a frame to the last.
+PRIORITY_SOUND = 0
+PRIORITY_RENDER = 1
+PRIORITY_LABEL = 2
+PRIORITY_ANIMATION = 3
+PRIORITY_BACKGROUND = 4
+
+
+class FrameScheduler:
+
+    def __init__(self, widget, interval=FRAME_INTERVAL, budget=FRAME_BUDGET):
+        """
+        Initialize a scheduler that runs deferred UI work in frames on the Tk event loop.
+
+        Work is queued with call() and runs at its due time on the monotonic clock, in priority order within
+        a frame. Work queued under a key that is already pending replaces it instead of being queued again, so
+        repeated requests for the same redraw or sound are coalesced into one per frame. Only one Tk timer is
+        pending at any time, and none while the queue is empty.
+
+        Parameters:
+        - widget (tk.Misc): The widget whose event loop runs the frames.
+        - interval (int, optional): The milliseconds between frames while work is ready.
+        - budget (float, optional): The seconds of work per frame. At least one task runs in every frame.
+        """
+
+        self.widget = widget
+        self.interval = interval
+        self.budget = budget
+        self.sequence = itertools.count()
+        self.tasks = {}
+        self.keys = {}
+        self.waiting = []
+        self.ready = []
+        self.frame_id = None
+        self.frame_due = None
+        self.deadline = None
+
+    def __len__(self):
+        """
+        Return the number of pending tasks.
+        """
+
+        return len(self.tasks)
+
+    def call(self, callback, *args, priority=PRIORITY_ANIMATION, delay=0, key=None, group=None):
+        """
+        Queue a callback to run in the first frame after a delay.
+
+        Work queued while a frame is running runs in a later frame, so a task that queues itself again runs
+        once per frame.
+
+        Parameters:
+        - callback (callable): The function to call.
+        - *args: The arguments of the call.
+        - priority (int, optional): One of the PRIORITY constants; lower values run first.
+        - delay (float, optional): The seconds to wait before the callback is due.
+        - key (hashable, optional): If a task with this key is pending, its call is replaced by this one and
+                                    keeps its place in the queue.
+        - group (TaskGroup, optional): The group the task belongs to, for clear().
+
+        Returns:
+        - int: A handle for cancel().
+        """
+
+        if key is not None and key in self.keys:
+            handle = self.keys[key]
+            self.tasks[handle] = (callback, args, key, group)
+            return handle
+
+        handle = next(self.sequence)
+        self.tasks[handle] = (callback, args, key, group)
+        if key is not None:
+            self.keys[key] = handle
+        due = time.monotonic() + delay
+        heapq.heappush(self.waiting, (due, priority, handle))
+        if self.deadline is None:
+            self.wake(due)
+        return handle
+
+    def cancel(self, handle):
+        """
+        Drop a pending task, given its handle or its key. Unknown or finished tasks are ignored.
+        """
+
+        if handle in self.keys:
+            handle = self.keys[handle]
+        task = self.tasks.pop(handle, None)
+        if task is not None and task[2] is not None:
+            del self.keys[task[2]]
+
+    def is_pending(self, key):
+        """
+        Return whether a task with a key is waiting to run.
+        """
+
+        return key in self.keys
+
+    def clear(self, group=None):
+        """
+        Drop every pending task and stop the frames, or only drop the tasks of one group.
+        """
+
+        if group is not None:
+            for handle, task in list(self.tasks.items()):
+                if task[3] is group:
+                    self.cancel(handle)
+            return
+
+        self.tasks.clear()
+        self.keys.clear()
+        self.waiting.clear()
+        self.ready.clear()
+        if self.frame_id is not None:
+            self.widget.after_cancel(self.frame_id)
+            self.frame_id = None
+            self.frame_due = None
+
+    def has_time(self):
+        """
+        Return whether the running frame still has some of its budget left.
+
+        Long tasks, such as drawing a large reveal, check this to split their work across frames.
+        """
+
+        return self.deadline is None or time.perf_counter() < self.deadline
+
+    def wake(self, due):
+        """
+        Make sure a frame runs by the time a task is due.
+
+        Work that is due now starts a frame as soon as the event loop is idle, so a click is answered without
+        waiting for the next interval.
+        """
+
+        if self.frame_due is not None and self.frame_due <= due:
+            return
+        if self.frame_id is not None:
+            self.widget.after_cancel(self.frame_id)
+        delay = due - time.monotonic()
+        self.frame_due = due
+        if delay <= 0:
+            self.frame_id = self.widget.after_idle(self.frame)
+        else:
+            self.frame_id = self.widget.after(max(1, round(delay * 1000)), self.frame)
+
+    def frame(self):
+        """
+        Run the due tasks in priority order within the frame budget, then schedule the next frame.
+        """
+
+        self.frame_id = None
+        self.frame_due = None
+        now = time.monotonic()
+        while self.waiting and self.waiting[0][0] <= now:
+            _, priority, handle = heapq.heappop(self.waiting)
+            if handle in self.tasks:
+                heapq.heappush(self.ready, (priority, handle))
+
+        self.deadline = time.perf_counter() + self.budget
+        try:
+            while self.ready:
+                _, handle = heapq.heappop(self.ready)
+                task = self.tasks.pop(handle, None)
+                if task is None:
+                    continue
+                callback, args, key, _ = task
+                if key is not None:
+                    del self.keys[key]
+                callback(*args)
+                if time.perf_counter() >= self.deadline:
+                    break
+        finally:
+            self.deadline = None
+            while self.waiting and self.waiting[0][2] not in self.tasks:
+                heapq.heappop(self.waiting)
+            if self.ready:
+                self.wake(time.monotonic() + self.interval / 1000)
+            elif self.waiting:
+                self.wake(max(self.waiting[0][0], time.monotonic() + self.interval / 1000))
+
+
+class TaskGroup:
+
+    def __init__(self, scheduler):
+        """
+        Initialize a view of a shared scheduler for one of its users, such as one board among several.
+
+        The group has the interface of FrameScheduler. Its keys are private to it, and clear() only drops its
+        own tasks, so users sharing the scheduler cannot cancel each other's work.
+
+        Parameters:
+        - scheduler (FrameScheduler): The scheduler that runs the tasks.
+        """
+
+        self.scheduler = scheduler
+
+    def __len__(self):
+        """
+        Return the number of pending tasks of the group.
+        """
+
+        return sum(task[3] is self for task in self.scheduler.tasks.values())
+
+    def call(self, callback, *args, priority=PRIORITY_ANIMATION, delay=0, key=None):
+        """
+        Queue a callback in the shared scheduler, as FrameScheduler.call does.
+        """
+
+        return self.scheduler.call(callback, *args, priority=priority, delay=delay,
+                                   key=None if key is None else (self, key), group=self)
+
+    def cancel(self, handle):
+        """
+        Drop a pending task of the group, given its handle or its key.
+        """
+
+        self.scheduler.cancel(handle if isinstance(handle, int) else (self, handle))
+
+    def is_pending(self, key):
+        """
+        Return whether a task of the group with a key is waiting to run.
+        """
+
+        return (self, key) in self.scheduler.keys
+
+    def clear(self):
+        """
+        Drop every pending task of the group.
+        """
+
+        self.scheduler.clear(group=self)
+
+    def has_time(self):
+        """
+        Return whether the running frame still has some of its budget left.
+        """
+
+        return self.scheduler.has_time()
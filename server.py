@@ -0,0 +1,472 @@
+import itertools
+import argparse
+import asyncio
+import struct
+import json
+import time
+
+from engine import Engine, IN_PROGRESS, WON, MAX_SEED, mines_for_grid, square_grid_size
+from replay import REVEAL, FLAG, MARK
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_CELLS = 1 << 20
+MAX_PLAYERS = 8
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# The longest message a client may send; a longer frame closes the connection before its payload is read.
+MAX_MESSAGE = 1 << 16
+
+# A client whose unsent data grows beyond MAX_BUFFER bytes cannot keep up with its game and is disconnected,
+# so one slow spectator never holds up the players.
+MAX_BUFFER = 1 << 20
+
+# Every message is a FRAME header (message type, payload length) followed by its payload.
+FRAME = struct.Struct("<BI")
+# Action payload: action, cell index.
+ACTION = struct.Struct("<BI")
+# Delta payload: player, game status and number of cells, then one DELTA_CELL (index, value) per changed cell.
+DELTA = struct.Struct("<BBI")
+DELTA_CELL = struct.Struct("<IB")
+
+# Message types.
+CONTROL = 0
+ACTION_MESSAGE = 1
+DELTA_MESSAGE = 2
+
+# Cell values in deltas. Values 0 to 8 are the neighbor count of a revealed cell.
+REVEALED_MINE = 9
+HIDDEN = 10
+FLAGGED = 11
+MARKED = 12
+MINE = 13
+
+
+def encode(kind, payload):
+    """
+    Return a message of the given type with its frame header.
+    """
+
+    return FRAME.pack(kind, len(payload)) + payload
+
+
+def encode_control(message):
+    """
+    Return a control message, a JSON object such as {"op": "join", "game": 3}.
+    """
+
+    return encode(CONTROL, json.dumps(message).encode())
+
+
+def encode_action(action, index):
+    """
+    Return an action message: replay.REVEAL, FLAG or MARK on a cell.
+    """
+
+    return encode(ACTION_MESSAGE, ACTION.pack(action, index))
+
+
+def encode_delta(player, status, cells):
+    """
+    Return a delta message listing the (index, value) of the cells a move changed on a player's board.
+    """
+
+    return encode(DELTA_MESSAGE, DELTA.pack(player, status, len(cells))
+                  + b"".join(DELTA_CELL.pack(index, value) for index, value in cells))
+
+
+def decode(kind, payload):
+    """
+    Decode a control or delta message received by a client into a dictionary with an "op" key.
+    """
+
+    if kind == CONTROL:
+        return json.loads(payload)
+    player, status, count = DELTA.unpack_from(payload, 0)
+    return {"op": "delta", "player": player, "status": status,
+            "cells": list(DELTA_CELL.iter_unpack(payload[DELTA.size:DELTA.size + count * DELTA_CELL.size]))}
+
+
+def cell_value(engine, index):
+    """
+    Return the delta value of a cell, as its player sees it.
+    """
+
+    if engine.is_revealed[index]:
+        return REVEALED_MINE if engine.has_mine[index] else engine.neighbor_mine_count[index]
+    if engine.is_flagged[index]:
+        return FLAGGED
+    if engine.is_marked[index]:
+        return MARKED
+    return HIDDEN
+
+
+def is_integer(value):
+    """
+    Return whether a decoded JSON value is an integer, which excludes true and false.
+    """
+
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+async def read_message(reader, max_length=MAX_MESSAGE):
+    """
+    Read one message from a stream.
+
+    Parameters:
+    - reader (asyncio.StreamReader): The stream.
+    - max_length (int, optional): The longest payload accepted.
+
+    Returns:
+    - tuple or None: The (message type, payload), or None at the end of the stream.
+
+    Raises:
+    - ValueError: If the frame announces a payload longer than max_length.
+    """
+
+    try:
+        header = await reader.readexactly(FRAME.size)
+    except asyncio.IncompleteReadError:
+        return None
+    kind, length = FRAME.unpack(header)
+    if length > max_length:
+        raise ValueError(f"A message of {length} bytes is too long.")
+    return kind, await reader.readexactly(length)
+
+
+class ServerGame:
+
+    def __init__(self, number, rows, cols, mines, seed, difficulty, players):
+        """
+        Initialize a hosted game with one board per player, all dealt from the same seed.
+
+        Each board is set up the way Board.new_game does it, so a race is played on identical boards. Neither
+        the mines nor the seed they follow from leave the server until a board is finished: clients only get
+        the safe tile and the deltas of their moves.
+
+        Parameters:
+        - number (int): The number of the game on the server.
+        - rows (int): The number of rows on the board.
+        - cols (int): The number of columns on the board.
+        - mines (int): The number of mines.
+        - seed (int): The seed of every board.
+        - difficulty (str): The difficulty level, passed on to the clients for their puzzles.
+        - players (int): The number of players; the game starts once they have all joined.
+        """
+
+        self.number = number
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed
+        self.difficulty = difficulty
+        self.players = players
+        self.engines = []
+        self.connections = []
+        self.spectators = set()
+        self.started = None
+        self.finished = {}
+        self.decided = False
+
+        engine = Engine(rows, cols, mines, seed=seed)
+        self.safe_tile = (engine.random.randrange(rows), engine.random.randrange(cols))
+
+    def info(self, player=None):
+        """
+        Return the description of the game sent to a joining player or spectator.
+        """
+
+        return {"game": self.number, "player": player, "rows": self.rows, "cols": self.cols, "mines": self.mines,
+                "difficulty": self.difficulty, "safe_tile": self.safe_tile,
+                "players": self.players, "joined": len(self.engines), "started": self.started is not None}
+
+    def add_player(self, writer):
+        """
+        Deal a board for a new player and return the player's number.
+        """
+
+        engine = Engine(self.rows, self.cols, self.mines, seed=self.seed)
+        safe_tile = (engine.random.randrange(self.rows), engine.random.randrange(self.cols))
+        engine.generate_mines(safe_tile)
+        self.engines.append(engine)
+        self.connections.append(writer)
+        return len(self.engines) - 1
+
+    def snapshot(self, player):
+        """
+        Return every cell of a player's board that is not hidden, for a spectator joining late.
+        """
+
+        engine = self.engines[player]
+        cells = [(index, value) for index in range(engine.cell_count)
+                 if (value := cell_value(engine, index)) != HIDDEN]
+        return cells + self.shown_mines(engine)
+
+    def shown_mines(self, engine):
+        """
+        Return the unrevealed mines of a finished board, which its player may now see.
+        """
+
+        if engine.status == IN_PROGRESS:
+            return []
+        return [(index, MINE) for index, has_mine in enumerate(engine.has_mine)
+                if has_mine and not engine.is_revealed[index]]
+
+    def apply(self, player, action, index):
+        """
+        Apply an action to a player's board and return the cells it changed, as (index, value) pairs.
+
+        When the action ends the game of that player, the remaining mines are added to the cells.
+        """
+
+        engine = self.engines[player]
+        if engine.status != IN_PROGRESS or not 0 <= index < engine.cell_count:
+            return []
+
+        row, col = engine.position(index)
+        if action == REVEAL:
+            changed = engine.reveal(row, col)
+        elif action == FLAG:
+            changed = [index] if engine.flag(row, col) else []
+        elif action == MARK:
+            changed = [index] if engine.mark(row, col) else []
+        else:
+            changed = []
+        return [(cell, cell_value(engine, cell)) for cell in changed] + self.shown_mines(engine)
+
+
+class GameServer:
+
+    def __init__(self):
+        """
+        Initialize a server hosting any number of games, each with its players and spectators.
+
+        Every connection is served by its own coroutine, and all game state is only touched from the event
+        loop, so no locks are needed. Moves are applied on the server and answered with deltas: the cells a
+        move changed, rather than the whole board.
+        """
+
+        self.games = {}
+        self.numbers = itertools.count(1)
+
+    def send(self, writer, data):
+        """
+        Queue data for a client without waiting for it, disconnecting the client if it has fallen too far behind.
+        """
+
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            writer.close()
+            return
+        writer.write(data)
+
+    def broadcast(self, game, data):
+        """
+        Send data to every player and spectator of a game.
+        """
+
+        for writer in game.connections:
+            if writer is not None:
+                self.send(writer, data)
+        for writer in list(game.spectators):
+            self.send(writer, data)
+
+    async def handle(self, reader, writer):
+        """
+        Serve one connection until it closes.
+        """
+
+        game = player = None
+        try:
+            while (message := await read_message(reader)) is not None:
+                kind, payload = message
+                if kind == CONTROL:
+                    game, player = self.control(json.loads(payload), writer, game, player)
+                elif kind == ACTION_MESSAGE and game is not None and player is not None:
+                    self.action(game, player, *ACTION.unpack(payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, struct.error):
+            pass
+        finally:
+            self.leave(game, player, writer)
+            writer.close()
+
+    def control(self, message, writer, game, player):
+        """
+        Handle a control message and return the game and player number of the connection afterwards.
+
+        Operations:
+        - create: start a game, with a square "grid", "difficulty" and optionally "density", "seed" and
+                  "players", and join it as its first player.
+        - join: join the game numbered "game" as its next player.
+        - spectate: follow the game numbered "game"; the boards of its players are sent as they are so far.
+        - list: return the games waiting for players.
+
+        Malformed messages are answered with an error message and leave the connection as it was.
+        """
+
+        if not isinstance(message, dict):
+            self.send(writer, encode_control({"op": "error", "message": "A control message must be an object."}))
+            return game, player
+
+        op = message.get("op")
+        if op == "list":
+            self.send(writer, encode_control({"op": "games", "games": [
+                found.info() for found in self.games.values() if len(found.engines) < found.players]}))
+            return game, player
+        if game is not None:
+            self.send(writer, encode_control({"op": "error", "message": "Already in a game."}))
+            return game, player
+
+        if op == "create":
+            try:
+                game = self.create(message)
+            except ValueError as error:
+                self.send(writer, encode_control({"op": "error", "message": str(error)}))
+                return None, None
+            self.games[game.number] = game
+            return game, self.join(game, writer)
+
+        if op not in ("join", "spectate"):
+            self.send(writer, encode_control({"op": "error", "message": f"Unknown operation {op!r}."}))
+            return game, player
+        number = message.get("game")
+        found = self.games.get(number) if is_integer(number) else None
+        if found is None:
+            self.send(writer, encode_control({"op": "error", "message": "There is no such game."}))
+        elif op == "join":
+            if len(found.engines) >= found.players:
+                self.send(writer, encode_control({"op": "error", "message": "The game is full."}))
+            else:
+                return found, self.join(found, writer)
+        elif op == "spectate":
+            found.spectators.add(writer)
+            self.send(writer, encode_control({"op": "spectating", **found.info()}))
+            for number, engine in enumerate(found.engines):
+                self.send(writer, encode_delta(number, engine.status, found.snapshot(number)))
+            return found, None
+        return game, player
+
+    def create(self, message):
+        """
+        Return a new game for a create message. Its board must be square, as a Board lays it out.
+
+        Raises:
+        - ValueError: If a field of the message has the wrong type or is out of range.
+        """
+
+        grid = message.get("grid", "16x16")
+        density = message.get("density")
+        players = message.get("players", 1)
+        seed = message.get("seed", time.time_ns() & MAX_SEED)
+        difficulty = message.get("difficulty", "easy")
+        if not isinstance(grid, str):
+            raise ValueError("The grid must be a string such as 16x16.")
+        if density is not None and (isinstance(density, bool) or not isinstance(density, (int, float))):
+            raise ValueError("The density must be a number.")
+        size = square_grid_size(grid, density)
+        if size * size > MAX_CELLS:
+            raise ValueError("The game is too large.")
+        if not is_integer(players) or not 1 <= players <= MAX_PLAYERS:
+            raise ValueError(f"The number of players must be between 1 and {MAX_PLAYERS}.")
+        if not is_integer(seed) or not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"The seed must be an integer between 0 and {MAX_SEED}.")
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"The difficulty must be one of {', '.join(DIFFICULTIES)}.")
+        return ServerGame(next(self.numbers), size, size, mines_for_grid(grid, density), seed, difficulty, players)
+
+    def join(self, game, writer):
+        """
+        Add a player to a game and start the game once every player has joined.
+        """
+
+        player = game.add_player(writer)
+        self.send(writer, encode_control({"op": "joined", **game.info(player)}))
+        self.broadcast(game, encode_control({"op": "player_joined", "player": player}))
+        if len(game.engines) == game.players:
+            game.started = time.monotonic()
+            self.broadcast(game, encode_control({"op": "start"}))
+        return player
+
+    def action(self, game, player, action, index):
+        """
+        Apply a player's action and send its delta to everyone in the game, then announce the end of the
+        player's game and the result of the race when they are decided.
+        """
+
+        if game.started is None:
+            self.send(game.connections[player], encode_control({"op": "error", "message": "Waiting for players."}))
+            return
+
+        cells = game.apply(player, action, index)
+        if not cells:
+            return
+        engine = game.engines[player]
+        self.broadcast(game, encode_delta(player, engine.status, cells))
+
+        if engine.status != IN_PROGRESS and player not in game.finished:
+            seconds = time.monotonic() - game.started
+            game.finished[player] = (engine.status, seconds)
+            self.broadcast(game, encode_control({"op": "finished", "player": player, "status": engine.status,
+                                                 "seconds": seconds}))
+            if not game.decided and (engine.status == WON or len(game.finished) == game.players):
+                game.decided = True
+                self.broadcast(game, encode_control({"op": "result",
+                                                     "winner": player if engine.status == WON else None}))
+
+    def leave(self, game, player, writer):
+        """
+        Remove a closed connection from its game, and the game from the server once nobody is left in it.
+        """
+
+        if game is None:
+            return
+        if player is not None:
+            game.connections[player] = None
+            self.broadcast(game, encode_control({"op": "player_left", "player": player}))
+        game.spectators.discard(writer)
+        if not game.spectators and all(connection is None for connection in game.connections):
+            self.games.pop(game.number, None)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    """
+    Run a game server until it is cancelled.
+
+    Parameters:
+    - host (str, optional): The address to listen on.
+    - port (int, optional): The TCP port to listen on.
+    - path (str, optional): A Unix socket to listen on instead of TCP.
+    """
+
+    game_server = GameServer()
+    if path is not None:
+        server = await asyncio.start_unix_server(game_server.handle, path)
+    else:
+        server = await asyncio.start_server(game_server.handle, host, port)
+    print(f"Serving PySweeper games on {path or f'{host}:{port}'}.")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """
+    Run the game server from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Host PySweeper games for players and spectators.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
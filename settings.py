@@ -1,21 +1,29 @@
 import tkinter as tk
 
+from assets import get_assets
 
-class Settings(tk.Tk):
 
-    def __init__(self):
-        super().__init__()
+class Settings(tk.Toplevel):
+
+    def __init__(self, master, difficulty="easy", grid="10x10"):
         """
-        Initialize the difficulty selection window.
+        Initialize the difficulty selection window on top of the root window, which stays hidden meanwhile.
+
+        Parameters:
+        - master (tk.Tk): The root window of the game.
+        - difficulty (str, optional): The difficulty level selected at first.
+        - grid (str, optional): The grid size selected at first.
         """
 
+        super().__init__(master)
+        self.chosen = False
         self.geometry(f"+{self.winfo_screenwidth() // 4}+{self.winfo_screenheight() // 8}")
         self.title("Choose Difficulty")
-        self.iconphoto(False, tk.PhotoImage(file="images/settings.png"))
+        self.iconphoto(False, get_assets(self).get("settings"))
         self.resizable(False, False)
 
-        self.difficulty_level = tk.StringVar(value="easy")
-        self.grid_size = tk.StringVar(value="10x10")
+        self.difficulty_level = tk.StringVar(self, value=difficulty)
+        self.grid_size = tk.StringVar(self, value=grid)
 
         self.easy_difficulty = tk.Radiobutton(self, text="Easy", variable=self.difficulty_level, value="easy",
                                               font=("Helvetica", 12), command=self.update_difficulty)
@@ -39,7 +47,7 @@ class Settings(tk.Tk):
         self.grid_16x16.grid(row=1, column=1, padx=10, pady=5)
         self.grid_20x20.grid(row=1, column=2, padx=10, pady=5)
 
-        self.ok_button = tk.Button(self, text="OK", font=("Helvetica", 12), command=self.quit)
+        self.ok_button = tk.Button(self, text="OK", font=("Helvetica", 12), command=self.choose)
         self.ok_button.grid(row=2, column=0, columnspan=3, pady=20)
 
     def update_difficulty(self):
@@ -56,11 +64,25 @@ class Settings(tk.Tk):
 
         return self.grid_size.get()
 
+    def choose(self):
+        """
+        Accept the selected difficulty and grid size and close the window.
+        """
+
+        self.chosen = True
+        self.destroy()
+
     def choose_difficulty_and_grid_size(self):
         """
         Display the difficulty and grid size selection window and return the chosen difficulty and grid size.
+
+        Returns:
+        - tuple or None: The (difficulty, grid) pair, or None if the window was closed without choosing.
         """
 
-        self.mainloop()
-        self.destroy()
+        self.ok_button.focus_set()
+        self.bind("<Return>", lambda event: self.choose())
+        self.wait_window()
+        if not self.chosen:
+            return None
         return self.difficulty_level.get(), self.grid_size.get()
@@ -0,0 +1,246 @@
+from multiprocessing import Pool
+import argparse
+import random
+import json
+import time
+import os
+
+from engine import Engine, IN_PROGRESS, WON, GRID_MINES, grid_dimensions, mines_for_grid
+from probability import MineProbabilities
+from solver import Solver
+
+
+DEFAULT_RESULTS = "simulation.jsonl"
+CHUNK_SIZE = 500
+
+
+class RandomClicker:
+
+    def __init__(self, engine, rng):
+        """
+        Initialize a strategy that reveals unrevealed cells at random.
+
+        Parameters:
+        - engine (Engine): The game to play.
+        - rng (random.Random): The random generator of the game.
+        """
+
+        self.engine = engine
+        self.random = rng
+
+    def update(self, revealed):
+        """
+        Take note of the cells revealed by the last move.
+        """
+
+    def guess(self):
+        """
+        Return a random unrevealed cell.
+        """
+
+        engine = self.engine
+        while True:
+            index = self.random.randrange(engine.cell_count)
+            if not engine.is_revealed[index]:
+                return index
+
+    def choose(self):
+        """
+        Return the flat index of the next cell to reveal.
+        """
+
+        return self.guess()
+
+
+class SolverStrategy(RandomClicker):
+
+    def __init__(self, engine, rng):
+        """
+        Initialize a strategy that reveals provably safe cells and guesses at random when there are none.
+
+        Parameters:
+        - engine (Engine): The game to play.
+        - rng (random.Random): The random generator of the game.
+        """
+
+        super().__init__(engine, rng)
+        self.solver = Solver(engine)
+
+    def update(self, revealed):
+        """
+        Add the cells revealed by the last move to the solver.
+        """
+
+        self.solver.update(revealed)
+
+    def guess(self):
+        """
+        Return a random unrevealed cell that is not a known mine.
+        """
+
+        while True:
+            index = super().guess()
+            if index not in self.solver.mines:
+                return index
+
+    def choose(self):
+        """
+        Return a provably safe cell, or a guess if there is none.
+        """
+
+        index = self.solver.next_safe()
+        return index if index is not None else self.guess()
+
+
+class ProbabilityStrategy(SolverStrategy):
+
+    def __init__(self, engine, rng):
+        """
+        Initialize a strategy that reveals provably safe cells and otherwise the cell least likely to be a mine.
+
+        Parameters:
+        - engine (Engine): The game to play.
+        - rng (random.Random): The random generator of the game.
+        """
+
+        super().__init__(engine, rng)
+        self.probabilities = MineProbabilities(self.solver, engine.mines)
+
+    def guess(self):
+        """
+        Return the unrevealed cell least likely to be a mine.
+        """
+
+        probabilities = self.probabilities.compute()
+        return min(probabilities, key=probabilities.get)
+
+
+STRATEGIES = {
+    "random": RandomClicker,
+    "solver": SolverStrategy,
+    "probability": ProbabilityStrategy,
+}
+
+
+def play(grid, mines, strategy, seed):
+    """
+    Play one game headlessly, starting like Board.new_game from a random safe tile.
+
+    Parameters:
+    - grid (str): The grid size, such as "16x16".
+    - mines (int): The number of mines.
+    - strategy (str): The name of the strategy in STRATEGIES.
+    - seed (str or int): Seed of the game; the same seed gives the same board for every strategy.
+
+    Returns:
+    - tuple: Whether the game was won, the number of moves after the first reveal, and the fraction of safe
+             cells revealed.
+    """
+
+    rows, cols = grid_dimensions(grid)
+    engine = Engine(rows, cols, mines, seed=seed)
+    safe_tile = (engine.random.randrange(rows), engine.random.randrange(cols))
+    engine.generate_mines(safe_tile)
+
+    player = STRATEGIES[strategy](engine, random.Random(f"{seed}:{strategy}"))
+    player.update(engine.reveal(*safe_tile))
+    moves = 0
+    while engine.status == IN_PROGRESS:
+        player.update(engine.reveal(*engine.position(player.choose())))
+        moves += 1
+    return engine.status == WON, moves, engine.safe_revealed / (engine.cell_count - mines)
+
+
+def play_chunk(task):
+    """
+    Play a chunk of games in a worker process and summarize them.
+
+    Game number n of a configuration is seeded with "<seed>:<grid>:<mines>:<n>", so results do not depend
+    on how the games are split between workers.
+
+    Parameters:
+    - task (tuple): The grid, mine count, strategy, base seed, first game number and number of games.
+
+    Returns:
+    - dict: The configuration and the totals of the chunk.
+    """
+
+    grid, mines, strategy, seed, first, count = task
+    start = time.perf_counter()
+    wins = moves = 0
+    cleared = 0.0
+    for game in range(first, first + count):
+        won, length, fraction = play(grid, mines, strategy, f"{seed}:{grid}:{mines}:{game}")
+        wins += won
+        moves += length
+        cleared += fraction
+    return {"grid": grid, "mines": mines, "strategy": strategy, "first": first, "games": count, "wins": wins,
+            "moves": moves, "cleared": cleared, "seconds": time.perf_counter() - start}
+
+
+def simulate(configurations, games, seed=0, workers=None, chunk_size=CHUNK_SIZE, output=DEFAULT_RESULTS):
+    """
+    Play games for every configuration across a process pool and stream the chunk results to a file.
+
+    Parameters:
+    - configurations (list): (grid, mines, strategy) tuples.
+    - games (int): The number of games per configuration.
+    - seed (int, optional): The base seed of every game.
+    - workers (int, optional): The number of worker processes. If None, all cores are used.
+    - chunk_size (int, optional): The number of games a worker plays per task.
+    - output (str, optional): The JSON lines file the chunk results are appended to.
+
+    Returns:
+    - dict: Totals per configuration, and the wall-clock time in seconds.
+    """
+
+    tasks = [(grid, mines, strategy, seed, first, min(chunk_size, games - first))
+             for grid, mines, strategy in configurations
+             for first in range(0, games, chunk_size)]
+
+    totals = {}
+    start = time.perf_counter()
+    with Pool(workers) as pool, open(output, "a") as file:
+        for result in pool.imap_unordered(play_chunk, tasks):
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            total = totals.setdefault((result["grid"], result["mines"], result["strategy"]),
+                                      {"games": 0, "wins": 0, "moves": 0, "cleared": 0.0})
+            for key in total:
+                total[key] += result[key]
+    return totals, time.perf_counter() - start
+
+
+def main():
+    """
+    Run a batch simulation from the command line and print a summary per configuration.
+    """
+
+    parser = argparse.ArgumentParser(description="Play PySweeper games headlessly to measure win rates.")
+    parser.add_argument("--grids", nargs="+", default=list(GRID_MINES), help="grid sizes such as 16x16")
+    parser.add_argument("--densities", nargs="+", type=float, default=[None],
+                        help="mine densities to try (default: the preset mine count of each grid)")
+    parser.add_argument("--strategies", nargs="+", default=["solver"], choices=list(STRATEGIES))
+    parser.add_argument("--games", type=int, default=10000, help="games per grid, density and strategy")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of the games")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="games per worker task")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="JSON lines file the results are appended to")
+    args = parser.parse_args()
+
+    configurations = [(grid, mines_for_grid(grid, density), strategy)
+                      for grid in args.grids for density in args.densities for strategy in args.strategies]
+    totals, elapsed = simulate(configurations, args.games, args.seed, args.workers, args.chunk_size, args.output)
+
+    print(f"{'grid':>8} {'mines':>6} {'strategy':>12} {'games':>9} {'win rate':>9} {'moves':>8} {'cleared':>8}")
+    for (grid, mines, strategy), total in sorted(totals.items()):
+        games = total["games"]
+        print(f"{grid:>8} {mines:>6} {strategy:>12} {games:>9} {total['wins'] / games:>9.2%} "
+              f"{total['moves'] / games:>8.1f} {total['cleared'] / games:>8.1%}")
+    played = sum(total["games"] for total in totals.values())
+    print(f"{played} games in {elapsed:.2f} s ({played / elapsed:.0f} games/s) "
+          f"using {args.workers or os.cpu_count()} workers. Results appended to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
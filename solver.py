@@ -0,0 +1,329 @@
+import itertools
+
+
+# States of a cell in Solver.known. Cells outside the grid count as known safe cells.
+UNKNOWN = 0
+SAFE = 1
+MINE = 2
+
+# Translation tables from bytes to 0/1 bitmap bytes: nonzero bytes, zero bytes (the unknown cells of Solver.known)
+# and the mines of Solver.known.
+NONZERO = bytes([0]) + bytes([1]) * 255
+ZERO = bytes([1]) + bytes(255)
+MINE_CELLS = bytes([0, 0, 1]) + bytes(253)
+
+
+def shifted_sum(bitmap, deltas):
+    """
+    Return, for a bitmap with one 0/1 byte per padded position, the number of set neighbors of every position.
+
+    Parameters:
+    - bitmap (int): The bitmap, as a little-endian integer.
+    - deltas (list): The offsets of the neighbors on the padded grid.
+
+    Returns:
+    - int: One byte per position holding its count; bytes beyond the grid may be set and must be masked off.
+    """
+
+    total = 0
+    for delta in deltas:
+        total += bitmap >> 8 * delta if delta > 0 else bitmap << -8 * delta
+    return total
+
+
+def shifted_union(bitmap, deltas):
+    """
+    Return, for a bitmap with one 0/1 byte per padded position, the bitmap of the positions next to a set one.
+    """
+
+    union = 0
+    for delta in deltas:
+        union |= bitmap >> 8 * delta if delta > 0 else bitmap << -8 * delta
+    return union
+
+
+def zero_bytes(value, size):
+    """
+    Return the 0/1 bitmap of the bytes of a little-endian integer that are zero, over size bytes.
+    """
+
+    return int.from_bytes(value.to_bytes(size, "little").translate(ZERO), "little")
+
+
+class Solver:
+
+    def __init__(self, engine):
+        """
+        Initialize a constraint-propagation solver for a game.
+
+        Every revealed cell with neighboring mines gives a constraint: among its unknown neighbors, exactly
+        `remaining` are mines. The unknown neighbors are kept as a small bitset relative to the constraint's
+        top-left neighbor, on a grid padded by one cell on each side, so that two nearby constraints can be
+        compared by shifting one mask onto the other.
+
+        The cells already revealed are added in one bulk pass, and only the constraints touched by new information
+        are re-examined, so after it each reveal costs time proportional to the cells it opened. self.safe holds the
+        flat indices of the unrevealed cells proven safe and self.mines those of the cells proven to be mines.
+
+        Parameters:
+        - engine (Engine): The game to reason about. Only revealed cells and their counts are used.
+        """
+
+        self.engine = engine
+        self.width = width = engine.cols + 2
+        self.offsets = [(-width - 1, 0), (-width, 1), (-width + 1, 2), (-1, width), (1, width + 2),
+                        (width - 1, 2 * width), (width, 2 * width + 1), (width + 1, 2 * width + 2)]
+        self.nearby = [row * width + col for row in range(-2, 3) for col in range(-2, 3) if row or col]
+        self.constraints = {}
+        self.pending = set()
+        self.known = bytearray([SAFE]) * (width * (engine.rows + 2))
+        for row in range(engine.rows):
+            self.known[(row + 1) * width + 1:(row + 1) * width + 1 + engine.cols] = bytes(engine.cols)
+        self.safe = set()
+        self.mines = set()
+
+        self.load()
+
+    def load(self):
+        """
+        Add every cell revealed so far, at once.
+
+        The single-point deductions are first applied to the whole board in waves of bitmap operations on big
+        integers, one byte per padded position: shifting a bitmap by each neighbor offset and adding the results
+        counts the unknown cells and the known mines around every cell, a numbered cell whose remaining count is 0
+        or equals its unknown neighbors settles them all, and each wave repeats this with the cells settled by the
+        previous one. Only then are the constraints that are left built, their masks looked up from a byte whose
+        bits tell which neighbors are unknown, and handed to propagate() for the subset deductions.
+        """
+
+        engine = self.engine
+        known = self.known
+        width = self.width
+        cols = engine.cols
+        size = len(known)
+        opened = int.from_bytes(engine.is_revealed, "little") & ~int.from_bytes(engine.has_mine, "little")
+        if not opened:
+            return
+        opened = opened.to_bytes(engine.cell_count, "little")
+        counts = bytearray(size)
+        for row in range(engine.rows):
+            start = (row + 1) * width + 1
+            known[start:start + cols] = opened[row * cols:(row + 1) * cols]
+            counts[start:start + cols] = engine.neighbor_mine_count[row * cols:(row + 1) * cols]
+
+        deltas = [delta for delta, _ in self.offsets]
+        numbered = (int.from_bytes(known, "little") & int.from_bytes(counts.translate(NONZERO), "little")) * 255
+        counts = int.from_bytes(counts, "little") & numbered
+        loaded = bytes(known)
+        while True:
+            unknown = int.from_bytes(known.translate(ZERO), "little")
+            mines = int.from_bytes(known.translate(MINE_CELLS), "little")
+            around = shifted_sum(unknown, deltas) & numbered
+            remaining = counts - (shifted_sum(mines, deltas) & numbered)
+            undecided = int.from_bytes(around.to_bytes(size, "little").translate(NONZERO), "little")
+            full = undecided & zero_bytes(around ^ remaining, size)
+            empty = undecided & zero_bytes(remaining, size)
+            if not full and not empty:
+                break
+            new_mines = unknown & shifted_union(full, deltas)
+            new_safe = unknown & shifted_union(empty, deltas)
+            known[:] = (int.from_bytes(known, "little") + new_mines * MINE + new_safe * SAFE).to_bytes(size, "little")
+
+        changed = (int.from_bytes(known, "little") ^ int.from_bytes(loaded, "little")).to_bytes(size, "little")
+        for position in itertools.compress(range(size), changed):
+            (self.mines if known[position] == MINE else self.safe).add(self.flat(position))
+
+        codes = 0
+        for bit, delta in enumerate(deltas):
+            codes |= (unknown >> 8 * delta if delta > 0 else unknown << -8 * delta) << bit
+        codes = (codes & numbered).to_bytes(size, "little")
+        remaining = remaining.to_bytes(size, "little")
+        masks = [0] * 256
+        for code in range(1, 256):
+            low = (code & -code).bit_length() - 1
+            masks[code] = masks[code & (code - 1)] | 1 << self.offsets[low][1]
+        corner = width + 1
+        constraints = self.constraints
+        for position in itertools.compress(range(size), codes):
+            constraints[position] = [position - corner, masks[codes[position]], remaining[position]]
+        self.pending.update(constraints)
+        self.propagate()
+
+    def flat(self, position):
+        """
+        Return the flat index of a cell from its position on the padded grid.
+        """
+
+        row, col = divmod(position, self.width)
+        return (row - 1) * self.engine.cols + col - 1
+
+    def update(self, indices):
+        """
+        Add newly revealed cells and propagate every deduction that follows.
+
+        Parameters:
+        - indices (iterable): The flat indices of the cells revealed since the last update.
+        """
+
+        engine = self.engine
+        known = self.known
+        width = self.width
+        cols = engine.cols
+        added = []
+        for index in indices:
+            row, col = divmod(index, cols)
+            position = (row + 1) * width + col + 1
+            if engine.has_mine[index]:
+                continue
+            if known[position]:
+                if index not in self.safe:
+                    continue
+                self.safe.discard(index)
+            else:
+                known[position] = SAFE
+                if self.constraints:
+                    self.forget(position, mine=False)
+            if engine.neighbor_mine_count[index]:
+                added.append((position, engine.neighbor_mine_count[index]))
+
+        self.constrain(added)
+        self.propagate()
+
+    def constrain(self, added):
+        """
+        Add the constraints of newly revealed numbered cells that still have unknown neighbors.
+
+        Parameters:
+        - added (iterable): Pairs (position, count) of a cell's padded position and its neighbor mine count.
+        """
+
+        known = self.known
+        for position, remaining in added:
+            mask = 0
+            for delta, bit in self.offsets:
+                neighbor = position + delta
+                if not known[neighbor]:
+                    mask |= 1 << bit
+                elif known[neighbor] == MINE:
+                    remaining -= 1
+            if mask:
+                self.constraints[position] = [position - self.width - 1, mask, remaining]
+                self.pending.add(position)
+
+    def forget(self, position, mine):
+        """
+        Remove a newly known cell from the constraints around it.
+
+        Parameters:
+        - position (int): The position of the cell on the padded grid.
+        - mine (bool): Whether the cell is a mine.
+        """
+
+        constraints = self.constraints
+        for delta, _ in self.offsets:
+            constraint = constraints.get(position + delta)
+            if constraint is not None:
+                constraint[1] &= ~(1 << (position - constraint[0]))
+                constraint[2] -= mine
+                if constraint[1]:
+                    self.pending.add(position + delta)
+                else:
+                    del constraints[position + delta]
+
+    def propagate(self):
+        """
+        Apply single-point and subset deductions until no pending constraint yields anything new.
+
+        Single-point deductions are cheap, so every pending constraint is tried with them first; the ones they
+        leave undecided are only compared with their neighbors once no pending constraint is left, since many of
+        them are narrowed or resolved by their neighbors' deductions in the meantime.
+        """
+
+        constraints = self.constraints
+        pending = self.pending
+        undecided = set()
+        while pending or undecided:
+            while pending:
+                position = pending.pop()
+                constraint = constraints.get(position)
+                if constraint is None:
+                    continue
+                base, mask, remaining = constraint
+                if remaining == 0 or remaining == bin(mask).count("1"):
+                    undecided.discard(position)
+                    self.deduce(base, mask, remaining > 0)
+                else:
+                    undecided.add(position)
+
+            while undecided and not pending:
+                position = undecided.pop()
+                constraint = constraints.get(position)
+                if constraint is None:
+                    continue
+                for delta in self.nearby:
+                    other = constraints.get(position + delta)
+                    if other is not None:
+                        self.compare(constraint, other)
+                        self.compare(other, constraint)
+
+    def compare(self, outer, inner):
+        """
+        If the unknown cells of inner are a subset of those of outer, deduce the cells only outer contains.
+
+        Parameters:
+        - outer (list): A constraint [base, mask, remaining].
+        - inner (list): Another constraint [base, mask, remaining].
+        """
+
+        shift = inner[0] - outer[0]
+        if shift >= 0:
+            inner_mask = inner[1] << shift
+        elif inner[1] & ((1 << -shift) - 1):
+            return
+        else:
+            inner_mask = inner[1] >> -shift
+        if inner_mask & ~outer[1] or inner_mask == outer[1]:
+            return
+
+        difference = outer[1] & ~inner_mask
+        remaining = outer[2] - inner[2]
+        if remaining == 0 or remaining == bin(difference).count("1"):
+            self.deduce(outer[0], difference, remaining > 0)
+
+    def deduce(self, base, mask, mine):
+        """
+        Mark every cell of a mask as a mine or as safe, and remove them from the constraints around them.
+
+        Parameters:
+        - base (int): The padded position that bit 0 of the mask stands for.
+        - mask (int): The cells to mark.
+        - mine (bool): Whether the cells are mines.
+        """
+
+        known = self.known
+        width = self.width
+        cols = self.engine.cols
+        is_revealed = self.engine.is_revealed
+        state, found = (MINE, self.mines) if mine else (SAFE, self.safe)
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            position = base + low.bit_length() - 1
+            if known[position]:
+                continue
+            known[position] = state
+            row, col = divmod(position, width)
+            index = (row - 1) * cols + col - 1
+            if mine or not is_revealed[index]:
+                found.add(index)
+            self.forget(position, mine)
+
+    def next_safe(self):
+        """
+        Return a provably safe unrevealed cell, or None if there is none.
+        """
+
+        for index in self.safe:
+            if not self.engine.is_revealed[index]:
+                return index
+        return None
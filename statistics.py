@@ -1,33 +1,138 @@
-from tkinter import messagebox
-import tkinter.ttk as ttk
 import tkinter as tk
+import threading
+import sqlite3
+import queue
+import time
 import json
+import os
+
+from assets import get_assets
+
+
+DATABASE_FILE = "statistics/statistics.db"
+LEGACY_FILE = "statistics/statistics.json"
+GRIDS = ["10x10", "16x16", "20x20"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+# The write-ahead log of the database is checkpointed and truncated after this many recorded games.
+CHECKPOINT_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    grid TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    win INTEGER NOT NULL,
+    time_taken INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    grid TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    total_games_played INTEGER NOT NULL,
+    total_wins INTEGER NOT NULL,
+    total_losses INTEGER NOT NULL,
+    best_time INTEGER NOT NULL,
+    total_time INTEGER NOT NULL,
+    PRIMARY KEY (grid, difficulty)
+);
+"""
+
+
+def empty_entry():
+    """
+    Return the aggregates of a grid and difficulty with no games played.
+    """
+
+    return {
+        "total_games_played": 0,
+        "total_wins": 0,
+        "total_losses": 0,
+        "best_time": 9999,
+        "total_time": 0
+    }
+
+
+def win_loss_ratio(entry):
+    """
+    Format the percentage of games won for display.
+
+    Parameters:
+    - entry (dict): The aggregates of a grid and difficulty.
+    """
+
+    if entry["total_games_played"] == 0:
+        return "0%"
+    return f"{entry['total_wins'] / entry['total_games_played'] * 100:.2f}%"
 
 
 class Statistics:
-    def __init__(self):
+    def __init__(self, filename=DATABASE_FILE):
         """
         Initialize the Statistics object.
+
+        Every finished game is appended as one row to an SQLite database, next to a table of per grid and
+        difficulty aggregates. self.statistics is the in-memory view of those aggregates: recording a game
+        only updates it and queues the rows, and a background thread writes them in transactions.
+
+        Parameters:
+        - filename (str, optional): The path to the SQLite database.
         """
 
-        self.filename = "statistics/statistics.json"
+        self.filename = filename
+        self.queue = queue.Queue()
+        self.writer = None
+        self.error = None
         self.statistics = self.load_statistics()
 
+    def connect(self):
+        """
+        Open a connection to the database, creating its tables if needed.
+        """
+
+        connection = sqlite3.connect(self.filename)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
     def load_statistics(self):
         """
-        Load statistics from a JSON file.
+        Load the aggregates from the database.
+
+        A database without aggregates is seeded once from the legacy statistics.json file, if there is one.
         """
 
-        with open(self.filename, "r") as file:
-            return json.load(file)
+        statistics = {grid: {difficulty: empty_entry() for difficulty in DIFFICULTIES} for grid in GRIDS}
+
+        connection = self.connect()
+        try:
+            rows = connection.execute("SELECT * FROM aggregates").fetchall()
+            if not rows and os.path.exists(LEGACY_FILE):
+                with open(LEGACY_FILE, "r") as file:
+                    legacy = json.load(file)
+                with connection:
+                    for grid, difficulties in legacy.items():
+                        for difficulty, stats in difficulties.items():
+                            entry = empty_entry()
+                            for key in ("total_games_played", "total_wins", "total_losses", "best_time"):
+                                entry[key] = stats[key]
+                            connection.execute("INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                               (grid, difficulty, *entry.values()))
+                rows = connection.execute("SELECT * FROM aggregates").fetchall()
+        finally:
+            connection.close()
+
+        for grid, difficulty, *values in rows:
+            statistics.setdefault(grid, {})[difficulty] = dict(zip(empty_entry(), values))
+        return statistics
 
     def save_statistics(self):
         """
-        Save the statistics to a JSON file.
+        Block until every queued game has been written to the database.
         """
 
-        with open(self.filename, "w") as file:
-            json.dump(self.statistics, file, indent=4)
+        if self.writer is not None:
+            self.queue.join()
 
     def update_statistics(self, grid, difficulty, win, time_taken):
         """
@@ -40,52 +145,152 @@ class Statistics:
         - time_taken (int): The time taken to complete the game.
         """
 
-        self.statistics[grid][difficulty]["total_games_played"] += 1
+        entry = self.statistics.setdefault(grid, {}).setdefault(difficulty, empty_entry())
+
+        entry["total_games_played"] += 1
+        entry["total_time"] += time_taken
 
         if win:
-            self.statistics[grid][difficulty]["total_wins"] += 1
+            entry["total_wins"] += 1
         else:
-            self.statistics[grid][difficulty]["total_losses"] += 1
+            entry["total_losses"] += 1
 
-        if win is True and time_taken < self.statistics[grid][difficulty]["best_time"]:
-            self.statistics[grid][difficulty]["best_time"] = time_taken
+        if win is True and time_taken < entry["best_time"]:
+            entry["best_time"] = time_taken
 
-        total_games = self.statistics[grid][difficulty]["total_games_played"]
-        total_wins = self.statistics[grid][difficulty]["total_wins"]
-        if total_games > 0:
-            win_loss_ratio = total_wins / total_games * 100
-            self.statistics[grid][difficulty]["win_loss_ratio"] = f"{win_loss_ratio:.2f}%"
-
-        self.save_statistics()
+        self.submit(("game", (grid, difficulty, int(win), time_taken, time.time()), tuple(entry.values())))
 
     def reset_statistics(self):
         """
         Reset the statistics.
         """
 
+        from tkinter import messagebox
+
         for grid_size, difficulties in self.statistics.items():
             for difficulty in difficulties:
-                self.statistics[grid_size][difficulty] = {
-                    "total_games_played": 0,
-                    "total_wins": 0,
-                    "total_losses": 0,
-                    "best_time": 9999,
-                    "win_loss_ratio": "0%"
-                }
-
-        tk.messagebox.showinfo("Statistics Reset", "All statistics have been reset to their default values.")
+                self.statistics[grid_size][difficulty] = empty_entry()
+
+        self.submit(("reset", None, [(grid_size, difficulty, *entry.values())
+                                     for grid_size, difficulties in self.statistics.items()
+                                     for difficulty, entry in difficulties.items()]))
+        messagebox.showinfo("Statistics Reset", "All statistics have been reset to their default values.")
+
+    def submit(self, task):
+        """
+        Queue a task for the background writer, starting the writer on first use.
+
+        Parameters:
+        - task (tuple): The kind of task ("game" or "reset"), the game row, and the updated aggregates
+                        (one entry for a game, every row for a reset).
+        """
+
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write, daemon=True)
+            self.writer.start()
+        self.queue.put(task)
+
+    def write(self):
+        """
+        Write queued tasks to the database until a None sentinel is received.
+
+        Tasks that are already waiting are written together in one transaction. A database error drops the
+        transaction and is kept in self.error for take_error(), but the writer goes on draining the queue, so
+        save_statistics() and close() never wait on a dead thread. The connection is opened again for the
+        next transaction if opening it failed.
+        """
+
+        connection = None
+        games_since_checkpoint = 0
+
+        while True:
+            tasks = [self.queue.get()]
+            while True:
+                try:
+                    tasks.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if connection is None:
+                    connection = self.connect()
+                with connection:
+                    for task in tasks:
+                        if task is None:
+                            continue
+                        kind, game, entry = task
+                        if kind == "game":
+                            connection.execute("INSERT INTO games (grid, difficulty, win, time_taken, played_at) "
+                                               "VALUES (?, ?, ?, ?, ?)", game)
+                            connection.execute("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                               (game[0], game[1], *entry))
+                            games_since_checkpoint += 1
+                        else:
+                            connection.execute("DELETE FROM games")
+                            connection.execute("DELETE FROM aggregates")
+                            connection.executemany("INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?)", entry)
+                if games_since_checkpoint >= CHECKPOINT_EVERY or None in tasks:
+                    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    games_since_checkpoint = 0
+            except sqlite3.Error as error:
+                self.error = error
+            finally:
+                for _ in tasks:
+                    self.queue.task_done()
+
+            if None in tasks:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def take_error(self):
+        """
+        Return the last error of the background writer since the previous call, or None if there was none.
+        """
+
+        error, self.error = self.error, None
+        return error
+
+    def close(self):
+        """
+        Write every queued game and stop the background writer.
+        """
+
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+
+    def games(self, grid=None, difficulty=None):
+        """
+        Return the recorded games, oldest first, as (grid, difficulty, win, time_taken, played_at) tuples.
+
+        Parameters:
+        - grid (str, optional): Only return games on this grid size.
+        - difficulty (str, optional): Only return games on this difficulty level.
+        """
+
         self.save_statistics()
+        connection = self.connect()
+        try:
+            return connection.execute("SELECT grid, difficulty, win, time_taken, played_at FROM games "
+                                      "WHERE (? IS NULL OR grid = ?) AND (? IS NULL OR difficulty = ?) "
+                                      "ORDER BY id", (grid, grid, difficulty, difficulty)).fetchall()
+        finally:
+            connection.close()
 
     def show_statistics(self):
         """
         Display statistics in a new window.
         """
 
+        import tkinter.ttk as ttk
+
         statistics_window = tk.Toplevel()
         statistics_window.title("Statistics")
         statistics_window.geometry("750x250")
         statistics_window.resizable(False, False)
-        statistics_window.iconphoto(False, tk.PhotoImage(file="images/icon.png"))
+        statistics_window.iconphoto(False, get_assets(statistics_window).get("icon"))
 
         tree = ttk.Treeview(statistics_window, columns=("Total Games", "Total Wins",
                                                         "Total Losses", "Best Time", "Win/Loss Ratio"))
@@ -102,7 +307,7 @@ class Statistics:
                     stats["total_wins"],
                     stats["total_losses"],
                     stats["best_time"],
-                    stats["win_loss_ratio"]
+                    win_loss_ratio(stats)
                 ))
             if idx < len(self.statistics) - 1:
                 tree.insert("", "end", text="")
@@ -0,0 +1,90 @@
+import unittest
+
+from engine import Engine, IN_PROGRESS, LOST, pack_bits, unpack_bits
+
+
+def engine_with_mines(rows, cols, mines):
+    """
+    Return an engine with mines on the given (row, col) cells.
+    """
+
+    engine = Engine(rows, cols, len(mines))
+    layout = bytearray(rows * cols)
+    for row, col in mines:
+        layout[engine.index(row, col)] = 1
+    engine.place_mines(layout)
+    return engine
+
+
+class EngineTest(unittest.TestCase):
+
+    def test_index_and_position_are_inverse(self):
+        engine = Engine(3, 5, 1)
+        for index in range(engine.cell_count):
+            self.assertEqual(engine.index(*engine.position(index)), index)
+        self.assertEqual(engine.index(2, 4), 14)
+
+    def test_neighbors_stay_on_the_board(self):
+        engine = Engine(3, 4, 1)
+        self.assertEqual(sorted(engine.neighbors(0, 0)), [1, 4, 5])
+        self.assertEqual(sorted(engine.neighbors(2, 3)), [6, 7, 10])
+        self.assertEqual(sorted(engine.neighbors(1, 1)), [0, 1, 2, 4, 6, 8, 9, 10])
+
+    def test_too_many_mines_are_refused(self):
+        with self.assertRaises(ValueError):
+            Engine(3, 3, 9)
+        with self.assertRaises(ValueError):
+            Engine(3, 3, 1).place_mines(bytes(9))
+
+    def test_flags_are_limited_to_the_number_of_mines(self):
+        engine = engine_with_mines(4, 4, [(0, 0), (3, 3)])
+        self.assertTrue(engine.flag(0, 1))
+        self.assertTrue(engine.flag(0, 2))
+        self.assertFalse(engine.flag(0, 3))
+        self.assertTrue(engine.flag(0, 1))
+        self.assertTrue(engine.flag(0, 3))
+        self.assertEqual(engine.flags_placed, 2)
+        self.assertEqual(engine.is_flagged.count(1), 2)
+
+    def test_marks_and_flags_exclude_each_other(self):
+        engine = engine_with_mines(4, 4, [(0, 0)])
+        self.assertTrue(engine.mark(1, 1))
+        self.assertFalse(engine.flag(1, 1))
+        self.assertTrue(engine.mark(1, 1))
+        self.assertTrue(engine.flag(1, 1))
+        self.assertFalse(engine.mark(1, 1))
+
+    def test_revealed_cells_cannot_be_flagged_or_marked(self):
+        engine = engine_with_mines(4, 4, [(0, 0)])
+        engine.reveal(0, 1)
+        self.assertFalse(engine.flag(0, 1))
+        self.assertFalse(engine.mark(0, 1))
+
+    def test_nothing_changes_after_a_loss(self):
+        engine = engine_with_mines(4, 4, [(0, 0), (3, 3)])
+        self.assertEqual(engine.reveal(0, 0), [0])
+        self.assertEqual(engine.status, LOST)
+        self.assertEqual(engine.reveal(2, 2), [])
+        self.assertFalse(engine.flag(1, 1))
+        self.assertFalse(engine.mark(1, 1))
+
+    def test_reset_clears_the_board(self):
+        engine = engine_with_mines(4, 4, [(0, 0)])
+        engine.reveal(3, 3)
+        engine.flag(0, 0)
+        engine.reset()
+        self.assertEqual(engine.status, IN_PROGRESS)
+        self.assertEqual((engine.safe_revealed, engine.flags_placed), (0, 0))
+        for layer in (engine.has_mine, engine.is_revealed, engine.is_flagged, engine.is_marked):
+            self.assertEqual(layer, bytes(16))
+
+    def test_bits_round_trip(self):
+        for count in (0, 1, 7, 8, 9, 100):
+            values = bytes((index * 7 + 3) % 5 == 0 for index in range(count))
+            packed = pack_bits(values)
+            self.assertEqual(len(packed), (count + 7) // 8)
+            self.assertEqual(unpack_bits(packed, count), values)
+
+
+if __name__ == "__main__":
+    unittest.main()
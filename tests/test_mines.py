@@ -0,0 +1,68 @@
+import unittest
+import random
+
+from engine import Engine, count_neighbors
+
+
+def brute_force_counts(grid, rows, cols):
+    """
+    Count the set neighbors of every cell one neighbor at a time.
+    """
+
+    return bytearray(sum(grid[r * cols + c] for r in range(row - 1, row + 2) for c in range(col - 1, col + 2)
+                         if 0 <= r < rows and 0 <= c < cols and (r, c) != (row, col))
+                     for row in range(rows) for col in range(cols))
+
+
+class MineGenerationTest(unittest.TestCase):
+
+    def test_exact_mine_count_outside_the_safe_zone(self):
+        for seed, (rows, cols, mines, safe_tile) in enumerate([(10, 10, 10, (0, 0)), (16, 16, 40, (8, 8)),
+                                                               (9, 30, 250, (4, 29)), (4, 4, 7, (1, 1))]):
+            engine = Engine(rows, cols, mines, seed=seed)
+            engine.generate_mines(safe_tile)
+            self.assertEqual(engine.has_mine.count(1), mines)
+            self.assertEqual(engine.has_mine.count(0), rows * cols - mines)
+            row, col = safe_tile
+            self.assertFalse(engine.has_mine[engine.index(row, col)])
+            self.assertFalse(any(engine.has_mine[index] for index in engine.neighbors(row, col)))
+
+    def test_the_seed_decides_the_layout(self):
+        layouts = []
+        for seed in (5, 5, 6):
+            engine = Engine(16, 16, 40, seed=seed)
+            engine.generate_mines((3, 3))
+            layouts.append(bytes(engine.has_mine))
+        self.assertEqual(layouts[0], layouts[1])
+        self.assertNotEqual(layouts[0], layouts[2])
+
+    def test_too_many_mines_for_the_safe_zone_are_refused(self):
+        with self.assertRaises(ValueError):
+            Engine(4, 4, 8, seed=1).generate_mines((1, 1))
+
+    def test_every_cell_gets_mines_alike(self):
+        hits = [0] * 25
+        for seed in range(2000):
+            engine = Engine(5, 5, 4, seed=seed)
+            engine.generate_mines((0, 0))
+            for index, has_mine in enumerate(engine.has_mine):
+                hits[index] += has_mine
+        allowed = [hit for index, hit in enumerate(hits) if index not in (0, 1, 5, 6)]
+        self.assertEqual(hits[0] + hits[1] + hits[5] + hits[6], 0)
+        expected = 2000 * 4 / 21
+        self.assertTrue(all(abs(hit - expected) < expected * 0.2 for hit in allowed), allowed)
+
+    def test_neighbor_counts_match_brute_force(self):
+        generator = random.Random(3)
+        for rows, cols in [(1, 1), (1, 7), (7, 1), (4, 4), (13, 29)]:
+            grid = bytearray(generator.random() < 0.3 for _ in range(rows * cols))
+            self.assertEqual(count_neighbors(grid, rows, cols), brute_force_counts(grid, rows, cols))
+
+    def test_generated_counts_match_brute_force(self):
+        engine = Engine(20, 20, 70, seed=11)
+        engine.generate_mines((10, 10))
+        self.assertEqual(engine.neighbor_mine_count, brute_force_counts(engine.has_mine, 20, 20))
+
+
+if __name__ == "__main__":
+    unittest.main()
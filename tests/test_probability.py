@@ -0,0 +1,66 @@
+import unittest
+import itertools
+import random
+
+from engine import Engine
+from solver import Solver
+from probability import MineProbabilities
+
+
+def brute_force(engine):
+    """
+    Return the mine probability of every unrevealed cell, by listing every layout that fits the revealed counts.
+    """
+
+    hidden = [index for index in range(engine.cell_count) if not engine.is_revealed[index]]
+    numbers = [(index, engine.neighbor_mine_count[index], engine.neighbors(*engine.position(index)))
+               for index in range(engine.cell_count) if engine.is_revealed[index]]
+    hits = dict.fromkeys(hidden, 0)
+    layouts = 0
+    for mines in itertools.combinations(hidden, engine.mines):
+        chosen = set(mines)
+        if all(sum(neighbor in chosen for neighbor in neighbors) == count for _, count, neighbors in numbers):
+            layouts += 1
+            for index in mines:
+                hits[index] += 1
+    return {index: hits[index] / layouts for index in hidden}
+
+
+class ProbabilityTest(unittest.TestCase):
+
+    def test_probabilities_match_brute_force(self):
+        checked = 0
+        for seed in range(60):
+            generator = random.Random(seed)
+            engine = Engine(5, 6, 6, seed=seed)
+            safe_tile = (generator.randrange(5), generator.randrange(6))
+            engine.generate_mines(safe_tile)
+            engine.reveal(*safe_tile)
+            for index in generator.sample(range(engine.cell_count), 30):
+                if engine.cell_count - engine.is_revealed.count(1) <= 16:
+                    break
+                if not engine.has_mine[index]:
+                    engine.reveal(*engine.position(index))
+            if engine.cell_count - engine.is_revealed.count(1) > 16:
+                continue
+
+            calculator = MineProbabilities(Solver(engine), engine.mines, budget=10)
+            probabilities = calculator.compute()
+            self.assertTrue(calculator.exact)
+            expected = brute_force(engine)
+            self.assertEqual(set(probabilities), set(expected))
+            for index, probability in expected.items():
+                self.assertAlmostEqual(probabilities[index], probability, places=9, msg=(seed, index))
+            checked += 1
+        self.assertGreater(checked, 20)
+
+    def test_probabilities_add_up_to_the_mines_left(self):
+        engine = Engine(12, 12, 25, seed=5)
+        engine.generate_mines((6, 6))
+        engine.reveal(6, 6)
+        probabilities = MineProbabilities(Solver(engine), engine.mines, budget=10).compute()
+        self.assertAlmostEqual(sum(probabilities.values()), engine.mines, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import random
+import types
+
+from engine import Engine, IN_PROGRESS
+from replay import REVEAL, FLAG, MARK, ANSWER, Replay, ReplayRecorder, play_headless, verify
+
+
+def record_game(seed, dealt=None):
+    """
+    Play a game with random moves the way Board and Cell do, and return its finished recorder and engine.
+    """
+
+    generator = random.Random(seed)
+    engine = Engine(10, 10, 12, seed=seed)
+    if dealt is not None:
+        safe_tile, layout = dealt
+        engine.place_mines(layout)
+    else:
+        safe_tile = (engine.random.randrange(10), engine.random.randrange(10))
+        engine.generate_mines(safe_tile)
+    recorder = ReplayRecorder(10, 10, 12, "medium", seed, dealt)
+    actions = {REVEAL: engine.reveal, FLAG: engine.flag, MARK: engine.mark}
+
+    recorder.record(REVEAL, engine.index(*safe_tile))
+    engine.reveal(*safe_tile)
+    while engine.status == IN_PROGRESS:
+        index = generator.randrange(engine.cell_count)
+        action = generator.choice([REVEAL, REVEAL, REVEAL, FLAG, MARK])
+        if action == REVEAL and engine.has_mine[index] and generator.random() < 0.9:
+            continue
+        recorder.record(action, index)
+        actions[action](*engine.position(index))
+
+    puzzle_manager = types.SimpleNamespace(puzzles_solved=0, correct_puzzles_solved=0)
+    recorder.finish(engine.status, 17, engine, puzzle_manager)
+    return recorder, engine
+
+
+class ReplayTest(unittest.TestCase):
+
+    def test_events_round_trip(self):
+        recorder = ReplayRecorder(16, 16, 40, "hard", 2 ** 64 - 1)
+        recorder.record(REVEAL, 0)
+        recorder.record(FLAG, 255)
+        recorder.record(MARK, 17)
+        recorder.record(ANSWER, 18, 7)
+        replay = Replay(recorder.to_bytes())
+        self.assertEqual((replay.rows, replay.cols, replay.mines, replay.difficulty, replay.seed),
+                         (16, 16, 40, "hard", 2 ** 64 - 1))
+        self.assertIsNone(replay.dealt)
+        self.assertIsNone(replay.outcome)
+        self.assertEqual([event[1:] for event in replay.events],
+                         [(REVEAL, 0, 0), (FLAG, 255, 0), (MARK, 17, 0), (ANSWER, 18, 7)])
+
+    def test_large_boards_store_large_indices(self):
+        recorder = ReplayRecorder(300, 300, 1000, "easy", 1)
+        recorder.record(REVEAL, 89999)
+        self.assertEqual(Replay(recorder.to_bytes()).events[0][1:], (REVEAL, 89999, 0))
+
+    def test_a_dealt_layout_round_trips(self):
+        layout = bytes(random.Random(4).random() < 0.12 for _ in range(100))
+        recorder = ReplayRecorder(10, 10, layout.count(1), "easy", 3, ((9, 2), layout))
+        replay = Replay(recorder.to_bytes())
+        self.assertEqual(replay.dealt, ((9, 2), layout))
+
+    def test_playback_reproduces_the_outcome(self):
+        for seed in range(20):
+            recorder, engine = record_game(seed)
+            replay = Replay(recorder.to_bytes())
+            self.assertEqual(replay.outcome, (engine.status, 17, engine.safe_revealed, engine.flags_placed, 0, 0))
+            self.assertTrue(verify(replay))
+
+    def test_playback_of_a_dealt_board(self):
+        layout = bytearray(100)
+        for index in random.Random(9).sample(range(30, 100), 12):
+            layout[index] = 1
+        recorder, engine = record_game(5, dealt=((0, 0), bytes(layout)))
+        self.assertTrue(verify(Replay(recorder.to_bytes())))
+
+    def test_a_changed_outcome_is_detected(self):
+        recorder, engine = record_game(1)
+        data = bytearray(recorder.to_bytes())
+        replay = Replay(bytes(data))
+        replay.outcome = (replay.outcome[0], replay.outcome[1], replay.outcome[2] + 1) + replay.outcome[3:]
+        self.assertFalse(verify(replay))
+        self.assertEqual(play_headless(replay)[2], engine.safe_revealed)
+
+    def test_other_files_are_refused(self):
+        with self.assertRaises(ValueError):
+            Replay(b"PSSV" + bytes(40))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import random
+
+from engine import Engine, IN_PROGRESS
+
+
+def expected_region(engine, row, col):
+    """
+    Return the cells a click on a safe cell should reveal, found by a recursive walk like the original game's.
+    """
+
+    region = set()
+
+    def visit(index):
+        if index in region or engine.has_mine[index] or engine.is_revealed[index]:
+            return
+        region.add(index)
+        if engine.neighbor_mine_count[index] == 0:
+            for neighbor in engine.neighbors(*engine.position(index)):
+                visit(neighbor)
+
+    visit(engine.index(row, col))
+    return region
+
+
+class FloodFillTest(unittest.TestCase):
+
+    def test_flood_fill_matches_a_recursive_walk(self):
+        generator = random.Random(7)
+        for seed in range(30):
+            engine = Engine(12, 15, 25, seed=seed)
+            engine.generate_mines((generator.randrange(12), generator.randrange(15)))
+            for _ in range(5):
+                index = generator.randrange(engine.cell_count)
+                if engine.has_mine[index] or engine.is_revealed[index]:
+                    continue
+                expected = expected_region(engine, *engine.position(index))
+                revealed = engine.reveal(*engine.position(index))
+                self.assertEqual(len(revealed), len(set(revealed)))
+                self.assertEqual(set(revealed), expected)
+                self.assertEqual(revealed[0], index)
+
+    def test_a_large_empty_board_opens_in_one_click(self):
+        engine = Engine(300, 300, 1, seed=1)
+        layout = bytearray(engine.cell_count)
+        layout[-1] = 1
+        engine.place_mines(layout)
+        revealed = engine.reveal(0, 0)
+        self.assertEqual(len(revealed), engine.cell_count - 1)
+        self.assertEqual(engine.safe_revealed, engine.cell_count - 1)
+
+    def test_flags_inside_the_region_are_removed(self):
+        engine = Engine(5, 5, 1, seed=1)
+        layout = bytearray(25)
+        layout[24] = 1
+        engine.place_mines(layout)
+        engine.flag(0, 4)
+        engine.mark(4, 0)
+        engine.reveal(0, 0)
+        self.assertEqual(engine.flags_placed, 0)
+        self.assertFalse(engine.is_flagged[4])
+        self.assertTrue(engine.is_revealed[4])
+        self.assertTrue(engine.is_revealed[20])
+
+    def test_a_revealed_cell_reveals_nothing_more(self):
+        engine = Engine(8, 8, 10, seed=4)
+        engine.generate_mines((4, 4))
+        self.assertTrue(engine.reveal(4, 4))
+        self.assertEqual(engine.reveal(4, 4), [])
+        self.assertEqual(engine.status, IN_PROGRESS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import random
+import struct
+import os
+
+from engine import Engine
+from savegame import LAYERS, SAVE_HEADER, SavedGame, save_game
+
+
+PUZZLES = {3: ("2 + 2 - 3", 1), 40: ("6 / 3", 0), 41: ("2 + 2 - 3", 0)}
+
+
+def played_engine(seed, rows=12, cols=15, mines=30):
+    """
+    Return an engine after a few random reveals, flags and marks.
+    """
+
+    generator = random.Random(seed)
+    engine = Engine(rows, cols, mines, seed=seed)
+    engine.generate_mines((rows // 2, cols // 2))
+    engine.reveal(rows // 2, cols // 2)
+    for _ in range(20):
+        row, col = generator.randrange(rows), generator.randrange(cols)
+        move = generator.choice([engine.flag, engine.mark, engine.reveal])
+        if move != engine.reveal or not engine.has_mine[engine.index(row, col)]:
+            move(row, col)
+    return engine
+
+
+class SaveGameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "saves", "game.pysv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def round_trip(self, engine, **header):
+        """
+        Save an engine, restore it into a new one and return the saved game and the new engine.
+        """
+
+        save_game(self.filename, engine, header.get("difficulty", "hard"), engine.status, 95, 2 ** 64 - 1,
+                  header.get("safe_tile", (6, 7)), PUZZLES)
+        saved = SavedGame(self.filename)
+        self.addCleanup(saved.close)
+        restored = Engine(engine.rows, engine.cols, engine.mines)
+        saved.restore(restored)
+        return saved, restored
+
+    def test_a_game_in_progress_round_trips(self):
+        for seed in range(10):
+            engine = played_engine(seed)
+            saved, restored = self.round_trip(engine)
+            self.assertEqual((saved.difficulty, saved.game_is_on, saved.timer_value, saved.seed, saved.safe_tile),
+                             ("hard", engine.status, 95, 2 ** 64 - 1, (6, 7)))
+            for layer in LAYERS + ["neighbor_mine_count"]:
+                self.assertEqual(getattr(restored, layer), getattr(engine, layer), layer)
+            self.assertEqual((restored.safe_revealed, restored.flags_placed, restored.exploded),
+                             (engine.safe_revealed, engine.flags_placed, engine.exploded))
+            self.assertEqual(restored.status, engine.status)
+            self.assertEqual(saved.puzzles(), PUZZLES)
+
+    def test_a_lost_game_round_trips(self):
+        engine = played_engine(3)
+        engine.reveal(*engine.position(engine.has_mine.index(1)))
+        saved, restored = self.round_trip(engine)
+        self.assertTrue(restored.exploded)
+        self.assertEqual(restored.status, engine.status)
+        self.assertEqual(restored.safe_revealed, engine.safe_revealed)
+
+    def test_the_layers_take_one_bit_per_cell(self):
+        engine = played_engine(1, rows=40, cols=50, mines=300)
+        save_game(self.filename, engine, "easy", 1, 0, 1, (20, 25), {})
+        self.assertEqual(os.path.getsize(self.filename), SAVE_HEADER.size + len(LAYERS) * 2000 // 8)
+        self.assertEqual(os.listdir(os.path.dirname(self.filename)), ["game.pysv"])
+
+    def test_a_different_engine_is_refused(self):
+        saved, _ = self.round_trip(played_engine(2))
+        with self.assertRaises(ValueError):
+            saved.restore(Engine(12, 15, 29))
+
+    def test_damaged_files_are_refused(self):
+        save_game(self.filename, played_engine(4), "medium", 1, 3, 9, (6, 7), PUZZLES)
+        with open(self.filename, "rb") as file:
+            good = file.read()
+        damaged = [b"", good[:20], good[:SAVE_HEADER.size + 10], good[:4] + struct.pack("<H", 1) + good[6:],
+                   good[:SAVE_HEADER.size] + b"\xff" * 23 + good[SAVE_HEADER.size + 23:]]
+        for data in damaged:
+            with open(self.filename, "wb") as file:
+                file.write(data)
+            with self.assertRaises(ValueError):
+                SavedGame(self.filename).close()
+
+        with open(self.filename, "wb") as file:
+            file.write(good[:-2])
+        saved = SavedGame(self.filename)
+        self.addCleanup(saved.close)
+        with self.assertRaises(ValueError):
+            saved.puzzles()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import asyncio
+
+from replay import REVEAL
+from server import (CONTROL, FRAME, HIDDEN, MAX_MESSAGE, GameServer, decode, encode, encode_action,
+                    encode_control, read_message)
+
+
+TIMEOUT = 5
+
+
+class Connection:
+
+    def __init__(self, reader, writer):
+        """
+        Initialize a raw connection to the game server under test.
+        """
+
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        Return the next message from the server, decoded, or None once the server closed the connection.
+        """
+
+        message = await asyncio.wait_for(read_message(self.reader, max_length=1 << 30), TIMEOUT)
+        return None if message is None else decode(*message)
+
+    async def expect(self, op):
+        """
+        Return the next message with an operation, skipping the others.
+        """
+
+        while True:
+            message = await self.receive()
+            if message is None:
+                raise AssertionError(f"The connection closed while waiting for {op!r}.")
+            if message["op"] == op:
+                return message
+
+    def close(self):
+        self.writer.close()
+
+
+class GameServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await asyncio.start_server(GameServer().handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.connections = []
+
+    async def asyncTearDown(self):
+        for connection in self.connections:
+            connection.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def connect(self):
+        connection = Connection(*await asyncio.open_connection("127.0.0.1", self.port))
+        self.connections.append(connection)
+        return connection
+
+    async def create_race(self, seed=7):
+        """
+        Create a two-player game, join it from a second connection and return both after the start.
+        """
+
+        first, second = await self.connect(), await self.connect()
+        await first.send(encode_control({"op": "create", "grid": "10x10", "difficulty": "easy", "players": 2,
+                                         "seed": seed}))
+        joined = await first.expect("joined")
+        await second.send(encode_control({"op": "join", "game": joined["game"]}))
+        self.assertEqual((await second.expect("joined"))["player"], 1)
+        await first.expect("start")
+        await second.expect("start")
+        return joined, first, second
+
+    async def test_create_join_and_start(self):
+        joined, first, second = await self.create_race()
+        self.assertEqual(joined["player"], 0)
+        self.assertEqual((joined["rows"], joined["cols"], joined["mines"]), (10, 10, 10))
+        self.assertFalse(joined["started"])
+
+    async def test_the_seed_never_leaves_the_server(self):
+        joined, first, second = await self.create_race()
+        self.assertNotIn("seed", joined)
+
+        lister = await self.connect()
+        await lister.send(encode_control({"op": "create", "grid": "10x10", "players": 2, "seed": 3}))
+        self.assertNotIn("seed", await lister.expect("joined"))
+        await lister.send(encode_control({"op": "list"}))
+        games = (await lister.expect("games"))["games"]
+        self.assertEqual(len(games), 1)
+        self.assertNotIn("seed", games[0])
+
+    async def test_reveal_sends_a_delta_to_every_player(self):
+        joined, first, second = await self.create_race()
+        row, col = joined["safe_tile"]
+        await first.send(encode_action(REVEAL, row * joined["cols"] + col))
+        for connection in (first, second):
+            delta = await connection.expect("delta")
+            self.assertEqual(delta["player"], 0)
+            cells = dict(delta["cells"])
+            self.assertIn(row * joined["cols"] + col, cells)
+            self.assertTrue(all(value <= 8 for value in cells.values()))
+
+    async def test_spectator_receives_a_snapshot(self):
+        joined, first, second = await self.create_race()
+        row, col = joined["safe_tile"]
+        await first.send(encode_action(REVEAL, row * joined["cols"] + col))
+        revealed = (await first.expect("delta"))["cells"]
+
+        spectator = await self.connect()
+        await spectator.send(encode_control({"op": "spectate", "game": joined["game"]}))
+        self.assertEqual((await spectator.expect("spectating"))["game"], joined["game"])
+        snapshots = [await spectator.expect("delta"), await spectator.expect("delta")]
+        self.assertEqual(sorted(snapshots[0]["cells"]), sorted(revealed))
+        self.assertEqual(snapshots[1]["cells"], [])
+        self.assertTrue(all(value != HIDDEN for _, value in snapshots[0]["cells"]))
+
+    async def test_malformed_control_messages_are_rejected(self):
+        connection = await self.connect()
+        rejected = [
+            encode(CONTROL, b"[1, 2]"),
+            encode_control({"op": "join", "game": [1]}),
+            encode_control({"op": "spectate", "game": "1"}),
+            encode_control({"op": "dance"}),
+            encode_control({"op": "create", "grid": "10x20"}),
+            encode_control({"op": "create", "grid": "3x3"}),
+            encode_control({"op": "create", "grid": 16}),
+            encode_control({"op": "create", "grid": "10x10", "seed": -5}),
+            encode_control({"op": "create", "grid": "10x10", "seed": 1 << 64}),
+            encode_control({"op": "create", "grid": "10x10", "players": 0}),
+            encode_control({"op": "create", "grid": "10x10", "density": "high"}),
+            encode_control({"op": "create", "grid": "10x10", "difficulty": "extreme"}),
+        ]
+        for data in rejected:
+            await connection.send(data)
+            self.assertEqual((await connection.receive())["op"], "error", data)
+
+        await connection.send(encode_control({"op": "list"}))
+        self.assertEqual(await connection.expect("games"), {"op": "games", "games": []})
+
+    async def test_oversized_frame_closes_the_connection(self):
+        connection = await self.connect()
+        await connection.send(FRAME.pack(CONTROL, MAX_MESSAGE + 1))
+        self.assertIsNone(await connection.receive())
+
+    async def test_actions_before_the_start_are_refused(self):
+        connection = await self.connect()
+        await connection.send(encode_control({"op": "create", "grid": "10x10", "players": 2, "seed": 1}))
+        joined = await connection.expect("joined")
+        await connection.send(encode_action(REVEAL, 0))
+        self.assertEqual((await connection.expect("error"))["message"], "Waiting for players.")
+        self.assertEqual(joined["joined"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import random
+
+from engine import Engine
+from solver import Solver
+from generator import is_solvable
+
+
+def played_engine(seed, rows=16, cols=16, mines=40, clicks=6):
+    """
+    Return an engine after its safe tile and a few random safe cells were revealed.
+    """
+
+    generator = random.Random(seed)
+    engine = Engine(rows, cols, mines, seed=seed)
+    safe_tile = (generator.randrange(rows), generator.randrange(cols))
+    engine.generate_mines(safe_tile)
+    engine.reveal(*safe_tile)
+    for _ in range(clicks):
+        index = generator.randrange(engine.cell_count)
+        if not engine.has_mine[index]:
+            engine.reveal(*engine.position(index))
+    return engine
+
+
+class SolverTest(unittest.TestCase):
+
+    def assert_sound(self, engine, solver):
+        for index in solver.safe:
+            self.assertFalse(engine.has_mine[index])
+            self.assertFalse(engine.is_revealed[index])
+        for index in solver.mines:
+            self.assertTrue(engine.has_mine[index])
+
+    def test_deductions_are_sound(self):
+        for seed in range(40):
+            engine = played_engine(seed, mines=30 + seed)
+            self.assert_sound(engine, Solver(engine))
+
+    def test_a_one_two_one_pattern(self):
+        # The bottom row is revealed: 1 2 1 against three hidden cells above it, of which the outer two are mines.
+        engine = Engine(2, 3, 2)
+        engine.place_mines(bytes([1, 0, 1, 0, 0, 0]))
+        for col in range(3):
+            engine.reveal(1, col)
+        solver = Solver(engine)
+        self.assertEqual(solver.mines, {0, 2})
+        self.assertEqual(solver.safe, {1})
+        self.assertEqual(solver.next_safe(), 1)
+
+    def test_incremental_updates_match_a_fresh_solver(self):
+        for seed in range(25):
+            generator = random.Random(seed)
+            engine = played_engine(seed, clicks=0)
+            solver = Solver(engine)
+            for _ in range(8):
+                index = solver.next_safe()
+                if index is None:
+                    index = generator.choice([cell for cell in range(engine.cell_count)
+                                              if not engine.has_mine[cell] and not engine.is_revealed[cell]])
+                solver.update(engine.reveal(*engine.position(index)))
+                self.assert_sound(engine, solver)
+                fresh = Solver(engine)
+                self.assertEqual(solver.mines, fresh.mines)
+                self.assertEqual({index for index in solver.safe if not engine.is_revealed[index]}, fresh.safe)
+                self.assertEqual(solver.known, fresh.known)
+
+    def test_a_board_that_needs_no_guess_is_solvable(self):
+        engine = Engine(9, 9, 9)
+        engine.place_mines(bytes([1] * 9 + [0] * 72))
+        self.assertTrue(is_solvable(engine, (8, 8)))
+        self.assertEqual(engine.is_revealed, bytes(81))
+
+    def test_a_fifty_fifty_is_not_solvable(self):
+        # Both cells of the last column touch the same two revealed 1s, so either may hold the mine.
+        engine = Engine(2, 4, 1)
+        engine.place_mines(bytes([0, 0, 0, 1, 0, 0, 0, 0]))
+        self.assertFalse(is_solvable(engine, (1, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
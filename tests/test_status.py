@@ -0,0 +1,61 @@
+import unittest
+import random
+
+from engine import Engine, IN_PROGRESS, LOST, WON
+
+
+def scanned_status(engine):
+    """
+    Return the status of a game by scanning the whole board, as the game did before the counters.
+    """
+
+    if any(engine.is_revealed[index] and engine.has_mine[index] for index in range(engine.cell_count)):
+        return LOST
+    if all(engine.is_revealed[index] or engine.has_mine[index] for index in range(engine.cell_count)):
+        return WON
+    return IN_PROGRESS
+
+
+class StatusTest(unittest.TestCase):
+
+    def test_counters_match_a_full_scan_during_random_play(self):
+        generator = random.Random(2)
+        for seed in range(40):
+            engine = Engine(9, 9, 12, seed=seed)
+            engine.generate_mines((4, 4))
+            engine.reveal(4, 4)
+            while engine.status == IN_PROGRESS:
+                row, col = generator.randrange(9), generator.randrange(9)
+                move = generator.random()
+                if move < 0.2:
+                    engine.flag(row, col)
+                elif move < 0.3:
+                    engine.mark(row, col)
+                elif not engine.has_mine[engine.index(row, col)] or move > 0.97:
+                    engine.reveal(row, col)
+                self.assertEqual(engine.status, scanned_status(engine))
+                self.assertEqual(engine.safe_revealed,
+                                 sum(engine.is_revealed[index] and not engine.has_mine[index]
+                                     for index in range(engine.cell_count)))
+                self.assertEqual(engine.flags_placed, engine.is_flagged.count(1))
+
+    def test_revealing_every_safe_cell_wins(self):
+        engine = Engine(6, 6, 5, seed=8)
+        engine.generate_mines((0, 0))
+        for index in range(engine.cell_count):
+            if not engine.has_mine[index]:
+                engine.reveal(*engine.position(index))
+                self.assertEqual(engine.status, WON if engine.safe_revealed == 31 else IN_PROGRESS)
+        self.assertEqual(engine.status, WON)
+        self.assertEqual(engine.safe_revealed, 31)
+
+    def test_revealing_a_mine_loses(self):
+        engine = Engine(6, 6, 5, seed=8)
+        engine.generate_mines((0, 0))
+        engine.reveal(*engine.position(engine.has_mine.index(1)))
+        self.assertEqual(engine.status, LOST)
+        self.assertEqual(engine.safe_revealed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
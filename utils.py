@@ -1,5 +1,6 @@
-import webbrowser
-import winsound
+import os
+
+from audio import get_audio
 
 
 def open_github():
@@ -8,6 +9,7 @@ def open_github():
     """
 
     github_url = "https://github.com/georgescutelnicu/PySweeper"
+    import webbrowser
     webbrowser.open(github_url)
 
 
@@ -17,18 +19,19 @@ def open_rules():
     """
 
     rules_url = "https://github.com/georgescutelnicu/PySweeper/tree/main/rules"
+    import webbrowser
     webbrowser.open(rules_url)
 
 
 def play_sound(sound_path):
     """
-    Play a sound file.
+    Play a sound file on the shared audio engine without blocking.
 
     Parameters:
-    - sound_path (str): The path to the sound file.
+    - sound_path (str): The path to the sound file, such as "sounds/flag.wav".
     """
 
-    winsound.PlaySound(sound_path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+    get_audio().play(os.path.splitext(os.path.basename(sound_path))[0])
 
 
 def toggle_sound(board):